@@ -0,0 +1,102 @@
+import os
+import time
+import shutil
+import argparse
+import tempfile
+from mock_vahan_server import start_mock_server, MOCK_STATES
+from vahan_http_client import VahanHttpClient
+
+# Offline throughput benchmark against the bundled mock server (or any --url)
+
+def bench_http(url, states, months, year):
+    """Download states x months through the HTTP backend. Returns (downloads, seconds)."""
+    work_dir = tempfile.mkdtemp(prefix="vahan_bench_")
+    client = VahanHttpClient(url)
+    downloads = 0
+    start = time.perf_counter()
+    try:
+        if not client.load():
+            return 0, 0.0
+        for state_name in states:
+            if not (client.select("state", state_name) and client.select("year", year) and client.refresh()):
+                continue
+            available = client.get_available_months()
+            for month in months:
+                if month not in available or not client.select("month", month):
+                    continue
+                if client.download_xls(os.path.join(work_dir, f"bench_{downloads}.xlsx")):
+                    downloads += 1
+    finally:
+        client.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return downloads, time.perf_counter() - start
+
+def bench_selenium(url, states, months, year, fast):
+    """
+    Same workload through Chrome with the default or the fast profile.
+    Returns (downloads, seconds, startup_seconds); startup covers launch and the first page load.
+    """
+    import main
+    from download_manager import new_download_job, wait_for_download, cleanup_download_job
+    from dynamic_dropdown_finder import click_refresh_dynamic, click_download_dynamic
+    main.VAHAN_URL = url
+    work_dir = tempfile.mkdtemp(prefix="vahan_bench_")
+    downloads = 0
+    start = time.perf_counter()
+    driver = main.setup_driver(work_dir, fast=fast)
+    startup = time.perf_counter() - start
+    try:
+        for state_name in states:
+            if not (main.select_state(driver, state_name)
+                    and main.select_dropdown(driver, "selectedYear_label", year)
+                    and click_refresh_dynamic(driver)):
+                continue
+            available = main.get_available_months_for_year(driver)
+            for month in months:
+                if month not in available or not main.select_month(driver, month):
+                    continue
+                job_dir = new_download_job(driver, work_dir, f"bench_{downloads}")
+                if click_download_dynamic(driver) and wait_for_download(job_dir, timeout=30):
+                    downloads += 1
+                cleanup_download_job(job_dir)
+    finally:
+        driver.quit()
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return downloads, time.perf_counter() - start, startup
+
+def print_result(name, downloads, seconds):
+    rate = downloads / seconds if seconds else 0.0
+    print(f"[INFO] {name}: {downloads} downloads in {seconds:.2f}s ({rate:.1f} downloads/s)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark VAHAN fetch backends offline")
+    parser.add_argument("--url", help="Report page URL; defaults to a mock server started in-process")
+    parser.add_argument("--states", type=int, default=4, help="Number of mock states to download")
+    parser.add_argument("--months", default="JAN,FEB,MAR", help="Comma separated months")
+    parser.add_argument("--year", default="2024")
+    parser.add_argument("--selenium", action="store_true",
+                        help="Also time the browser backend with the default and the fast profile (needs Chrome)")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if not url:
+        server, url = start_mock_server()
+        print(f"[INFO] Started mock server at {url}")
+    months = [m.strip().upper() for m in args.months.split(",") if m.strip()]
+    try:
+        downloads, seconds = bench_http(url, MOCK_STATES[:args.states], months, args.year)
+        print_result("http backend", downloads, seconds)
+        if args.selenium:
+            timings = {}
+            for name, fast in (("selenium default profile", False), ("selenium fast profile", True)):
+                downloads, seconds, startup = bench_selenium(url, MOCK_STATES[:args.states], months, args.year, fast)
+                print_result(name, downloads, seconds)
+                print(f"[INFO] {name}: browser start-up and first page load {startup:.2f}s")
+                timings[name] = seconds
+            before, after = timings["selenium default profile"], timings["selenium fast profile"]
+            if after:
+                print(f"[INFO] fast profile speed-up: {before / after:.2f}x ({before - after:.2f}s saved)")
+    finally:
+        if server:
+            server.shutdown()
@@ -0,0 +1,50 @@
+import os
+
+# Fast profile: headless Chrome that skips non-essential downloads and runs no UI animations.
+# Enable with `main.py --fast` or VAHAN_FAST_PROFILE=1.
+FAST_PROFILE = os.environ.get("VAHAN_FAST_PROFILE", "0") == "1"
+
+# Network.setBlockedURLs only takes wildcard patterns, so PNGs stay allowed: the Excel download
+# anchor is an <img src=".../csv.png"> and would have no size to click without it. Stylesheets are
+# kept too, since PrimeFaces hides closed panels and overlays through CSS.
+BLOCKED_URL_PATTERNS = [
+    "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.bmp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+]
+
+# Runs before any page script: turns jQuery effects off (PrimeFaces panel slides/fades use them),
+# zeroes the named effect durations and disables CSS transitions and animations.
+NO_ANIMATION_JS = """
+(function () {
+    function disableEffects() {
+        var $ = window.jQuery;
+        if ($ && $.fx) {
+            $.fx.off = true;
+            if ($.fx.speeds) { $.fx.speeds._default = 0; $.fx.speeds.fast = 0; $.fx.speeds.slow = 0; }
+        }
+        if (document.head && !document.getElementById('vahan-no-animation')) {
+            var style = document.createElement('style');
+            style.id = 'vahan-no-animation';
+            style.textContent = '*, *::before, *::after { transition: none !important; animation: none !important; }';
+            document.head.appendChild(style);
+        }
+    }
+    document.addEventListener('DOMContentLoaded', disableEffects);
+    window.addEventListener('load', disableEffects);
+})();
+"""
+
+def add_fast_options(chrome_options):
+    """Headless Chrome options for the fast profile"""
+    chrome_options.add_argument("--headless=new")
+    chrome_options.add_argument("--mute-audio")
+    chrome_options.add_argument("--disable-background-networking")
+    chrome_options.add_argument("--disable-renderer-backgrounding")
+
+def apply_fast_profile(driver):
+    """Install URL blocking and the animation switch-off; call before the first navigation"""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+    driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": NO_ANIMATION_JS})
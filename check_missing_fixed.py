@@ -247,8 +247,6 @@ def select_month(driver, month_name):
         )
         month_options = month_items.find_elements(By.CSS_SELECTOR, "li:not([style*='display: none'])")
         print("[DEBUG] Available months in dropdown:", [m.text.strip() for m in month_options])
-        with open("month_debug.txt", "a", encoding="utf-8") as f:
-            f.write("[DEBUG] Available months in dropdown: " + str([m.text.strip() for m in month_options]) + "\n")
         for month_opt in month_options:
             if month_opt.text.strip().lower().startswith(month_name.lower()):
                 print(f"[INFO] Selecting month: {month_opt.text.strip()}")
@@ -345,8 +343,6 @@ def get_available_months_for_year(driver):
         month_dropdown.click()
         time.sleep(0.1)
         print("[DEBUG] Available months for selected year:", months)
-        with open("month_debug.txt", "a", encoding="utf-8") as f:
-            f.write("[DEBUG] Available months for selected year: " + str(months) + "\n")
         return months
     except Exception as e:
         print(f"[ERROR] Failed to get available months for year: {e}")
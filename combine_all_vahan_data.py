@@ -1,119 +1,230 @@
 import os
-import pandas as pd
+import re
 import sys
+import json
+import argparse
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from vahan_workbook import read_report_table
+from parse_cache import ParseCache
+from vahan_dataset import spec_name, long_types, pivot_wide, write_dataset, DATASET_DIR
+
+# vahan_data_<YYYYMMDD_HHMMSS>[_<suffix>].xlsx, as saved by main.py
+REPORT_STAMP = re.compile(r"_(\d{8}_\d{6})(?:_\w+)?\.\w+$")
+MONTH_MAP = {'JAN': '01', 'FEB': '02', 'MAR': '03', 'APR': '04', 'MAY': '05', 'JUN': '06', 'JUL': '07', 'AUG': '08', 'SEP': '09', 'OCT': '10', 'NOV': '11', 'DEC': '12'}
+
+def _subdirs(path):
+    with os.scandir(path) as entries:
+        return sorted(entry.name for entry in entries if entry.is_dir())
 
-if len(sys.argv) > 1:
-    OUTPUTS_DIR = sys.argv[1]
-else:
-    OUTPUTS_DIR = 'outputs'
+def find_report_files(outputs_dir):
+    """(state, year, month, path) of every report under outputs_dir/state/year/month, in a stable order"""
+    files = []
+    for state in _subdirs(outputs_dir):
+        state_path = os.path.join(outputs_dir, state)
+        for year in _subdirs(state_path):
+            year_path = os.path.join(state_path, year)
+            for month in _subdirs(year_path):
+                month_path = os.path.join(year_path, month)
+                with os.scandir(month_path) as entries:
+                    names = sorted(e.name for e in entries if e.is_file() and e.name.endswith(('.xlsx', '.json')))
+                files.extend((state, year, month, os.path.join(month_path, name)) for name in names)
+    return files
 
-if not os.path.isdir(OUTPUTS_DIR):
-    print(f"[ERROR] The specified folder '{OUTPUTS_DIR}' does not exist.")
-    sys.exit(1)
+def report_records(table):
+    """
+    Long rows of one report: maker (the Y-Axis label), dimension_type (the X-Axis, e.g. Fuel),
+    dimension_value (e.g. PETROL) and count. Zero counts are left out; TOTAL is recomputed on export.
+    """
+    dimension_type = table['column_dimension'] or 'Count'
+    counts = {}
+    for row in table['rows']:
+        # A label repeated in the header or the rows (rare) is summed into one record
+        for column, count in zip(table['columns'], row['counts']):
+            if count:
+                counts[(row['label'], column)] = counts.get((row['label'], column), 0) + count
+    df = pd.DataFrame([(maker, dimension_type, value, count) for (maker, value), count in counts.items()],
+                      columns=['maker', 'dimension_type', 'dimension_value', 'count'])
+    # Kept through the parse cache and the worker processes; picks the dataset partition to write
+    df.attrs['spec'] = spec_name(table['row_dimension'], dimension_type)
+    return df
 
-print(f"[INFO] Combining data from folder: {OUTPUTS_DIR}")
+def load_table_file(fpath):
+    """Report table read from the page (main.py --extract table): already typed, no header search needed"""
+    with open(fpath, encoding='utf-8') as f:
+        table = json.load(f)
+    return report_records(table), f"{len(table['rows'])} rows, report table"
 
-COMBINED_FILE_XLSX = f'combined_data_{os.path.basename(OUTPUTS_DIR)}.xlsx'
-COMBINED_FILE_CSV = f'combined_data_{os.path.basename(OUTPUTS_DIR)}.csv'
+def load_excel_file(fpath):
+    """Downloaded workbook, read in one streaming pass with its two header rows resolved"""
+    table = read_report_table(fpath)
+    if table is None:
+        return None, f"Could not find real header in {fpath}, skipping."
+    return report_records(table), f"{len(table['rows'])} rows, {len(table['columns'])} {table['column_dimension'] or 'count'} columns"
+
+def parse_report(fpath):
+    """
+    Parse one report file into its long records (see report_records: maker, dimension_type,
+    dimension_value, count, with the spec in attrs). The state and yyyymm columns are added by
+    tag_report in the parent process. Runs in the worker processes with --jobs, so it returns
+    (DataFrame or None, log message) instead of printing.
+    """
+    try:
+        if fpath.endswith('.json'):
+            df, detail = load_table_file(fpath)
+        else:
+            df, detail = load_excel_file(fpath)
+        if df is None:
+            return None, detail
+        return df, f"Loaded: {fpath} ({detail})"
+    except Exception as e:
+        return None, f"Failed to load {fpath}: {e}"
 
-all_data = []
+def tag_report(df, report):
+    """Add the state and YYYYMM of the report's folder; None when the folders are not a year and a month"""
+    state, year, month, _ = report
+    number = MONTH_MAP.get(str(month).upper())
+    if number is None or not str(year).isdigit():
+        return None
+    df.insert(0, 'state', state)
+    df.insert(1, 'yyyymm', int(f"{year}{number}"))
+    return df
 
-for state in os.listdir(OUTPUTS_DIR):
-    state_path = os.path.join(OUTPUTS_DIR, state)
-    if not os.path.isdir(state_path):
-        continue
-    for year in os.listdir(state_path):
-        year_path = os.path.join(state_path, year)
-        if not os.path.isdir(year_path):
+def report_saved_at(fpath):
+    """Sort key of when a report was saved: the timestamp in its name, then its modification time"""
+    match = REPORT_STAMP.search(os.path.basename(fpath))
+    return (match.group(1) if match else "", os.stat(fpath).st_mtime_ns)
+
+def latest_reports(tagged):
+    """
+    Keep one report per spec, state and month: a month folder can hold a file downloaded again (or
+    saved again by a resumed task), and adding both would double its counts. The newest file wins;
+    the others are logged and skipped. `tagged` is a list of (report, DataFrame) in report order.
+    """
+    def key(report, df):
+        return (df.attrs.get('spec'), report[0], report[1], report[2])
+    latest = {}
+    for report, df in tagged:
+        previous = latest.get(key(report, df))
+        if previous is None or report_saved_at(report[3]) >= report_saved_at(previous[3]):
+            latest[key(report, df)] = report
+        if previous is not None:
+            kept = latest[key(report, df)]
+            skipped = report if kept is previous else previous
+            print(f"[WARN] {report[0]}/{report[1]}/{report[2]} has more than one {df.attrs.get('spec')} report; "
+                  f"using {os.path.basename(kept[3])}, skipping {os.path.basename(skipped[3])}")
+    return [df for report, df in tagged if latest[key(report, df)] is report]
+
+def load_reports(reports, jobs=1, cache=None):
+    """
+    Parse every report, in `jobs` worker processes when jobs > 1; frames keep the order of `reports`,
+    with only the newest report of each spec and month folder (see latest_reports).
+    With a ParseCache, unchanged files are read from their cached fragment and only new or changed
+    files are parsed; fragments of files that are gone are evicted.
+    """
+    parsed = {}
+    if cache is not None:
+        for report in reports:
+            df = cache.lookup(report[3])
+            if df is not None:
+                parsed[report[3]] = (df, f"Cached: {report[3]}")
+    to_parse = [report[3] for report in reports if report[3] not in parsed]
+    if jobs > 1 and len(to_parse) > 1:
+        print(f"[INFO] Parsing {len(to_parse)} reports in {jobs} processes")
+        # The frames come back pickled; they are a few hundred rows each, and the parse cache
+        # (the only Arrow user) writes them in the parent
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(parse_report, to_parse, chunksize=max(1, len(to_parse) // (jobs * 4))))
+    else:
+        results = [parse_report(fpath) for fpath in to_parse]
+    for fpath, (df, message) in zip(to_parse, results):
+        parsed[fpath] = (df, message)
+        if cache is not None and df is not None:
+            cache.store(fpath, df)
+    if cache is not None:
+        cache.evict_missing()
+        cache.save()
+        print(f"[INFO] Parse cache: {cache.stats['hits']} unchanged, {cache.stats['parsed']} parsed, "
+              f"{cache.stats['evicted']} evicted")
+    tagged = []
+    for report in reports:
+        df, message = parsed[report[3]]
+        print(message)
+        if df is None:
+            continue
+        if tag_report(df, report) is None:
+            print(f"[WARN] Skipping {report[3]}: {report[1]}/{report[2]} is not a year/month folder")
             continue
-        for month in os.listdir(year_path):
-            month_path = os.path.join(year_path, month)
-            if not os.path.isdir(month_path):
-                continue
-            for fname in os.listdir(month_path):
-                if fname.endswith('.xlsx'):
-                    fpath = os.path.join(month_path, fname)
-                    try:
-                        # Read the file without header to find the real header row
-                        preview = pd.read_excel(fpath, header=None, nrows=10)
-                        header_row_idx = None
-                        for i, row in preview.iterrows():
-                            row_str = row.astype(str).str.lower().str.replace(' ', '')
-                            if ('sno' in row_str.values or 's.no.' in row_str.values) and any('maker' in v for v in row_str.values):
-                                header_row_idx = i
-                                break
-                        if header_row_idx is None:
-                            print(f"Could not find real header in {fpath}, skipping.")
-                            continue
-                        df = pd.read_excel(fpath, header=header_row_idx)
-                        # Standardize column names and remove 'Unnamed' from column names
-                        df.columns = [str(col).replace('Unnamed', '').strip() for col in df.columns]
-                        # If there are multiple S.No. columns, keep only the last one
-                        sno_cols = [col for col in df.columns if str(col).strip().replace(' ', '').lower() in ['s.no.', 'sno', 's.no']]
-                        if len(sno_cols) > 1:
-                            for col in sno_cols[:-1]:
-                                df = df.drop(columns=col)
-                        # Rename the last S.No. column to 'S.No.'
-                        if sno_cols:
-                            df = df.rename(columns={sno_cols[-1]: 'S.No.'})
-                        df['State'] = state
-                        df['Year'] = year
-                        df['Month'] = month
-                        all_data.append(df)
-                        print(f"Loaded: {fpath} ({df.shape[0]} rows, header at row {header_row_idx})")
-                    except Exception as e:
-                        print(f"Failed to load {fpath}: {e}")
+        tagged.append((report, df))
+    return latest_reports(tagged)
 
-if all_data:
-    combined_df = pd.concat(all_data, ignore_index=True, join='outer')
-    # Convert all columns that look like numbers but are stored as text to numeric type
-    for col in combined_df.columns:
-        combined_df[col] = pd.to_numeric(combined_df[col], errors='ignore')
-    # Drop all columns whose names start with 'S.No.' (including all variants)
-    sno_cols = [col for col in combined_df.columns if str(col).strip().replace(' ', '').lower().startswith('s.no.') or str(col).strip().replace(' ', '').lower() == 'sno']
-    if sno_cols:
-        combined_df = combined_df.drop(columns=sno_cols)
-    print('All columns in combined DataFrame:')
-    print(combined_df.columns.tolist())
-    # --- Combine Month and Year into YYYYMM format ---
-    month_map = {'JAN': '01', 'FEB': '02', 'MAR': '03', 'APR': '04', 'MAY': '05', 'JUN': '06', 'JUL': '07', 'AUG': '08', 'SEP': '09', 'OCT': '10', 'NOV': '11', 'DEC': '12'}
-    if 'Month' in combined_df.columns and 'Year' in combined_df.columns:
-        combined_df['Month'] = combined_df.apply(lambda row: f"{row['Year']}{month_map.get(str(row['Month']).upper(), '??')}", axis=1)
-        combined_df = combined_df.drop(columns=['Year'])
-    # Find Maker and Vehicle Class columns (case-insensitive, ignore spaces)
-    def find_col(df, target):
-        return next((col for col in df.columns if col.strip().replace(' ', '').lower() == target), None)
-    maker_col = find_col(combined_df, 'maker')
-    vehicle_class_col = find_col(combined_df, 'vehicleclass')
-    # Remove State, Month, Maker, Vehicle Class if already present
-    cols = combined_df.columns.tolist()
-    for col in ['State', 'Month', maker_col, vehicle_class_col]:
-        if col in cols:
-            cols.remove(col)
-    # Insert in desired order, but only if the column exists
-    new_order = []
-    for col in ['State', 'Month', maker_col, vehicle_class_col]:
-        if col and col in combined_df.columns:
-            new_order.append(col)
-    new_order += cols
-    combined_df = combined_df[new_order]
+def combine_frames(frames):
+    """Concatenate the per-report records into one long table (vahan_dataset.LONG_COLUMNS), compactly typed"""
+    combined_df = pd.concat(frames, ignore_index=True)
+    print(f"[INFO] Combined {len(combined_df)} non-zero counts from {len(frames)} reports")
+    return long_types(combined_df)
+
+def save_combined(combined_df, outputs_dir, spec=None):
+    """
+    Write the wide table (see vahan_dataset.pivot_wide) as combined_data_<folder>.xlsx and .csv in
+    the current directory; with a spec, as combined_data_<folder>_<spec>.xlsx and .csv
+    """
+    name = os.path.basename(os.path.normpath(outputs_dir)) + (f'_{spec}' if spec else '')
+    xlsx_file = f'combined_data_{name}.xlsx'
+    csv_file = f'combined_data_{name}.csv'
     print(f"Combined DataFrame shape: {combined_df.shape}")
     print(f"Columns: {combined_df.columns.tolist()}")
     try:
-        with pd.ExcelWriter(COMBINED_FILE_XLSX, engine='openpyxl') as writer:
+        with pd.ExcelWriter(xlsx_file, engine='openpyxl') as writer:
             combined_df.to_excel(writer, index=False)
             worksheet = writer.sheets['Sheet1']
             for col in worksheet.columns:
                 max_length = 32
                 col_letter = col[0].column_letter
                 worksheet.column_dimensions[col_letter].width = max_length
-        print(f"Combined file saved as {COMBINED_FILE_XLSX} with column width 32.")
+        print(f"Combined file saved as {xlsx_file} with column width 32.")
     except Exception as e:
         print(f"Failed to save as Excel: {e}")
     try:
-        combined_df.to_csv(COMBINED_FILE_CSV, index=False)
-        print(f"Combined file also saved as {COMBINED_FILE_CSV}.")
+        combined_df.to_csv(csv_file, index=False)
+        print(f"Combined file also saved as {csv_file}.")
     except Exception as e:
         print(f"Failed to save as CSV: {e}")
-else:
-    print("No data found to combine.") 
\ No newline at end of file
+
+def main():
+    parser = argparse.ArgumentParser(description="Combine the downloaded VAHAN reports of an outputs folder")
+    parser.add_argument("outputs_dir", nargs="?", default="outputs", help="Folder laid out as state/year/month")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Worker processes for parsing the reports (0 = one per CPU core)")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Parse every report again instead of reusing the parse cache")
+    parser.add_argument("--no-cache", action="store_true", help="Neither read nor write the parse cache")
+    parser.add_argument("--export", action="store_true",
+                        help="Also write the wide combined_data_<folder>.xlsx and .csv")
+    args = parser.parse_args()
+    if not os.path.isdir(args.outputs_dir):
+        print(f"[ERROR] The specified folder '{args.outputs_dir}' does not exist.")
+        sys.exit(1)
+    print(f"[INFO] Combining data from folder: {args.outputs_dir}")
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    cache = None if args.no_cache else ParseCache()
+    if cache is not None and args.rebuild:
+        cache.clear()
+    frames = load_reports(find_report_files(args.outputs_dir), jobs, cache)
+    if not frames:
+        print("No data found to combine.")
+        return
+    by_spec = {}
+    for df in frames:
+        by_spec.setdefault(df.attrs.get('spec') or os.path.basename(os.path.normpath(args.outputs_dir)), []).append(df)
+    combined = {spec: combine_frames(spec_frames) for spec, spec_frames in by_spec.items()}
+    for spec, combined_df in combined.items():
+        write_dataset(combined_df, spec)
+    print(f"[INFO] Dataset updated under {DATASET_DIR}: {', '.join(combined)}")
+    if args.export:
+        # One wide file per spec: the breakdowns of different specs count the same vehicles
+        for spec, combined_df in combined.items():
+            save_combined(pivot_wide(combined_df), args.outputs_dir, spec if len(combined) > 1 else None)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import threading
+from selenium.webdriver.common.by import By
+
+# Logical dashboard controls. Dropdowns with a stable id are matched by it; the generated ones
+# (j_idtNN) by one of their options, then by the caption next to them. Refresh and the Excel
+# link are matched by their icon/image.
+CONTROL_IDS = {
+    "yaxis": "yaxisVar", "xaxis": "xaxisVar", "year_type": "selectedYearType", "year": "selectedYear",
+    "rto": "selectedRto", "month": "groupingTable:selectMonth", "download": "groupingTable:xls",
+}
+CONTROL_MARKERS = {
+    "state": "All Vahan4 Running States", "type": "Actual Value", "rto": "All Vahan4 Running Office",
+}
+CONTROL_CAPTIONS = {
+    "yaxis": "y-axis", "xaxis": "x-axis", "year_type": "year type", "year": "year",
+    "type": "type", "rto": "rto", "state": "state", "month": "month",
+}
+
+# The whole control map in one execute_script round trip: every selectOneMenu on the page with its
+# id, caption, selected label, panel/items ids and options, assigned to a logical control, plus the
+# ids of the Refresh button and the Excel link. Option texts are read with textContent, so no
+# panel has to be opened. arguments[0..2] are CONTROL_IDS, CONTROL_MARKERS and CONTROL_CAPTIONS.
+CONTROL_MAP_JS = """
+var ids = arguments[0], markers = arguments[1], captions = arguments[2];
+function text(el) { return el ? (el.textContent || '').replace(/\\u00a0/g, ' ').replace(/\\s+/g, ' ').trim() : ''; }
+function caption(root) {
+    for (var el = root, depth = 0; el && depth < 3; el = el.parentElement, depth++) {
+        for (var sib = el.previousElementSibling; sib; sib = sib.previousElementSibling) {
+            if (sib.classList.contains('ui-selectonemenu') || sib.classList.contains('ui-selectonemenu-panel')) { break; }
+            var value = text(sib).replace(/[:*]/g, '').trim();
+            if (value && value.length < 40) { return value; }
+        }
+    }
+    return '';
+}
+var controls = {}, unmatched = [];
+var roots = document.querySelectorAll('.ui-selectonemenu');
+for (var r = 0; r < roots.length; r++) {
+    var root = roots[r], id = root.id;
+    if (!id) { continue; }
+    var select = document.getElementById(id + '_input');
+    var label = document.getElementById(id + '_label');
+    var panel = document.getElementById(id + '_panel') || document.getElementById(root.getAttribute('aria-owns') || '');
+    var list = document.getElementById(id + '_items') || (panel && panel.querySelector('ul'));
+    var items = list ? list.querySelectorAll('li') : [];
+    var options = [];
+    for (var i = 0; i < items.length; i++) {
+        options.push({
+            index: i, text: text(items[i]), label: items[i].getAttribute('data-label'),
+            visible: items[i].style.display !== 'none', disabled: items[i].classList.contains('ui-state-disabled')
+        });
+    }
+    if (!items.length && select) {
+        for (var j = 0; j < select.options.length; j++) {
+            var optionText = text(select.options[j]);
+            options.push({index: j, text: optionText, label: optionText, visible: true, disabled: select.options[j].disabled});
+        }
+    }
+    var widget = {
+        id: id, caption: caption(root), selected: label ? text(label) : null,
+        label_id: label ? label.id : null, input_id: select ? select.id : null,
+        panel_id: panel ? panel.id : null, items_id: list ? list.id : null, options: options
+    };
+    var key = null, strategy = null, name;
+    for (name in ids) { if (ids[name] === id) { key = name; strategy = 'id'; } }
+    for (name in markers) {
+        if (key) { break; }
+        for (var m = 0; m < options.length; m++) {
+            if (options[m].text.indexOf(markers[name]) !== -1) { key = name; strategy = 'option'; break; }
+        }
+    }
+    for (name in captions) {
+        if (key) { break; }
+        if (widget.caption.toLowerCase() === captions[name]) { key = name; strategy = 'caption'; }
+    }
+    if (!key && root.closest('#groupingTable')) { key = 'month'; strategy = 'table header'; }
+    if (key && !controls[key]) { widget.strategy = strategy; controls[key] = widget; } else { unmatched.push(widget); }
+}
+var icon = document.querySelector('.ui-icon-refresh');
+var refresh = icon ? icon.closest('button') : null;
+if (!refresh) {
+    var buttons = document.querySelectorAll('button');
+    for (var b = 0; b < buttons.length && !refresh; b++) { if (text(buttons[b]) === 'Refresh') { refresh = buttons[b]; } }
+}
+if (refresh && refresh.id) { controls.refresh = {id: refresh.id, caption: text(refresh), strategy: icon ? 'icon' : 'text'}; }
+var link = document.getElementById(ids.download);
+var image = link ? null : document.querySelector('img[title="Download EXCEL file"]');
+link = link || (image ? image.closest('a') : null);
+if (link && link.id) { controls.download = {id: link.id, caption: link.getAttribute('title') || '', strategy: image ? 'image' : 'id'}; }
+return {controls: controls, unmatched: unmatched};
+"""
+
+_lock = threading.Lock()
+_maps = {}
+
+def _driver_key(driver):
+    return getattr(driver, "session_id", None) or id(driver)
+
+def scan_controls(driver):
+    """
+    Scan the page once and return {logical control: control} for the dashboard, or {} if the
+    scan fails. Dropdown controls are {'id', 'caption', 'selected', 'label_id', 'input_id',
+    'panel_id', 'items_id', 'options', 'strategy'}; refresh/download only have 'id', 'caption'
+    and 'strategy'. The result is kept for control_map() until forget_control_map().
+    """
+    try:
+        result = driver.execute_script(CONTROL_MAP_JS, CONTROL_IDS, CONTROL_MARKERS, CONTROL_CAPTIONS)
+    except Exception as e:
+        print(f"[WARN] Could not scan dashboard controls: {str(e).split('Stacktrace:')[0]}")
+        return {}
+    controls = (result or {}).get("controls") or {}
+    with _lock:
+        _maps[_driver_key(driver)] = controls
+    summary = ", ".join(f"{key}={control['id']}" for key, control in sorted(controls.items()))
+    print(f"[DEBUG] Mapped {len(controls)} dashboard controls: {summary}")
+    return controls
+
+def control_map(driver):
+    """The last scan of the current page, scanning it first if there is none"""
+    with _lock:
+        cached = _maps.get(_driver_key(driver))
+    if cached is not None:
+        return cached
+    return scan_controls(driver)
+
+def forget_control_map(driver):
+    """Drop the scan, e.g. after a refresh or navigation re-rendered the controls"""
+    with _lock:
+        _maps.pop(_driver_key(driver), None)
+
+def control_key(label_text):
+    """Logical control for a caption such as 'Y-Axis' or 'Year Type', or None"""
+    caption = str(label_text).strip().lower().rstrip(":")
+    return next((key for key, name in CONTROL_CAPTIONS.items() if name == caption), None)
+
+def control_id(driver, key):
+    """Widget id of a logical control from the control map, or None"""
+    return (control_map(driver).get(key) or {}).get("id")
+
+def find_control(driver, key, part="id"):
+    """
+    Return the element of a logical control (`part` picks 'id', 'label_id', 'panel_id' or
+    'items_id'). A missing or hidden element triggers one rescan; returns None if the control
+    is still not found.
+    """
+    rescanned = False
+    while True:
+        with _lock:
+            cached = _maps.get(_driver_key(driver))
+        if cached is None:
+            controls, rescanned = scan_controls(driver), True
+        else:
+            controls = cached
+        element_id = (controls.get(key) or {}).get(part)
+        for element in driver.find_elements(By.ID, element_id) if element_id else []:
+            if part in ("panel_id", "items_id") or element.is_displayed():
+                return element
+        if rescanned:
+            return None
+        forget_control_map(driver)
+
+def control_for_element(driver, element):
+    """The (key, control) whose widget, label, input, panel or items list has the element's id"""
+    try:
+        element_id = element.get_attribute("id")
+    except Exception:
+        return None, None
+    if not element_id:
+        return None, None
+    for key, control in control_map(driver).items():
+        if element_id in (control.get("id"), control.get("label_id"), control.get("input_id"),
+                          control.get("panel_id"), control.get("items_id")):
+            return key, control
+    return None, None
@@ -0,0 +1,145 @@
+from collections import Counter
+from calendar import month_abbr
+
+# A task is one download: (combo, state, year, month), where combo is the tuple of global dropdown values.
+# Month "ALL" leaves the month dropdown alone and downloads the whole year's table.
+WHOLE_YEAR = "ALL"
+MONTH_INDEX = {m.upper(): i for i, m in enumerate(month_abbr) if m}
+
+# UI transitions in the order they have to happen before a month can be downloaded
+TRANSITIONS = ("combo", "state", "year", "refresh", "months", "month")
+
+def build_tasks(filter_combinations, states, year_month_seq):
+    return [(combo, state, y, month) for combo in filter_combinations for state in states for y, month in year_month_seq]
+
+def build_plan(tasks):
+    """
+    Order tasks so the page changes as few dropdowns as possible: all tasks of a combination
+    together, then per state, then per year with its months in calendar order. That way a
+    year is selected and refreshed once and its months are walked afterwards.
+    Combinations and states keep the order they were requested in.
+    """
+    combo_order, state_order = {}, {}
+    for combo, state, _, _ in tasks:
+        combo_order.setdefault(combo, len(combo_order))
+        state_order.setdefault(state, len(state_order))
+    unique_tasks = list(dict.fromkeys(tasks))
+    return sorted(unique_tasks, key=lambda t: (
+        combo_order[t[0]], state_order[t[1]], int(t[2]), MONTH_INDEX.get(str(t[3]).upper(), 0)
+    ))
+
+def count_naive_transitions(tasks, combo_size):
+    """
+    UI transitions of the unplanned loop: every combination selects all its dropdowns, every state is
+    selected and refreshed, and every (year, month) selects the year, refreshes, reads the month
+    list and selects the month.
+    """
+    total = 0
+    combos = {task[0] for task in tasks}
+    states = {(task[0], task[1]) for task in tasks}
+    total += combo_size * len(combos)
+    total += 2 * len(states)
+    total += 4 * len(tasks)
+    return total
+
+class CrawlStateMachine:
+    """
+    Tracks what the report page currently shows (combination, state, year, month list) and performs
+    only the transitions a task needs. `actions` maps every name in TRANSITIONS to a callable taking
+    the task; "months" returns the list of available months, the others return True on success.
+    A "combo" transition counts as `combo_size` dropdown selections.
+    """
+
+    def __init__(self, actions, combo_size=1):
+        self.actions = actions
+        self.combo_size = combo_size
+        self.transitions = Counter()
+        self.reset()
+
+    def reset(self):
+        """Forget the page state, e.g. after a browser restart"""
+        self.combo = None
+        self.state = None
+        self.year = None
+        self.months = None
+
+    def needed_transitions(self, task):
+        combo, state, year, month = task
+        steps = []
+        combo_changed = combo != self.combo
+        if combo_changed:
+            steps.append("combo")
+        if combo_changed or state != self.state:
+            steps.append("state")
+        if combo_changed or str(year) != self.year:
+            steps.append("year")
+        if month == WHOLE_YEAR:
+            # Whole-year table: a refresh also clears any month picked before
+            return steps + ["refresh"]
+        if steps or self.months is None:
+            steps += ["refresh", "months"]
+        steps.append("month")
+        return steps
+
+    def run(self, task):
+        """
+        Bring the page to the task's month. Returns (True, None) when the report is ready to download,
+        otherwise (False, reason) where reason is "month_unavailable" or "failed:<transition>".
+        """
+        combo, state, year, month = task
+        for step in self.needed_transitions(task):
+            if step == "month" and month.upper() not in self.months:
+                return False, "month_unavailable"
+            result = self.actions[step](task)
+            self.transitions[step] += self.combo_size if step == "combo" else 1
+            if step == "months":
+                self.months = [m.upper() for m in result or []]
+                if not self.months:
+                    self.months = None
+                    return False, "failed:months"
+                continue
+            if not result:
+                self._invalidate(step)
+                return False, f"failed:{step}"
+            if step == "combo":
+                self.combo, self.state, self.year, self.months = combo, None, None, None
+            elif step == "state":
+                self.state, self.months = state, None
+            elif step == "year":
+                self.year, self.months = str(year), None
+        if month == WHOLE_YEAR:
+            self.months = None
+        return True, None
+
+    def _invalidate(self, step):
+        if step == "combo":
+            self.reset()
+        elif step == "state":
+            self.state, self.months = None, None
+        elif step == "year":
+            self.year, self.months = None, None
+        elif step == "refresh":
+            self.months = None
+
+    def total_transitions(self):
+        return sum(self.transitions.values())
+
+def estimate_transitions(plan, combo_size=1):
+    """Dry-run a plan assuming every transition succeeds and every month is available"""
+    dry_actions = {name: (lambda task: True) for name in TRANSITIONS}
+    dry_actions["months"] = lambda task: list(MONTH_INDEX)
+    machine = CrawlStateMachine(dry_actions, combo_size)
+    for task in plan:
+        machine.run(task)
+    return machine.total_transitions()
+
+def transition_report(plan, combo_size, actual=None):
+    """Naive vs planned (and actual, once executed) UI transition counts for a plan"""
+    report = {
+        "tasks": len(plan),
+        "naive": count_naive_transitions(plan, combo_size),
+        "planned": estimate_transitions(plan, combo_size),
+    }
+    if actual is not None:
+        report["actual"] = actual
+    return report
@@ -0,0 +1,132 @@
+import os
+import re
+import time
+import uuid
+import shutil
+import threading
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+from step_metrics import traced
+
+# Chrome writes in-progress downloads under these names; they are never a finished report
+PARTIAL_SUFFIXES = (".crdownload", ".tmp", ".part")
+
+def _is_partial(name):
+    return name.endswith(PARTIAL_SUFFIXES) or name.startswith(".")
+
+def set_download_dir(driver, download_dir):
+    """Point the browser's downloads at download_dir through CDP Browser.setDownloadBehavior"""
+    driver.execute_cdp_cmd("Browser.setDownloadBehavior", {
+        "behavior": "allow",
+        "downloadPath": download_dir,
+    })
+
+class _JobWatch(FileSystemEventHandler):
+    """Directory notifications of one job directory: set when a finished file lands or the partial file disappears"""
+
+    def __init__(self, job_dir):
+        self.job_dir = job_dir
+        self.changed = threading.Event()
+
+    def on_any_event(self, event):
+        if not event.is_directory:
+            self.changed.set()
+
+# One observer thread (inotify / ReadDirectoryChangesW / FSEvents) watches every open job directory
+_observer = None
+_watches = {}
+_lock = threading.Lock()
+
+def _watch(job_dir):
+    global _observer
+    handler = _JobWatch(job_dir)
+    with _lock:
+        if _observer is None:
+            _observer = Observer()
+            _observer.daemon = True
+            _observer.start()
+        _watches[job_dir] = (handler, _observer.schedule(handler, job_dir, recursive=False))
+    return handler
+
+def _unwatch(job_dir):
+    with _lock:
+        handler, watch = _watches.pop(job_dir, (None, None))
+        if watch is not None:
+            try:
+                _observer.unschedule(watch)
+            except Exception:
+                pass
+
+def new_download_job(driver, base_dir, job_name):
+    """
+    Create a unique, empty directory for one download, send the browser's next download there and
+    start watching it, so no notification between the click and wait_for_download() is missed
+    """
+    safe_name = re.sub(r"[^A-Za-z0-9_-]+", "_", job_name).strip("_")
+    job_dir = os.path.join(base_dir, "jobs", f"{safe_name}_{uuid.uuid4().hex[:8]}")
+    os.makedirs(job_dir, exist_ok=True)
+    _watch(job_dir)
+    set_download_dir(driver, job_dir)
+    return job_dir
+
+def _job_state(job_dir):
+    """(finished file or None, whether a partial file is present)"""
+    names = os.listdir(job_dir)
+    partial = any(_is_partial(f) for f in names)
+    files = [f for f in names if not _is_partial(f)]
+    return (os.path.join(job_dir, files[0]) if len(files) == 1 and not partial else None), partial
+
+@traced("download_wait")
+def wait_for_download(job_dir, timeout=60):
+    """
+    Wait for the download of a job to finish and return the exact file, or None on failure/timeout.
+    Blocks on the job directory's change notifications (Chrome renames the .crdownload file to its
+    final name when the download completes) instead of polling; the directory holds nothing but
+    this job's download.
+    """
+    handler = _watches.get(job_dir, (None, None))[0] or _watch(job_dir)
+    seen_partial = False
+    deadline = time.monotonic() + timeout
+    while True:
+        # Clear before looking, so a change that lands while the directory is read wakes the next wait
+        handler.changed.clear()
+        file_path, partial = _job_state(job_dir)
+        if file_path:
+            return file_path
+        if partial:
+            seen_partial = True
+        elif seen_partial:
+            # The partial file went away without a finished one
+            print(f"[ERROR] Browser canceled the download into {job_dir}")
+            return None
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not handler.changed.wait(remaining):
+            break
+    print(f"[ERROR] Download into {job_dir} did not complete within {timeout}s")
+    return None
+
+def cleanup_download_job(job_dir):
+    """Stop watching a job directory and remove it, including any partial file left behind"""
+    _unwatch(job_dir)
+    shutil.rmtree(job_dir, ignore_errors=True)
+
+def purge_partial_downloads(folder):
+    """Delete stray partial downloads (.crdownload/.tmp) and leftover job directories"""
+    if not os.path.isdir(folder):
+        return 0
+    removed = 0
+    for name in os.listdir(folder):
+        path = os.path.join(folder, name)
+        if os.path.isfile(path) and name.endswith(PARTIAL_SUFFIXES):
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError as e:
+                print(f"[WARN] Could not remove partial download {path}: {e}")
+    jobs_dir = os.path.join(folder, "jobs")
+    for job_dir in [d for d in list(_watches) if d.startswith(jobs_dir + os.sep)]:
+        _unwatch(job_dir)
+    shutil.rmtree(jobs_dir, ignore_errors=True)
+    if removed:
+        print(f"[INFO] Removed {removed} partial downloads from {folder}")
+    return removed
@@ -0,0 +1,125 @@
+from page_idle import wait_for_page_idle
+from option_matching import match_option
+from step_metrics import note_strategy
+
+# Every option of a PrimeFaces selectOneMenu in a single execute_script round trip.
+# arguments[0] is the component id or any element inside the component; arguments[1] is an optional
+# option text used to find components with generated ids (j_idtNN). Item texts are read with
+# textContent, so the panel does not have to be opened first.
+DROPDOWN_SNAPSHOT_JS = """
+var ref = arguments[0], marker = arguments[1];
+var root = null;
+if (ref && typeof ref === 'object') {
+    root = ref.closest ? (ref.closest('.ui-selectonemenu') || ref) : ref;
+} else if (ref) {
+    root = document.getElementById(ref);
+}
+if (!root && marker) {
+    var selects = document.querySelectorAll('.ui-selectonemenu select');
+    for (var s = 0; s < selects.length && !root; s++) {
+        for (var o = 0; o < selects[s].options.length; o++) {
+            if (selects[s].options[o].text.indexOf(marker) !== -1) { root = selects[s].closest('.ui-selectonemenu'); break; }
+        }
+    }
+}
+if (!root || !root.id) { return null; }
+var id = root.id;
+var select = document.getElementById(id + '_input');
+var label = document.getElementById(id + '_label');
+var list = document.getElementById(id + '_items') || document.getElementById(root.getAttribute('aria-owns') || '');
+var items = list ? list.querySelectorAll('li') : [];
+var options = [];
+for (var i = 0; i < items.length; i++) {
+    options.push({
+        index: i,
+        text: items[i].textContent.trim(),
+        label: items[i].getAttribute('data-label'),
+        visible: items[i].style.display !== 'none',
+        disabled: items[i].classList.contains('ui-state-disabled')
+    });
+}
+if (!items.length && select) {
+    for (var j = 0; j < select.options.length; j++) {
+        var text = select.options[j].text.trim();
+        options.push({index: j, text: text, label: text, visible: true, disabled: select.options[j].disabled});
+    }
+}
+var selected = label ? label.textContent.trim() : null;
+if (selected === null && select && select.selectedIndex >= 0) { selected = select.options[select.selectedIndex].text.trim(); }
+return {id: id, selected: selected, options: options};
+"""
+
+# Select an option by index through the PrimeFaces widget (fires the same change/AJAX as a user pick);
+# without a widget, a single click on the item. Returns how it was selected, or null.
+SELECT_BY_INDEX_JS = """
+var id = arguments[0], index = arguments[1];
+var root = document.getElementById(id);
+var select = document.getElementById(id + '_input');
+var list = document.getElementById(id + '_items') || (root && document.getElementById(root.getAttribute('aria-owns') || ''));
+var item = list ? list.querySelectorAll('li')[index] : null;
+var pf = window.PrimeFaces, $ = window.jQuery;
+if (pf && pf.widgets && $) {
+    for (var name in pf.widgets) {
+        var w = pf.widgets[name];
+        if (!w || w.id !== id) { continue; }
+        if (item && typeof w.selectItem === 'function') { w.selectItem($(item)); return 'widget'; }
+        if (select && select.options[index] && typeof w.selectValue === 'function') { w.selectValue(select.options[index].value); return 'widget'; }
+    }
+}
+if (item) { item.click(); return 'click'; }
+return null;
+"""
+
+def snapshot_dropdown(driver, component=None, marker=None):
+    """
+    Return {'id', 'selected', 'options'} for a selectOneMenu, or None when it is not on the page.
+    `component` is the component id or an element inside it; `marker` finds it by one of its options.
+    Each option is {'index', 'text', 'label', 'visible', 'disabled'}.
+    """
+    try:
+        return driver.execute_script(DROPDOWN_SNAPSHOT_JS, component, marker)
+    except Exception as e:
+        print(f"[ERROR] Could not read dropdown options: {str(e).split('Stacktrace:')[0]}")
+        return None
+
+def visible_options(snapshot):
+    return [opt for opt in snapshot["options"] if opt["visible"] and not opt["disabled"] and opt["text"]]
+
+def dropdown_option_texts(driver, component=None, marker=None, exclude=()):
+    """Texts of the visible options, skipping any that contain one of the `exclude` strings"""
+    snapshot = snapshot_dropdown(driver, component, marker)
+    if not snapshot:
+        return []
+    return [opt["text"] for opt in visible_options(snapshot) if not any(x in opt["text"] for x in exclude)]
+
+def select_dropdown_index(driver, component_id, index):
+    """Select the option at `index` and wait for the resulting AJAX update"""
+    method = driver.execute_script(SELECT_BY_INDEX_JS, component_id, index)
+    if not method:
+        print(f"[ERROR] No option {index} in dropdown {component_id}")
+        return False
+    note_strategy(method)
+    wait_for_page_idle(driver)
+    return True
+
+def select_dropdown_option(driver, key, item_text, component=None, marker=None):
+    """
+    Select `item_text` in a dropdown using one snapshot call and one selection call.
+    `key` picks the matching rule (see option_matching.match_option): "state" is exact,
+    "month" a prefix, "rto" always the all-offices option, anything else a substring either way.
+    """
+    snapshot = snapshot_dropdown(driver, component, marker)
+    if not snapshot:
+        print(f"[ERROR] Could not find dropdown {component or marker}")
+        return False
+    options = visible_options(snapshot)
+    option = match_option(options, key, item_text)
+    if option is None:
+        print(f"[ERROR] '{item_text}' not found in {snapshot['id']}. Options: {[opt['text'] for opt in options]}")
+        return False
+    if snapshot["selected"] == option["text"]:
+        print(f"[INFO] '{option['text']}' already selected in {snapshot['id']}")
+        note_strategy("already selected")
+        return True
+    print(f"[INFO] Selecting '{option['text']}' for target '{item_text}' in {snapshot['id']}")
+    return select_dropdown_index(driver, snapshot["id"], option["index"])
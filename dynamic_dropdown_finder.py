@@ -1,13 +1,44 @@
-import time
+from page_idle import wait_for_page_idle
+from locator_cache import get_cached_element, remember_element
+from dropdown_snapshot import select_dropdown_option, dropdown_option_texts, visible_options
+from step_metrics import traced, note_strategy
+from control_map import find_control, control_id, control_key, control_for_element, scan_controls, forget_control_map
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+# Dropdowns with generated ids are recognised by one of their options
+STATE_DROPDOWN_MARKER = "All Vahan4 Running States"
+TYPE_DROPDOWN_MARKER = "Actual Value"
+
+@traced("find_dropdown")
 def find_dropdown_by_label(driver, label_text, dropdown_type="select"):
     """
     Dynamically find dropdown by its label text instead of hardcoded ID.
     dropdown_type: "select" for PrimeFaces selectOneMenu, "dropdown" for regular dropdown
+    Looks the control up in the page's control map first, then tries today's cached locator and
+    only runs the strategy cascade when both miss.
     """
+    control = control_key(label_text)
+    element = find_control(driver, control) if control else None
+    if element is not None:
+        print(f"[DEBUG] Found dropdown with label '{label_text}' in the control map")
+        note_strategy("control map")
+        return element
+    key = f"dropdown:{label_text.lower()}"
+    element = get_cached_element(driver, key)
+    if element is not None:
+        print(f"[DEBUG] Found dropdown with label '{label_text}' using cached locator")
+        note_strategy("cached locator")
+        return element
+    element, strategy = _find_dropdown_by_label_cascade(driver, label_text, dropdown_type)
+    if element is not None:
+        note_strategy(strategy)
+        remember_element(driver, key, element, strategy)
+    return element
+
+def _find_dropdown_by_label_cascade(driver, label_text, dropdown_type="select"):
+    """Strategy cascade behind find_dropdown_by_label. Returns (element, strategy) or (None, None)."""
     try:
         # Strategy 1: Find the actual dropdown elements by common patterns
         dropdown_selectors = [
@@ -38,7 +69,7 @@ def find_dropdown_by_label(driver, label_text, dropdown_type="select"):
                                 label_lower in grandparent_text or
                                 any(label_lower in sibling.text.lower() for sibling in parent.find_elements(By.XPATH, "./*"))):
                                 print(f"[DEBUG] Found dropdown with label '{label_text}' using selector: {selector}")
-                                return element
+                                return element, f"dropdown selector: {selector}"
                         except Exception:
                             continue
             except Exception:
@@ -64,7 +95,7 @@ def find_dropdown_by_label(driver, label_text, dropdown_type="select"):
                             dropdown = parent.find_element(By.CSS_SELECTOR, ".ui-selectonemenu, .ui-selectonemenu-label, select")
                             if dropdown.is_displayed() and dropdown.is_enabled():
                                 print(f"[DEBUG] Found dropdown with label '{label_text}' using label strategy: {strategy}")
-                                return dropdown
+                                return dropdown, f"label strategy: {strategy}"
                         except Exception:
                             # Try looking in the grandparent
                             try:
@@ -72,7 +103,7 @@ def find_dropdown_by_label(driver, label_text, dropdown_type="select"):
                                 dropdown = grandparent.find_element(By.CSS_SELECTOR, ".ui-selectonemenu, .ui-selectonemenu-label, select")
                                 if dropdown.is_displayed() and dropdown.is_enabled():
                                     print(f"[DEBUG] Found dropdown with label '{label_text}' using grandparent strategy: {strategy}")
-                                    return dropdown
+                                    return dropdown, f"grandparent strategy: {strategy}"
                             except Exception:
                                 continue
             except Exception:
@@ -91,18 +122,45 @@ def find_dropdown_by_label(driver, label_text, dropdown_type="select"):
                 for element in elements:
                     if element.is_displayed() and element.is_enabled():
                         print(f"[DEBUG] Found dropdown with label '{label_text}' using form selector: {selector}")
-                        return element
+                        return element, f"form selector: {selector}"
             except Exception:
                 continue
         
         print(f"[WARN] Could not find dropdown with label '{label_text}' using any strategy")
-        return None
+        return None, None
         
     except Exception as e:
         print(f"[ERROR] Error finding dropdown with label '{label_text}': {e}")
-        return None
+        return None, None
 
+@traced("find_items")
 def find_dropdown_items_container(driver, dropdown_element):
+    """Find the items list of a dropdown from the control map, then today's cached locator, then the strategy cascade"""
+    control, _ = control_for_element(driver, dropdown_element)
+    items_container = find_control(driver, control, "items_id") if control else None
+    if items_container is not None:
+        print(f"[DEBUG] Found items container of '{control}' in the control map")
+        note_strategy("control map")
+        return items_container
+    try:
+        dropdown_id = dropdown_element.get_attribute("id")
+    except Exception:
+        dropdown_id = None
+    key = f"items:{dropdown_id}" if dropdown_id else None
+    if key:
+        items_container = get_cached_element(driver, key, require_enabled=False)
+        if items_container is not None:
+            print(f"[DEBUG] Found items container using cached locator")
+            note_strategy("cached locator")
+            return items_container
+    items_container, strategy = _find_dropdown_items_container_cascade(driver, dropdown_element)
+    note_strategy(strategy)
+    if items_container is not None and key:
+        remember_element(driver, key, items_container, strategy)
+    return items_container
+
+def _find_dropdown_items_container_cascade(driver, dropdown_element):
+    """Strategy cascade behind find_dropdown_items_container. Returns (element, strategy) or (None, None)."""
     try:
         # Strategy 1: Look for the items container by ID pattern
         dropdown_id = dropdown_element.get_attribute("id")
@@ -122,7 +180,7 @@ def find_dropdown_items_container(driver, dropdown_element):
                     items_container = driver.find_element(By.ID, item_id)
                     if items_container.is_displayed():
                         print(f"[DEBUG] Found items container with ID: {item_id}")
-                        return items_container
+                        return items_container, f"items id: {item_id}"
                 except Exception:
                     continue
         
@@ -137,7 +195,7 @@ def find_dropdown_items_container(driver, dropdown_element):
                     distance = abs(dropdown_location['x'] - container_location['x']) + abs(dropdown_location['y'] - container_location['y'])
                     if distance < 500:  # Within reasonable distance
                         print(f"[DEBUG] Found items container by proximity")
-                        return container
+                        return container, "items proximity"
                 except Exception:
                     continue
         
@@ -146,27 +204,48 @@ def find_dropdown_items_container(driver, dropdown_element):
         for list_elem in lists:
             if list_elem.is_displayed():
                 print(f"[DEBUG] Found items list by CSS selector")
-                return list_elem
+                return list_elem, "items list css"
         
         # Strategy 4: Look for the dropdown panel that appears when clicked
         panels = driver.find_elements(By.CSS_SELECTOR, ".ui-selectonemenu-panel, .ui-selectonemenu-items-wrapper")
         for panel in panels:
             if panel.is_displayed():
                 print(f"[DEBUG] Found dropdown panel")
-                return panel
+                return panel, "dropdown panel"
         
         print(f"[WARN] Could not find items container for dropdown")
-        return None
+        return None, None
         
     except Exception as e:
         print(f"[ERROR] Error finding items container: {e}")
-        return None
+        return None, None
 
+@traced("find_refresh")
 def find_refresh_button(driver):
     """
     Find refresh button using stable selectors based on the HTML provided.
     Uses button text "Refresh" and icon class "ui-icon-refresh".
+    Looks the button up in the page's control map first, then tries today's cached locator and
+    only runs the strategy cascade when both miss.
     """
+    refresh_button = find_control(driver, "refresh")
+    if refresh_button is not None:
+        print("[DEBUG] Found refresh button in the control map")
+        note_strategy("control map")
+        return refresh_button
+    refresh_button = get_cached_element(driver, "refresh")
+    if refresh_button is not None:
+        print("[DEBUG] Found refresh button using cached locator")
+        note_strategy("cached locator")
+        return refresh_button
+    refresh_button, strategy = _find_refresh_button_cascade(driver)
+    if refresh_button is not None:
+        note_strategy(strategy)
+        remember_element(driver, "refresh", refresh_button, strategy)
+    return refresh_button
+
+def _find_refresh_button_cascade(driver):
+    """Strategy cascade behind find_refresh_button. Returns (element, strategy) or (None, None)."""
     try:
         # Primary strategy: Find button by visible text "Refresh" and icon
         refresh_button = WebDriverWait(driver, 10).until(
@@ -176,7 +255,7 @@ def find_refresh_button(driver):
             ))
         )
         print("[DEBUG] Found refresh button using stable text selector")
-        return refresh_button
+        return refresh_button, "refresh text selector"
     except Exception as e:
         print(f"[DEBUG] Primary refresh button strategy failed: {e}")
         
@@ -195,7 +274,7 @@ def find_refresh_button(driver):
                 for element in elements:
                     if element.is_displayed() and element.is_enabled():
                         print(f"[DEBUG] Found refresh button using selector: {selector}")
-                        return element
+                        return element, f"refresh selector: {selector}"
             except Exception:
                 continue
         refresh_patterns = [
@@ -211,7 +290,7 @@ def find_refresh_button(driver):
                 for element in elements:
                     if element.is_displayed() and element.is_enabled():
                         print(f"[DEBUG] Found refresh button using pattern: {pattern}")
-                        return element
+                        return element, f"refresh pattern: {pattern}"
             except Exception:
                 continue
         button_classes = [
@@ -228,28 +307,49 @@ def find_refresh_button(driver):
                         button_attrs = element.get_attribute("outerHTML").lower()
                         if "refresh" in button_text or "refresh" in button_attrs:
                             print(f"[DEBUG] Found refresh button by class and text analysis")
-                            return element
+                            return element, f"refresh class: {class_selector}"
             except Exception:
                 continue
         print(f"[WARN] Could not find refresh button using any strategy")
-        return None
+        return None, None
     except Exception as e:
         print(f"[ERROR] Error finding refresh button: {e}")
-        return None
+        return None, None
 
+@traced("find_download")
 def find_download_button(driver):
     """
     Find download button using robust strategies:
     1. Prefer the <a> tag with id 'groupingTable:xls' or class 'ui-commandlink' containing the download <img>.
     2. Fallback to previous strategies (img with src/title, etc).
+    Looks the button up in the page's control map first, then tries today's cached locator and
+    only runs the strategy cascade when both miss.
     """
+    download_button = find_control(driver, "download")
+    if download_button is not None:
+        print("[DEBUG] Found download button in the control map")
+        note_strategy("control map")
+        return download_button
+    download_button = get_cached_element(driver, "download")
+    if download_button is not None:
+        print("[DEBUG] Found download button using cached locator")
+        note_strategy("cached locator")
+        return download_button
+    download_button, strategy = _find_download_button_cascade(driver)
+    if download_button is not None:
+        note_strategy(strategy)
+        remember_element(driver, "download", download_button, strategy)
+    return download_button
+
+def _find_download_button_cascade(driver):
+    """Strategy cascade behind find_download_button. Returns (element, strategy) or (None, None)."""
     try:
         # Strategy 1: Find <a> with id 'groupingTable:xls' or class 'ui-commandlink' containing the download image
         try:
             a_elem = driver.find_element(By.XPATH, "//a[@id='groupingTable:xls' and .//img[contains(@src, 'csv.png') and contains(@title, 'Download EXCEL file')]]")
             if a_elem.is_displayed() and a_elem.is_enabled():
                 print("[DEBUG] Found download <a> by id and image.")
-                return a_elem
+                return a_elem, "download anchor id"
         except Exception:
             pass
         try:
@@ -257,7 +357,7 @@ def find_download_button(driver):
             for a_elem in a_elems:
                 if a_elem.is_displayed() and a_elem.is_enabled():
                     print("[DEBUG] Found download <a> by class and image.")
-                    return a_elem
+                    return a_elem, "download anchor class"
         except Exception:
             pass
         # Strategy 2: Fallback to previous strategies (img with src/title, etc)
@@ -269,7 +369,7 @@ def find_download_button(driver):
                 ))
             )
             print("[DEBUG] Found download button using stable image source and title selector")
-            return download_button
+            return download_button, "download image"
         except Exception as e:
             print(f"[DEBUG] Primary download button strategy failed: {e}")
         download_selectors = [
@@ -288,7 +388,7 @@ def find_download_button(driver):
                 for element in elements:
                     if element.is_displayed() and element.is_enabled():
                         print(f"[DEBUG] Found download button using selector: {selector}")
-                        return element
+                        return element, f"download selector: {selector}"
             except Exception:
                 continue
         download_patterns = [
@@ -305,7 +405,7 @@ def find_download_button(driver):
                 for element in elements:
                     if element.is_displayed() and element.is_enabled():
                         print(f"[DEBUG] Found download button using pattern: {pattern}")
-                        return element
+                        return element, f"download pattern: {pattern}"
             except Exception:
                 continue
         table_download_selectors = [
@@ -319,72 +419,16 @@ def find_download_button(driver):
                 for element in elements:
                     if element.is_displayed() and element.is_enabled():
                         print(f"[DEBUG] Found download button in table using selector: {selector}")
-                        return element
+                        return element, f"download table selector: {selector}"
             except Exception:
                 continue
         print(f"[WARN] Could not find download button using any strategy")
-        return None
+        return None, None
     except Exception as e:
         print(f"[ERROR] Error finding download button: {e}")
-        return None
-
-def robust_dropdown_click(driver, dropdown_element):
-    """
-    Try to click the dropdown label if present and visible, otherwise click the main dropdown div, otherwise click the <select> element, otherwise use JavaScript click. Logs HTML and saves a screenshot on failure.
-    """
-    # Wait for overlays to disappear
-    try:
-        WebDriverWait(driver, 5).until_not(
-            EC.presence_of_element_located((By.CSS_SELECTOR, ".ui-blockui, .ui-widget-overlay"))
-        )
-    except Exception:
-        pass
-
-    # Log outer HTML for debugging
-    try:
-        print("[DEBUG] Dropdown outer HTML:", dropdown_element.get_attribute("outerHTML"))
-    except Exception:
-        pass
-
-    # Try to click the label if present and visible
-    try:
-        label = dropdown_element.find_element(By.CSS_SELECTOR, ".ui-selectonemenu-label")
-        if label.is_displayed() and label.is_enabled():
-            label.click()
-            return True
-        else:
-            print("[DEBUG] Label found but not visible/enabled, falling back to main div.")
-    except Exception:
-        print("[DEBUG] No label found, falling back to main div.")
-
-    # Fallback: click the main dropdown div
-    try:
-        if dropdown_element.is_displayed() and dropdown_element.is_enabled():
-            dropdown_element.click()
-            return True
-    except Exception:
-        pass
-    # Fallback: click the <select> element inside
-    try:
-        select_elem = dropdown_element.find_element(By.TAG_NAME, "select")
-        driver.execute_script("arguments[0].click();", select_elem)
-        return True
-    except Exception:
-        pass
-    # Fallback: use JavaScript click on the main div
-    try:
-        driver.execute_script("arguments[0].click();", dropdown_element)
-        return True
-    except Exception:
-        pass
-    # Take a screenshot for debugging
-    try:
-        driver.save_screenshot("dropdown_click_failure.png")
-        print("[DEBUG] Saved screenshot as dropdown_click_failure.png")
-    except Exception:
-        pass
-    return False
+        return None, None
 
+@traced("select_dropdown")
 def select_dropdown_dynamic(driver, dropdown_label, item_text, is_select=False):
     try:
         print(f"[DEBUG] Attempting to select '{item_text}' from dropdown with label '{dropdown_label}'")
@@ -392,165 +436,29 @@ def select_dropdown_dynamic(driver, dropdown_label, item_text, is_select=False):
         if not dropdown_element:
             print(f"[ERROR] Could not find dropdown with label '{dropdown_label}'")
             return False
-        
-        # First, try to close any open dropdowns to avoid click interception
-        try:
-            # Look for any open dropdown panels and close them
-            open_panels = driver.find_elements(By.CSS_SELECTOR, ".ui-selectonemenu-panel, .ui-selectonemenu-items-wrapper")
-            for panel in open_panels:
-                if panel.is_displayed():
-                    # Click outside to close
-                    driver.execute_script("arguments[0].style.display = 'none';", panel)
-                    time.sleep(0.1)
-        except Exception:
-            pass
-        
-        # Scroll to the dropdown and click it
-        driver.execute_script("arguments[0].scrollIntoView(true);", dropdown_element)
-        time.sleep(0.2)
-        
-        # Try multiple click strategies
-        click_success = False
-        try:
-            WebDriverWait(driver, 3).until(EC.element_to_be_clickable(dropdown_element))
-            dropdown_element.click()
-            click_success = True
-        except Exception as e:
-            print(f"[DEBUG] Direct click failed: {e}")
-            try:
-                # Try JavaScript click
-                driver.execute_script("arguments[0].click();", dropdown_element)
-                click_success = True
-            except Exception as e2:
-                print(f"[DEBUG] JavaScript click failed: {e2}")
-                try:
-                    # Try ActionChains click
-                    from selenium.webdriver.common.action_chains import ActionChains
-                    ActionChains(driver).move_to_element(dropdown_element).click().perform()
-                    click_success = True
-                except Exception as e3:
-                    print(f"[DEBUG] ActionChains click failed: {e3}")
-        
-        if not click_success:
-            print(f"[ERROR] Could not click dropdown '{dropdown_label}'")
-            return False
-        
-        time.sleep(0.3)  # Wait for dropdown to open
-        
-        # Find the items container
-        items_container = find_dropdown_items_container(driver, dropdown_element)
-        if not items_container:
-            print(f"[ERROR] Could not find items container for dropdown '{dropdown_label}'")
-            return False
-        
-        # Get all visible items
-        items = items_container.find_elements(By.CSS_SELECTOR, "li:not([style*='display: none']), .ui-selectonemenu-item:not([style*='display: none'])")
-        print(f"[DEBUG] Found {len(items)} items in dropdown '{dropdown_label}': {[item.text.strip() for item in items]}")
-        
-        target_text = item_text.strip().lower()
-        
-        # Special handling for RTO selection
-        if "rto" in dropdown_label.lower():
-            for item in items:
-                if "all vahan4 running office" in item.text.strip().lower():
-                    print(f"[INFO] Selecting RTO option: {item.text.strip()}")
-                    driver.execute_script("arguments[0].scrollIntoView(true);", item)
-                    WebDriverWait(driver, 2).until(EC.element_to_be_clickable(item))
-                    item.click()
-                    time.sleep(0.1)
-                    return True
-        else:
-            # Normal selection for other dropdowns
-            for item in items:
-                item_text_actual = item.text.strip().lower()
-                if target_text in item_text_actual or item_text_actual in target_text:
-                    print(f"[INFO] Selecting '{item.text.strip()}' for target '{item_text}'")
-                    driver.execute_script("arguments[0].scrollIntoView(true);", item)
-                    WebDriverWait(driver, 2).until(EC.element_to_be_clickable(item))
-                    item.click()
-                    time.sleep(0.1)
-                    return True
-        
-        print(f"[ERROR] '{item_text}' not found in dropdown '{dropdown_label}'. Available options: {[item.text.strip() for item in items]}")
-        return False
-        
+        # Read all options in one call and select by index (RTO always picks the all-offices option)
+        key = "rto" if "rto" in dropdown_label.lower() else None
+        return select_dropdown_option(driver, key, item_text, component=dropdown_element)
     except Exception as e:
         print(f"[ERROR] Failed to select '{item_text}' from dropdown '{dropdown_label}': {e}")
         return False
 
+@traced("select_state")
 def select_state_dynamic(driver, state_name):
     """
     Select state using stable selector based on the HTML provided.
-    Handles both the full dropdown container and label-only cases.
+    The State dropdown has a generated id, so it is taken from the control map, or found by its
+    'All Vahan4 Running States' option.
     """
     try:
         print(f"[DEBUG] Attempting to select state: {state_name}")
-        state_dropdown = None
-        # Try to find the full dropdown container first
-        try:
-            state_dropdown = WebDriverWait(driver, 3).until(
-                EC.element_to_be_clickable((
-                    By.XPATH,
-                    "//div[contains(@class, 'ui-selectonemenu') and .//select[.//option[contains(text(), 'All Vahan4 Running States')]]]"
-                ))
-            )
-            print("[DEBUG] Found full state dropdown container.")
-            if not robust_dropdown_click(driver, state_dropdown):
-                print(f"[ERROR] Could not robustly click State dropdown")
-                return False
-        except Exception:
-            print("[DEBUG] Full dropdown container not found, trying label fallback.")
-            # Fallback: try to find the label directly
-            try:
-                label = WebDriverWait(driver, 3).until(
-                    EC.element_to_be_clickable((
-                        By.XPATH,
-                        "//label[contains(@class, 'ui-selectonemenu-label') and contains(text(), 'All Vahan4 Running States')]"
-                    ))
-                )
-                label.click()
-                print("[DEBUG] Clicked state label directly.")
-                # Try to get the dropdown container from the label's parent if possible
-                try:
-                    state_dropdown = label.find_element(By.XPATH, "..")
-                except Exception:
-                    state_dropdown = None
-            except Exception as e:
-                print(f"[ERROR] Could not find or click state label: {e}")
-                return False
-        time.sleep(0.2)
-        # Now proceed to find and click the state option as before...
-        # Only proceed if we have a dropdown container with aria-owns
-        if state_dropdown is not None and state_dropdown.get_attribute('aria-owns'):
-            try:
-                items_container = WebDriverWait(driver, 5).until(
-                    EC.visibility_of_element_located((
-                        By.CSS_SELECTOR,
-                        f"#{state_dropdown.get_attribute('aria-owns')}"
-                    ))
-                )
-                # Find and click the target state option
-                state_options = items_container.find_elements(By.CSS_SELECTOR, "li:not([style*='display: none'])")
-                for state_opt in state_options:
-                    if state_opt.text.strip() == state_name:
-                        print(f"[INFO] Selecting state: {state_name}")
-                        driver.execute_script("arguments[0].scrollIntoView(true);", state_opt)
-                        WebDriverWait(driver, 2).until(EC.element_to_be_clickable(state_opt))
-                        state_opt.click()
-                        time.sleep(0.2)
-                        return True
-                print(f"[WARN] State '{state_name}' not found in dropdown. Available: {[opt.text.strip() for opt in state_options]}")
-                return False
-            except Exception as e:
-                print(f"[ERROR] Could not find or click state option: {e}")
-                return False
-        else:
-            print("[WARN] No dropdown container with aria-owns found after clicking label.")
-            return False
+        return select_dropdown_option(driver, "state", state_name, component=control_id(driver, "state"),
+                                      marker=STATE_DROPDOWN_MARKER)
     except Exception as e:
         print(f"[ERROR] Failed to select state {state_name}: {e}")
         return False
 
+@traced("select_month")
 def select_month_dynamic(driver, month_name):
     try:
         print(f"[DEBUG] Attempting to select month: {month_name}")
@@ -558,173 +466,56 @@ def select_month_dynamic(driver, month_name):
         if not month_dropdown:
             print(f"[ERROR] Could not find month dropdown")
             return False
-        driver.execute_script("arguments[0].scrollIntoView(true);", month_dropdown)
-        WebDriverWait(driver, 3).until(EC.element_to_be_clickable(month_dropdown))
-        month_dropdown.click()
-        time.sleep(0.1)
-        items_container = find_dropdown_items_container(driver, month_dropdown)
-        if not items_container:
-            print(f"[ERROR] Could not find month items container")
-            return False
-        month_options = items_container.find_elements(By.CSS_SELECTOR, "li:not([style*='display: none']), .ui-selectonemenu-item:not([style*='display: none'])")
-        print(f"[DEBUG] Available months: {[m.text.strip() for m in month_options]}")
-        for month_opt in month_options:
-            if month_opt.text.strip().lower().startswith(month_name.lower()):
-                print(f"[INFO] Selecting month: {month_opt.text.strip()}")
-                driver.execute_script("arguments[0].scrollIntoView(true);", month_opt)
-                WebDriverWait(driver, 2).until(EC.element_to_be_clickable(month_opt))
-                month_opt.click()
-                time.sleep(0.1)
-                return True
-        print(f"[WARN] Month '{month_name}' not found in dropdown")
-        return False
+        return select_dropdown_option(driver, "month", month_name, component=month_dropdown)
     except Exception as e:
         print(f"[ERROR] Failed to select month {month_name}: {e}")
         return False
 
+@traced("select_type")
 def select_type_dynamic(driver, type_value):
     """
     Select type using stable selector based on the HTML provided.
-    Uses the presence of specific options ("Actual Value", "In Thousand", etc.) to identify the dropdown.
+    Takes the id from the control map, or uses the presence of the "Actual Value" option to identify the dropdown.
     """
     try:
         print(f"[DEBUG] Attempting to select type: {type_value}")
-        
-        # Find the OUTERMOST Type dropdown container by looking for the specific options it contains
-        type_dropdown = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((
-                By.XPATH,
-                "//div[contains(@class, 'ui-selectonemenu') and .//select[.//option[text()='Actual Value'] and .//option[text()='In Thousand'] and .//option[text()='In Lakh'] and .//option[text()='In Crore']]]"
-            ))
-        )
-        
-        # Use robust click logic
-        if not robust_dropdown_click(driver, type_dropdown):
-            print(f"[ERROR] Could not robustly click Type dropdown")
-            return False
-        time.sleep(0.2)
-        
-        # Wait for dropdown items to appear
-        items_container = WebDriverWait(driver, 5).until(
-            EC.visibility_of_element_located((
-                By.CSS_SELECTOR,
-                f"#{type_dropdown.get_attribute('aria-owns')}"
-            ))
-        )
-        
-        # Find and click the target option
-        options = items_container.find_elements(By.CSS_SELECTOR, "li:not([style*='display: none'])")
-        for option in options:
-            if type_value.lower() in option.text.lower():
-                print(f"[INFO] Selected Type: {type_value}")
-                driver.execute_script("arguments[0].scrollIntoView(true);", option)
-                WebDriverWait(driver, 2).until(EC.element_to_be_clickable(option))
-                option.click()
-                time.sleep(0.2)
-                return True
-        
-        print(f"[ERROR] Could not find Type option: {type_value}")
-        return False
-        
+        return select_dropdown_option(driver, "type", type_value, component=control_id(driver, "type"),
+                                      marker=TYPE_DROPDOWN_MARKER)
     except Exception as e:
         print(f"[ERROR] Could not select Type dropdown: {e}")
         return False
 
 def get_available_states_dynamic(driver):
     """
-    Get list of all available states from the dropdown using robust logic.
-    Handles both the full dropdown container and label-only cases.
+    Get list of all available states from the dropdown in a single round trip (a fresh control map scan).
     """
     try:
-        print("[DEBUG] Attempting to find state dropdown...")
-        state_dropdown = None
-        # Try to find the full dropdown container first
-        try:
-            state_dropdown = WebDriverWait(driver, 3).until(
-                EC.element_to_be_clickable((
-                    By.XPATH,
-                    "//div[contains(@class, 'ui-selectonemenu') and .//select[.//option[contains(text(), 'All Vahan4 Running States')]]]"
-                ))
-            )
-            print("[DEBUG] Found full state dropdown container.")
-            if not robust_dropdown_click(driver, state_dropdown):
-                print(f"[ERROR] Could not robustly click State dropdown for available states")
-                return []
-        except Exception:
-            print("[DEBUG] Full dropdown container not found, trying label fallback for available states.")
-            # Fallback: try to find the label directly
-            try:
-                label = WebDriverWait(driver, 3).until(
-                    EC.element_to_be_clickable((
-                        By.XPATH,
-                        "//label[contains(@class, 'ui-selectonemenu-label') and contains(text(), 'All Vahan4 Running States')]"
-                    ))
-                )
-                label.click()
-                print("[DEBUG] Clicked state label directly for available states.")
-                # Try to get the dropdown container from the label's parent if possible
-                try:
-                    state_dropdown = label.find_element(By.XPATH, "..")
-                except Exception:
-                    state_dropdown = None
-            except Exception as e:
-                print(f"[ERROR] Could not find or click state label for available states: {e}")
-                return []
-        time.sleep(0.2)
-        # Now proceed to get the state options if we have a dropdown container with aria-owns
-        if state_dropdown is not None and state_dropdown.get_attribute('aria-owns'):
-            try:
-                items_container = WebDriverWait(driver, 5).until(
-                    EC.visibility_of_element_located((
-                        By.CSS_SELECTOR,
-                        f"#{state_dropdown.get_attribute('aria-owns')}"
-                    ))
-                )
-                # Get all state options
-                state_options = items_container.find_elements(By.CSS_SELECTOR, "li:not([style*='display: none'])")
-                states = [opt.text.strip() for opt in state_options if opt.text.strip() and "All Vahan4 Running States" not in opt.text.strip()]
-                print(f"[DEBUG] Found {len(states)} state options")
-                # Close the dropdown
-                try:
-                    label = state_dropdown.find_element(By.CSS_SELECTOR, ".ui-selectonemenu-label")
-                    label.click()
-                except Exception:
-                    pass
-                time.sleep(0.2)
-                return states
-            except Exception as e:
-                print(f"[ERROR] Could not get state options: {e}")
-                return []
+        control = scan_controls(driver).get("state")
+        if control:
+            states = [opt["text"] for opt in visible_options(control) if STATE_DROPDOWN_MARKER not in opt["text"]]
         else:
-            print("[WARN] No dropdown container with aria-owns found after clicking label for available states.")
-            return []
+            states = dropdown_option_texts(driver, marker=STATE_DROPDOWN_MARKER, exclude=(STATE_DROPDOWN_MARKER,))
+        print(f"[DEBUG] Found {len(states)} state options")
+        return states
     except Exception as e:
         print(f"[ERROR] Failed to get available states: {e}")
         return []
 
 def get_available_months_dynamic(driver):
     try:
+        control = scan_controls(driver).get("month")
+        if control:
+            return [opt["text"] for opt in visible_options(control) if "2025" not in opt["text"]]
         month_dropdown = find_dropdown_by_label(driver, "Month", "select")
         if not month_dropdown:
             print(f"[ERROR] Could not find month dropdown")
             return []
-        driver.execute_script("arguments[0].scrollIntoView(true);", month_dropdown)
-        WebDriverWait(driver, 3).until(EC.element_to_be_clickable(month_dropdown))
-        month_dropdown.click()
-        time.sleep(0.1)
-        items_container = find_dropdown_items_container(driver, month_dropdown)
-        if not items_container:
-            print(f"[ERROR] Could not find month items container")
-            return []
-        month_options = items_container.find_elements(By.CSS_SELECTOR, "li:not([style*='display: none']), .ui-selectonemenu-item:not([style*='display: none'])")
-        months = [opt.text.strip() for opt in month_options if opt.text.strip() and opt.text.strip() != "2025"]
-        month_dropdown.click()
-        time.sleep(0.1)
-        return months
+        return dropdown_option_texts(driver, month_dropdown, exclude=("2025",))
     except Exception as e:
         print(f"[ERROR] Failed to get available months: {e}")
         return []
 
+@traced("click_refresh")
 def click_refresh_dynamic(driver):
     try:
         print("[INFO] Looking for refresh button...")
@@ -734,14 +525,19 @@ def click_refresh_dynamic(driver):
             return False
         driver.execute_script("arguments[0].scrollIntoView(true);", refresh_button)
         WebDriverWait(driver, 3).until(EC.element_to_be_clickable(refresh_button))
+        # The refresh re-renders the report table, so wait for the old table to be replaced
+        old_tables = driver.find_elements(By.ID, "groupingTable")
         refresh_button.click()
         print("[INFO] Clicked refresh button.")
-        time.sleep(1.5)
+        wait_for_page_idle(driver, stale_element=old_tables[0] if old_tables else None)
+        # The report table (month dropdown, Excel link) was re-rendered
+        forget_control_map(driver)
         return True
     except Exception as e:
         print(f"[ERROR] Failed to click refresh button: {e}")
         return False
 
+@traced("click_download")
 def click_download_dynamic(driver):
     try:
         print("[INFO] Looking for Excel download button...")
@@ -753,7 +549,7 @@ def click_download_dynamic(driver):
         WebDriverWait(driver, 3).until(EC.element_to_be_clickable(download_button))
         download_button.click()
         print("[INFO] Clicked Excel download button.")
-        time.sleep(0.5)
+        wait_for_page_idle(driver)
         return True
     except Exception as e:
         print(f"[ERROR] Failed to click download button: {e}")
@@ -0,0 +1,154 @@
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime, date, timedelta
+from calendar import month_abbr
+from run_journal import JOURNAL_DB
+from vahan_workbook import read_report
+
+# Latest fetch of every (report spec, state, year, month) across all runs, kept next to the run journal.
+# Incremental runs use it to only download months that may still change.
+REFETCH_AGE_DAYS = float(os.environ.get("VAHAN_REFETCH_AGE_DAYS", "30"))
+
+MONTH_NUMBER = {m.upper(): i for i, m in enumerate(month_abbr) if m}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fetches (
+    spec TEXT NOT NULL,
+    state TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    month TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    fetched_at TEXT NOT NULL,
+    changed_at TEXT NOT NULL,
+    fetch_count INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (spec, state, year, month)
+);
+"""
+
+# Dropdowns that only seed the page: every task selects its own year
+TASK_KEYS = ("year",)
+
+def report_spec(filter_keys, combo):
+    """Stable text form of the global dropdown values a report was fetched with (not the task's year)"""
+    return json.dumps({k: v for k, v in zip(filter_keys, combo) if k not in TASK_KEYS}, sort_keys=True)
+
+def content_hash(file_path):
+    """
+    SHA-256 of a downloaded report. Report workbooks and scraped tables are hashed by their
+    normalized non-zero cells, so a re-export with a new timestamp or different padding (or the
+    same report taken the other way) hashes the same; other files by their bytes.
+    """
+    digest = hashlib.sha256()
+    cells = read_report(file_path) if file_path.lower().endswith((".xlsx", ".json")) else None
+    if cells:
+        normalized = sorted([row, column, count] for (row, column), count in cells.items() if count)
+        digest.update(json.dumps(normalized, ensure_ascii=False).encode("utf-8"))
+        return digest.hexdigest()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def is_stale(year, month, fetched_at, today=None, max_age_days=REFETCH_AGE_DAYS):
+    """
+    Freshness policy: the current and previous month are always refetched (registrations are
+    still being added); older months only when never fetched or fetched more than max_age_days ago.
+    """
+    today = today or date.today()
+    current = date(today.year, today.month, 1)
+    previous = (current - timedelta(days=1)).replace(day=1)
+    # A whole-year download ("ALL") is as fresh as its December
+    if date(int(year), MONTH_NUMBER.get(str(month).upper(), 12), 1) >= previous:
+        return True
+    if fetched_at is None:
+        return True
+    return today - datetime.fromisoformat(fetched_at).date() > timedelta(days=max_age_days)
+
+class FetchStore:
+    """SQLite store of the latest download per report; safe to share between threads"""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or JOURNAL_DB
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._drop_task_keys()
+
+    def _drop_task_keys(self):
+        """Move fetches stored under a spec that still has the prompt's year to the spec without it, keeping the latest"""
+        with self._lock:
+            rows = self._conn.execute("SELECT rowid, spec, state, year, month, fetched_at FROM fetches").fetchall()
+            for rowid, spec, state, year, month, fetched_at in rows:
+                values = json.loads(spec)
+                if not any(k in values for k in TASK_KEYS):
+                    continue
+                new_spec = json.dumps({k: v for k, v in values.items() if k not in TASK_KEYS}, sort_keys=True)
+                other = self._conn.execute(
+                    "SELECT rowid, fetched_at FROM fetches WHERE spec = ? AND state = ? AND year = ? AND month = ?",
+                    (new_spec, state, year, month)
+                ).fetchone()
+                if other is not None and other[1] >= fetched_at:
+                    self._conn.execute("DELETE FROM fetches WHERE rowid = ?", (rowid,))
+                    continue
+                if other is not None:
+                    self._conn.execute("DELETE FROM fetches WHERE rowid = ?", (other[0],))
+                self._conn.execute("UPDATE fetches SET spec = ? WHERE rowid = ?", (new_spec, rowid))
+
+    def latest(self, spec, state, year, month):
+        """The latest fetch as a dict, or None if this report was never fetched"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT file_path, content_hash, fetched_at, changed_at, fetch_count FROM fetches "
+                "WHERE spec = ? AND state = ? AND year = ? AND month = ?", (spec, state, int(year), month)
+            ).fetchone()
+        if row is None:
+            return None
+        file_path, digest, fetched_at, changed_at, fetch_count = row
+        return {"file_path": file_path, "content_hash": digest, "fetched_at": fetched_at,
+                "changed_at": changed_at, "fetch_count": fetch_count}
+
+    def record(self, spec, state, year, month, file_path, fetched_at=None):
+        """
+        Store a fetch. Returns (changed, previous): changed is True when the content is new or
+        differs from the previous fetch, previous is that fetch as returned by latest() or None.
+        """
+        fetched_at = fetched_at or datetime.now().isoformat(timespec="seconds")
+        digest = content_hash(file_path)
+        previous = self.latest(spec, state, year, month)
+        changed = previous is None or previous["content_hash"] != digest
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO fetches (spec, state, year, month, file_path, content_hash, fetched_at, changed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(spec, state, year, month) DO UPDATE SET file_path = excluded.file_path, "
+                "content_hash = excluded.content_hash, fetched_at = excluded.fetched_at, "
+                "changed_at = CASE WHEN fetches.content_hash = excluded.content_hash THEN fetches.changed_at "
+                "ELSE excluded.changed_at END, fetch_count = fetches.fetch_count + 1",
+                (spec, state, int(year), month, file_path, digest, fetched_at, fetched_at)
+            )
+        return changed, previous
+
+    def split_stale(self, tasks, filter_keys, max_age_days=REFETCH_AGE_DAYS, today=None):
+        """
+        Split tasks into (stale, fresh). Fresh tasks come with their latest fetch and still have
+        their file on disk; everything else has to be downloaded.
+        """
+        stale, fresh = [], []
+        for task in tasks:
+            combo, state, year, month = task
+            fetch = self.latest(report_spec(filter_keys, combo), state, year, month)
+            if fetch is None or not os.path.exists(fetch["file_path"]) \
+                    or is_stale(year, month, fetch["fetched_at"], today, max_age_days):
+                stale.append(task)
+            else:
+                fresh.append((task, fetch))
+        return stale, fresh
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -4,6 +4,7 @@ from openpyxl.utils.dataframe import dataframe_to_rows
 import sys
 import os
 from datetime import datetime
+from vahan_dataset import dataset_specs, read_dataset
 
 # --- Normalization Function ---
 def normalize(text):
@@ -17,22 +18,27 @@ def normalize(text):
 
 # --- Load Excel and get original class column names ---
 input_file = sys.argv[1] if len(sys.argv) > 1 else "combined_vahan_data(1).xlsx"
-wb_orig = load_workbook(input_file)
-ws_orig = wb_orig.active
+if input_file in dataset_specs():
+    # A spec of the combined dataset (e.g. Maker_Vehicle_Class): already has its column names
+    ws_orig = None
+    df = read_dataset(input_file, wide=True)
+else:
+    wb_orig = load_workbook(input_file)
+    ws_orig = wb_orig.active
 
-# Get vehicle class names from D3:CA3
-vehicle_class_names = [cell.value for cell in ws_orig[3][3:]]  # D3:CA3 (zero-based index 3 onwards)
+    # Get vehicle class names from D3:CA3
+    vehicle_class_names = [cell.value for cell in ws_orig[3][3:]]  # D3:CA3 (zero-based index 3 onwards)
 
-# Compose full column names: [State, Month, Maker, ...vehicle class names...]
-col_names = [ws_orig['A3'].value, ws_orig['B3'].value, ws_orig['C1'].value] + vehicle_class_names
+    # Compose full column names: [State, Month, Maker, ...vehicle class names...]
+    col_names = [ws_orig['A3'].value, ws_orig['B3'].value, ws_orig['C1'].value] + vehicle_class_names
 
-# Read the data, skipping the first 3 rows (so data starts from row 4)
-df = pd.read_excel(input_file, header=None, skiprows=3)
-df = df.iloc[:, :len(col_names)]  # Only keep as many columns as we have names for
+    # Read the data, skipping the first 3 rows (so data starts from row 4)
+    df = pd.read_excel(input_file, header=None, skiprows=3)
+    df = df.iloc[:, :len(col_names)]  # Only keep as many columns as we have names for
 
-# Set the column names
-col_names = [c if c is not None else f"COL_{i+1}" for i, c in enumerate(col_names)]
-df.columns = col_names
+    # Set the column names
+    col_names = [c if c is not None else f"COL_{i+1}" for i, c in enumerate(col_names)]
+    df.columns = col_names
 
 # --- Check for 'MAKER' column ---
 maker_col = next((col for col in df.columns if isinstance(col, str) and "MAKER" in col.upper()), None)
@@ -79,11 +85,11 @@ non_filtered_df = df[~df[maker_col].isin(matched_makers)]
 
 # --- Copy column widths and blank row structure from original ---
 def copy_format_and_write(df_out, output_path):
-    # Use the original workbook for column widths
-    col_widths = {col: ws_orig.column_dimensions[col].width for col in ws_orig.column_dimensions}
+    # Use the original workbook for column widths (a dataset spec has no workbook to copy from)
+    col_widths = {col: ws_orig.column_dimensions[col].width for col in ws_orig.column_dimensions} if ws_orig else {}
     # Find blank row pattern (rows with all empty values)
     blank_rows = [i for i, row in enumerate(ws_orig.iter_rows(values_only=True), 1)
-                  if all(cell is None or str(cell).strip() == '' for cell in row)]
+                  if all(cell is None or str(cell).strip() == '' for cell in row)] if ws_orig else []
     # Write filtered data to new workbook
     wb = Workbook()
     ws = wb.active
@@ -98,7 +104,7 @@ def copy_format_and_write(df_out, output_path):
             ws.append([None]*len(row))
     wb.save(output_path)
 
-input_base = os.path.basename(input_file)
+input_base = os.path.basename(input_file) + ('.xlsx' if ws_orig is None else '')
 filtered_outfile = f"filtered_{input_base}"
 non_filtered_outfile = f"non_filtered_{input_base}"
 
@@ -0,0 +1,100 @@
+import os
+import json
+import threading
+from datetime import date
+from selenium.webdriver.common.by import By
+
+# The portal rotates its generated IDs daily, so learned locators are only trusted on the day they were learned
+LOCATOR_CACHE_FILE = os.path.join(os.getcwd(), "locator_cache.json")
+
+_lock = threading.Lock()
+_cache = None
+
+# Absolute XPath of an element, used when the element has no id to remember it by
+ELEMENT_XPATH_JS = """
+var el = arguments[0];
+var parts = [];
+while (el && el.nodeType === 1) {
+    var idx = 1;
+    for (var sib = el.previousElementSibling; sib; sib = sib.previousElementSibling) {
+        if (sib.nodeName === el.nodeName) { idx++; }
+    }
+    parts.unshift(el.nodeName.toLowerCase() + '[' + idx + ']');
+    el = el.parentElement;
+}
+return '/' + parts.join('/');
+"""
+
+def _today():
+    return date.today().isoformat()
+
+def _load_cache():
+    """Load the cache file once, dropping entries learned on a previous day"""
+    global _cache
+    if _cache is None:
+        _cache = {}
+        if os.path.exists(LOCATOR_CACHE_FILE):
+            try:
+                with open(LOCATOR_CACHE_FILE, "r", encoding="utf-8") as f:
+                    _cache = json.load(f)
+            except Exception as e:
+                print(f"[WARN] Could not read locator cache {LOCATOR_CACHE_FILE}: {e}")
+    today = _today()
+    for key in [k for k, entry in _cache.items() if entry.get("learned_on") != today]:
+        del _cache[key]
+    return _cache
+
+def _save_cache():
+    try:
+        tmp_file = LOCATOR_CACHE_FILE + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(_cache, f, indent=2)
+        os.replace(tmp_file, LOCATOR_CACHE_FILE)
+    except Exception as e:
+        print(f"[WARN] Could not write locator cache {LOCATOR_CACHE_FILE}: {e}")
+
+def get_cached_element(driver, key, require_enabled=True):
+    """
+    Return the element for a logical control using today's cached locator.
+    Returns None if nothing is cached or the cached locator went stale (the entry is then dropped).
+    """
+    with _lock:
+        entry = _load_cache().get(key)
+    if not entry:
+        return None
+    try:
+        for element in driver.find_elements(entry["by"], entry["value"]):
+            if element.is_displayed() and (not require_enabled or element.is_enabled()):
+                return element
+    except Exception:
+        pass
+    print(f"[DEBUG] Cached locator for '{key}' is stale ({entry['by']}={entry['value']}), re-learning")
+    forget_locator(key)
+    return None
+
+def remember_locator(key, by, value, strategy):
+    """Record which strategy and concrete locator found a logical control"""
+    with _lock:
+        cache = _load_cache()
+        entry = {"by": by, "value": value, "strategy": strategy, "learned_on": _today()}
+        if cache.get(key) != entry:
+            cache[key] = entry
+            _save_cache()
+
+def remember_element(driver, key, element, strategy):
+    """Record a found element by its id, or by its absolute XPath when it has none"""
+    try:
+        element_id = element.get_attribute("id")
+        if element_id:
+            remember_locator(key, By.ID, element_id, strategy)
+        else:
+            remember_locator(key, By.XPATH, driver.execute_script(ELEMENT_XPATH_JS, element), strategy)
+    except Exception as e:
+        print(f"[WARN] Could not cache locator for '{key}': {e}")
+
+def forget_locator(key):
+    with _lock:
+        cache = _load_cache()
+        if key in cache:
+            del cache[key]
+            _save_cache()
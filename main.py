@@ -1,6 +1,9 @@
 import os
 import time
-import sys
+import shutil
+import csv
+import json
+import uuid
 import pandas as pd
 import schedule
 from datetime import datetime
@@ -10,12 +13,32 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import itertools
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 from selenium.webdriver.common.action_chains import ActionChains
 from calendar import month_abbr
+from page_idle import wait_for_page_idle
+from vahan_http_client import VahanHttpClient, VAHAN_URL
+from crawl_planner import build_tasks, build_plan, CrawlStateMachine, transition_report, WHOLE_YEAR
+from pivot_planner import parse_dataset, plan_layouts, layout_for_axes, reshape, dataset_columns, yyyymm
+from run_journal import RunJournal
+from session_pool import SessionPool
+from rate_controller import AdaptiveController
+from fetch_store import FetchStore, report_spec, REFETCH_AGE_DAYS
+from option_catalogue import cached_options, remember_options, forget_options, task_context, filter_tasks
+from vahan_workbook import read_report, diff_reports
+from retry_scheduler import RetryScheduler, classify_failure, SESSION_LOST, MONTH_UNAVAILABLE
+from browser_profile import FAST_PROFILE, add_fast_options, apply_fast_profile
+from xls_capture import CAPTURE_MODE, capture_xls
+from table_scrape import EXTRACT_MODE, EXTRACT_MODES, scrape_grouping_table, save_table, table_cells
+from dropdown_snapshot import select_dropdown_option, dropdown_option_texts
+from control_map import scan_controls
+from step_metrics import traced, task_labels, start_spans, collected_spans, summarize, print_step_summary
+from download_manager import new_download_job, wait_for_download, cleanup_download_job, purge_partial_downloads
 from dynamic_dropdown_finder import (
     select_dropdown_dynamic, select_state_dynamic, select_month_dynamic,
     get_available_states_dynamic, get_available_months_dynamic,
-    click_refresh_dynamic, click_download_dynamic, select_type_dynamic
+    click_refresh_dynamic, click_download_dynamic, select_type_dynamic, find_download_button
 )
 
 PROMPT_KEY_MAP = {
@@ -38,6 +61,14 @@ PROMPT_FILE = os.path.join(BASE_DIR, "prompt.txt")
 os.makedirs(DOWNLOAD_DIR, exist_ok=True)
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Upper bound for an Excel download to finish
+DOWNLOAD_TIMEOUT = 60
+# (task, number of differing cells or None) for every report checked in --extract parity mode
+PARITY_RESULTS = []
+
+# Month selector rendered in the report table header after a refresh
+MONTH_DROPDOWN_ID = "groupingTable:selectMonth"
+
 ALL_MONTHS = ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC']
 
 # Define dropdown order here so it's available throughout the script
@@ -84,327 +115,48 @@ def latest_file(folder):
 def get_available_states(driver):
     """Get list of available states from the dropdown"""
     try:
-        print("[DEBUG] Attempting to find state dropdown...")
-        # Click on the state dropdown label to open it
-        state_label = WebDriverWait(driver, 5).until(
-            EC.element_to_be_clickable((By.ID, "j_idt39_label"))
-        )
-        state_label.click()
-        time.sleep(0.5)
-
-        # Find the dropdown items container
-        state_items = WebDriverWait(driver, 5).until(
-            EC.visibility_of_element_located((By.ID, "j_idt39_items"))
-        )
-        
-        # Get all visible li elements
-        state_options = state_items.find_elements(By.CSS_SELECTOR, "li:not([style*='display: none'])")
-        print(f"[DEBUG] Found {len(state_options)} state options")
-        
-        # Show all options for debugging
-        all_options = [opt.text.strip() for opt in state_options]
-        print(f"[DEBUG] All state options: {all_options}")
-        
-        # Filter out empty options and the "All" option, but keep individual states
-        states = [opt.text.strip() for opt in state_options if opt.text.strip() and "All Vahan4 Running States" not in opt.text.strip()]
+        states = dropdown_option_texts(driver, "j_idt39", marker="All Vahan4 Running States",
+                                       exclude=("All Vahan4 Running States",))
         print(f"[DEBUG] Filtered states: {states}")
-        
-        # Close the dropdown
-        state_label.click()
-        time.sleep(0.2)
-        
         return states
     except Exception as e:
         print(f"[ERROR] Failed to get available states: {e}")
         return []
 
-def wait_for_ui_blocker(driver, timeout=5):
-    """Wait for UI blocker overlay to disappear - only if one is detected"""
-    try:
-        # Check if there's a blocker present first
-        blockers = driver.find_elements(By.CSS_SELECTOR, "div.ui-blockui.ui-widget-overlay")
-        if not blockers:
-            return True  # No blocker found, continue immediately
-        
-        # Only wait if a blocker is actually present
-        WebDriverWait(driver, timeout).until_not(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "div.ui-blockui.ui-widget-overlay"))
-        )
-        time.sleep(0.2)  # Small delay after blocker disappears
-        return True
-    except:
-        # If timeout or error, continue anyway
-        return True
-
 def get_available_months(driver):
     """Get list of available months from the dropdown"""
-    try:
-        month_dropdown = WebDriverWait(driver, 3).until(
-            EC.element_to_be_clickable((By.ID, "groupingTable:selectMonth_label"))
-        )
-        month_dropdown.click()
-        time.sleep(0.1)  # Reduced wait time
-
-        month_items = WebDriverWait(driver, 3).until(
-            EC.visibility_of_element_located((By.ID, "groupingTable:selectMonth_items"))
-        )
-        
-        month_options = month_items.find_elements(By.CSS_SELECTOR, "li:not([style*='display: none'])")
-        months = [opt.text.strip() for opt in month_options if opt.text.strip() != "2025"]
-        
-        # Close the dropdown
-        month_dropdown.click()
-        time.sleep(0.1)  # Reduced wait time
-        
-        return months
-    except Exception as e:
-        # If there's a click interception error, wait for UI blocker and retry once
-        if "element click intercepted" in str(e).lower():
-            print("[INFO] UI blocker detected, waiting for it to disappear...")
-            wait_for_ui_blocker(driver)
-            try:
-                month_dropdown = WebDriverWait(driver, 3).until(
-                    EC.element_to_be_clickable((By.ID, "groupingTable:selectMonth_label"))
-                )
-                month_dropdown.click()
-                time.sleep(0.1)
-                
-                month_items = WebDriverWait(driver, 3).until(
-                    EC.visibility_of_element_located((By.ID, "groupingTable:selectMonth_items"))
-                )
-                
-                month_options = month_items.find_elements(By.CSS_SELECTOR, "li:not([style*='display: none'])")
-                months = [opt.text.strip() for opt in month_options if opt.text.strip() != "2025"]
-                
-                month_dropdown.click()
-                time.sleep(0.1)
-                
-                return months
-            except Exception as e2:
-                print(f"[ERROR] Failed to get available months after retry: {e2}")
-                return []
-        else:
-            print(f"[ERROR] Failed to get available months: {e}")
-            return []
+    return dropdown_option_texts(driver, MONTH_DROPDOWN_ID, exclude=("2025",))
 
+@traced("select_state")
 def select_state(driver, state_name):
     """Select a specific state from the dropdown"""
     try:
-        # Click on the state dropdown label to open it
-        state_label = WebDriverWait(driver, 5).until(
-            EC.element_to_be_clickable((By.ID, "j_idt39_label"))
-        )
-        state_label.click()
-        time.sleep(0.2)
-
-        # Find the dropdown items container
-        state_items = WebDriverWait(driver, 5).until(
-            EC.visibility_of_element_located((By.ID, "j_idt39_items"))
-        )
-        
-        # Get all visible li elements
-        state_options = state_items.find_elements(By.CSS_SELECTOR, "li:not([style*='display: none'])")
-        
-        for state_opt in state_options:
-            if state_opt.text.strip() == state_name:
-                print(f"[INFO] Selecting state: {state_name}")
-                state_opt.click()
-                time.sleep(0.2)
-                return True
-                
-        print(f"[WARN] State '{state_name}' not found in dropdown")
-        return False
+        return select_dropdown_option(driver, "state", state_name, component="j_idt39", marker="All Vahan4 Running States")
     except Exception as e:
         print(f"[ERROR] Failed to select state {state_name}: {e}")
         return False
 
+@traced("select_month")
 def select_month(driver, month_name):
     """Select a specific month from the dropdown"""
     try:
-        month_dropdown = WebDriverWait(driver, 3).until(
-            EC.element_to_be_clickable((By.ID, "groupingTable:selectMonth_label"))
-        )
-        month_dropdown.click()
-        time.sleep(0.1)
-        month_items = WebDriverWait(driver, 3).until(
-            EC.visibility_of_element_located((By.ID, "groupingTable:selectMonth_items"))
-        )
-        month_options = month_items.find_elements(By.CSS_SELECTOR, "li:not([style*='display: none'])")
-        print("[DEBUG] Available months in dropdown:", [m.text.strip() for m in month_options])
-        for month_opt in month_options:
-            if month_opt.text.strip().lower().startswith(month_name.lower()):
-                print(f"[INFO] Selecting month: {month_opt.text.strip()}")
-                month_opt.click()
-                time.sleep(0.1)
-                return True
-        print(f"[WARN] Month '{month_name}' not found in dropdown")
-        return False
+        return select_dropdown_option(driver, "month", month_name, component=MONTH_DROPDOWN_ID)
     except Exception as e:
-        # If there's a click interception error, wait for UI blocker and retry once
-        if "element click intercepted" in str(e).lower():
-            print(f"[INFO] UI blocker detected while selecting month {month_name}, waiting for it to disappear...")
-            wait_for_ui_blocker(driver)
-            try:
-                month_dropdown = WebDriverWait(driver, 3).until(
-                    EC.element_to_be_clickable((By.ID, "groupingTable:selectMonth_label"))
-                )
-                month_dropdown.click()
-                time.sleep(0.1)
-
-                month_items = WebDriverWait(driver, 3).until(
-                    EC.visibility_of_element_located((By.ID, "groupingTable:selectMonth_items"))
-                )
-                
-                month_options = month_items.find_elements(By.CSS_SELECTOR, "li:not([style*='display: none'])")
-                
-                for month_opt in month_options:
-                    if month_opt.text.strip() == month_name:
-                        print(f"[INFO] Selecting month: {month_name}")
-                        month_opt.click()
-                        time.sleep(0.1)
-                        return True
-                        
-                print(f"[WARN] Month '{month_name}' not found in dropdown after retry")
-                return False
-            except Exception as e2:
-                print(f"[ERROR] Failed to select month {month_name} after retry: {e2}")
-                return False
-        else:
-            print(f"[ERROR] Failed to select month {month_name}: {e}")
-            return False
+        print(f"[ERROR] Failed to select month {month_name}: {e}")
+        return False
 
+@traced("select_dropdown")
 def select_dropdown(driver, label_id, item_text, is_select=False):
     try:
-        # For PrimeFaces/JSF dropdowns, always use the visible label and <li> menu
-        if is_select:
-            visible_label_id = label_id.replace("_input", "_label")
-            label = WebDriverWait(driver, 3).until(
-                EC.element_to_be_clickable((By.ID, visible_label_id))
-            )
-            driver.execute_script("arguments[0].scrollIntoView(true);", label)
-            label.click()
-            time.sleep(0.1)  # Reduced wait time
-
-            list_id = visible_label_id.replace("_label", "_items")
-            menu = WebDriverWait(driver, 3).until(
-                EC.visibility_of_element_located((By.ID, list_id))
-            )
-            items = menu.find_elements(By.CSS_SELECTOR, "li:not([style*='display: none'])")
-            print(f"[DEBUG] Visible options ({len(items)}) in {list_id}: {[item.text.strip() for item in items]}")
-
-            target_text = item_text.strip().lower()
-            
-            # Special handling for RTO selection
-            if "rto" in label_id.lower():
-                # For RTO, we'll select the first option that contains "All Vahan4 Running Office"
-                for item in items:
-                    if "all vahan4 running office" in item.text.strip().lower():
-                        print(f"[INFO] Matched RTO option: {item.text.strip()}")
-                        driver.execute_script("arguments[0].scrollIntoView(true);", item)
-                        WebDriverWait(driver, 2).until(EC.element_to_be_clickable(item))
-                        item.click()
-                        print(f"[INFO] Selected RTO option: {item.text.strip()}")
-                        time.sleep(0.1)  # Reduced wait time
-                        return True
-            else:
-                # Normal selection for other dropdowns
-                for item in items:
-                    item_text_actual = item.text.strip().lower()
-                    if target_text in item_text_actual or item_text_actual in target_text:
-                        print(f"[INFO] Matched '{item.text.strip()}' for target '{item_text}'")
-                        driver.execute_script("arguments[0].scrollIntoView(true);", item)
-                        WebDriverWait(driver, 2).until(EC.element_to_be_clickable(item))
-                        item.click()
-                        print(f"[INFO] Selected '{item.text.strip()}' in {visible_label_id} via UI click")
-                        time.sleep(0.1)  # Reduced wait time
-                        return True
-            
-            print(f"[ERROR] '{item_text}' not found in {list_id}. Options: {[item.text.strip() for item in items]}")
-            return False
-        else:
-            print(f"\n[DEBUG] Attempting to select '{item_text}' in dropdown {label_id}")
-            dropdown = WebDriverWait(driver, 3).until(
-                EC.element_to_be_clickable((By.ID, label_id))
-            )
-            driver.execute_script("arguments[0].scrollIntoView(true);", dropdown)
-            dropdown.click()
-            time.sleep(0.1)  # Reduced wait time
-            list_id = label_id.replace("_label", "_items")
-            menu = WebDriverWait(driver, 3).until(
-                EC.visibility_of_element_located((By.ID, list_id))
-            )
-            items = menu.find_elements(By.CSS_SELECTOR, "li:not([style*='display: none'])")
-            print(f"[DEBUG] Available options ({len(items)}) in {label_id}: {[item.text.strip() for item in items]}")
-            target_text = item_text.strip().lower()
-            for item in items:
-                item_text_actual = item.text.strip().lower()
-                if target_text in item_text_actual or item_text_actual in target_text:
-                    print(f"[INFO] Matched '{item.text.strip()}' for target '{item_text}'")
-                    driver.execute_script("arguments[0].scrollIntoView(true);", item)
-                    WebDriverWait(driver, 2).until(EC.element_to_be_clickable(item))
-                    item.click()
-                    print(f"[INFO] Selected '{item.text.strip()}' in {label_id} via UI click")
-                    time.sleep(0.1)  # Reduced wait time
-                    return True
-            print(f"[ERROR] No match found for '{item_text}' in {label_id}. Tried: {[item.text.strip() for item in items]}")
-            return False
-
+        # For PrimeFaces/JSF dropdowns the component id is the label/input id without its suffix
+        component_id = label_id.replace("_label", "").replace("_input", "")
+        key = "rto" if "rto" in label_id.lower() else None
+        print(f"\n[DEBUG] Attempting to select '{item_text}' in dropdown {component_id}")
+        return select_dropdown_option(driver, key, item_text, component=component_id)
     except Exception as e:
         print(f"[CRITICAL] Dropdown selection failed for {label_id}: {str(e).split('Stacktrace:')[0]}")
         return False
 
-def click_refresh_and_download(driver, xaxis_value=None, filters=None, month_name=None, state_name=None):
-    # Only click Refresh if no month is specified (month selection happens after refresh)
-    if not month_name:
-        print("[INFO] Clicking Refresh...")
-        try:
-            refresh_button = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.ID, "j_idt71"))
-            )
-            driver.execute_script("arguments[0].click();", refresh_button)
-            print("[INFO] Clicked Refresh button.")
-            time.sleep(1.5)
-        except Exception as e:
-            print(f"[ERROR] Failed to click refresh button: {e}")
-            return False
-        # Do not require month selection if just refreshing
-        return True
-    # Only require/select month if month_name is provided
-    if xaxis_value and xaxis_value.lower() in ["vehicle category", "vehicle class", "norms", "fuel"]:
-        if month_name:
-            if not select_month(driver, month_name):
-                return False
-        else:
-            print("[WARN] Month selection required but no month specified (download phase)")
-            return False
-    print("[INFO] Waiting for Excel download image/button...")
-    for attempt in range(3):
-        try:
-            download_img = WebDriverWait(driver, 5).until(
-                EC.element_to_be_clickable((By.ID, "groupingTable:j_idt85"))
-            )
-            if download_img.is_displayed() and download_img.is_enabled():
-                try:
-                    download_img.click()
-                    print(f"[INFO] Clicked Excel download image/button directly on attempt {attempt+1}.")
-                    break
-                except Exception as e:
-                    print(f"[WARN] Direct click failed on attempt {attempt+1}: {e}")
-                    from selenium.webdriver.common.action_chains import ActionChains
-                    ActionChains(driver).move_to_element(download_img).pause(0.1).click().perform()
-                    print(f"[INFO] Clicked Excel download image/button using ActionChains on attempt {attempt+1}.")
-                    break
-            else:
-                print(f"[WARN] Download button not interactable on attempt {attempt+1}.")
-        except Exception as e:
-            print(f"[WARN] Could not find or click Excel download image/button on attempt {attempt+1}: {e}")
-            time.sleep(0.5)
-    else:
-        print(f"[ERROR] Could not click Excel download image/button after 3 attempts.")
-        return False
-    time.sleep(0.5)
-    return True
-
 def get_new_output_dir(filters):
     def get_val(key):
         v = filters.get(key, [None])[0]
@@ -419,32 +171,183 @@ def get_new_output_dir(filters):
     folder_name = f"outputs_{yaxis}_{xaxis}_{year_start}{month_start}_to_{year_end}{month_end}_{run_time}"
     return os.path.join(BASE_DIR, folder_name)
 
+def report_output_file(state_name, month_name, year, ext=".xlsx"):
+    """
+    Path for a new report: OUTPUT_DIR/state/year/month/vahan_data_<timestamp>_<id>.xlsx. The random
+    id keeps a retry, or another worker, saving within the same second from overwriting the file.
+    """
+    month_dir = os.path.join(OUTPUT_DIR, state_name, str(year), month_name)
+    os.makedirs(month_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(month_dir, f"vahan_data_{timestamp}_{uuid.uuid4().hex[:8]}{ext}")
+
+@traced("process_file")
 def process_downloaded_file(file_path, state_name, month_name, year):
-    """Process the downloaded Excel file and save to the correct outputs folder, creating a new outputs folder if needed"""
+    """Process the downloaded Excel file and save to the correct outputs folder. Returns the saved path, or False on failure"""
     try:
         if not os.path.exists(file_path):
             print(f"[ERROR] File does not exist: {file_path}")
             return False
-        global OUTPUT_DIR
-        # New structure: OUTPUT_DIR/state/year/month/file.xlsx
-        year_str = str(year)
-        state_dir = os.path.join(OUTPUT_DIR, state_name)
-        year_dir = os.path.join(state_dir, year_str)
-        os.makedirs(year_dir, exist_ok=True)
-        month_dir = os.path.join(year_dir, month_name)
-        os.makedirs(month_dir, exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_file = os.path.join(month_dir, f"vahan_data_{timestamp}.xlsx")
-        import shutil
+        output_file = report_output_file(state_name, month_name, year)
         shutil.copy2(file_path, output_file)
         print(f"[INFO] Saved downloaded file to: {output_file}")
         os.remove(file_path)
         print(f"[INFO] Removed original downloaded file: {file_path}")
-        return True
+        return output_file
     except Exception as e:
         print(f"[ERROR] Failed to process Excel file: {e}")
         return False
 
+@traced("process_file")
+def save_captured_file(data, state_name, month_name, year):
+    """Write a workbook captured in memory straight to the outputs folder. Returns the saved path, or False on failure"""
+    try:
+        output_file = report_output_file(state_name, month_name, year)
+        with open(output_file, "wb") as f:
+            f.write(data)
+        print(f"[INFO] Saved captured file to: {output_file}")
+        return output_file
+    except Exception as e:
+        print(f"[ERROR] Failed to save captured Excel file: {e}")
+        return False
+
+def reuse_fetched_file(file_path, state_name, month_name, year):
+    """Copy a report fetched by an earlier run into this run's outputs folder. Returns the new path or False."""
+    try:
+        month_dir = os.path.join(OUTPUT_DIR, state_name, str(year), month_name)
+        os.makedirs(month_dir, exist_ok=True)
+        output_file = os.path.join(month_dir, os.path.basename(file_path))
+        shutil.copy2(file_path, output_file)
+        return output_file
+    except Exception as e:
+        print(f"[WARN] Could not reuse {file_path}: {e}")
+        return False
+
+def plan_incremental(journal, store, tasks, filter_keys, max_age_days):
+    """Reuse reports that are still fresh and return only the tasks that have to be downloaded"""
+    stale, fresh = store.split_stale(tasks, filter_keys, max_age_days)
+    reused = 0
+    for task, fetch in fresh:
+        _, state_name, y, month = task
+        output_file = reuse_fetched_file(fetch["file_path"], state_name, month, y)
+        if output_file:
+            journal.task_done(task, output_file)
+            reused += 1
+        else:
+            stale.append(task)
+    print(f"[INFO] Incremental run: {reused} reports still fresh (copied from earlier runs), {len(stale)} to fetch")
+    return stale
+
+def record_fetches(journal, store, filter_keys):
+    """
+    Add this run's downloads to the fetch store and compare each with the previous version of the
+    same report. Returns the run's delta: the new and revised reports (with the cells that changed)
+    and the number of downloads identical to the previous fetch.
+    """
+    partitions, unchanged = [], 0
+    for (combo, state_name, y, month), file_path, finished_at in journal.fetched_tasks():
+        if not file_path or not os.path.exists(file_path):
+            continue
+        spec = report_spec(filter_keys, combo)
+        changed, previous = store.record(spec, state_name, y, month, file_path, finished_at)
+        if not changed:
+            unchanged += 1
+            continue
+        partition = {"spec": json.loads(spec), "state": state_name, "year": y, "month": month,
+                     "file": file_path, "status": "new" if previous is None else "revised"}
+        if previous is not None:
+            partition["previous_file"] = previous["file_path"]
+            partition["previous_fetched_at"] = previous["fetched_at"]
+            old_cells = read_report(previous["file_path"]) if os.path.exists(previous["file_path"]) else None
+            new_cells = read_report(file_path)
+            if old_cells is not None and new_cells is not None:
+                partition["changes"] = diff_reports(old_cells, new_cells)
+                partition["total_change"] = sum(c["change"] for c in partition["changes"])
+        partitions.append(partition)
+    return {"run_id": journal.run_id, "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "unchanged": unchanged, "partitions": partitions}
+
+def publish_revision_delta(delta):
+    """Write the run's delta to revisions.json in the outputs folder and print the revised reports"""
+    new = sum(1 for p in delta["partitions"] if p["status"] == "new")
+    revised = [p for p in delta["partitions"] if p["status"] == "revised"]
+    print(f"[INFO] Downloaded reports: {new} new, {len(revised)} revised, "
+          f"{delta['unchanged']} identical to the previous fetch")
+    for p in revised[:20]:
+        changes = p.get("changes")
+        if changes is None:
+            print(f"[INFO] Revised: {p['state']} - {p['month']} {p['year']} (previous file not readable)")
+            continue
+        top = ", ".join(f"{c['row']} / {c['column']} {c['change']:+d}" for c in changes[:3])
+        print(f"[INFO] Revised: {p['state']} - {p['month']} {p['year']}: {len(changes)} cell(s), "
+              f"{p['total_change']:+d} registrations ({top}{', ...' if len(changes) > 3 else ''})")
+    if len(revised) > 20:
+        print(f"[INFO] ... and {len(revised) - 20} more revised reports, see revisions.json")
+    delta_file = os.path.join(OUTPUT_DIR, "revisions.json")
+    try:
+        with open(delta_file, "w", encoding="utf-8") as f:
+            json.dump(delta, f, indent=2, ensure_ascii=False)
+        print(f"[INFO] Revision delta saved to {delta_file}")
+    except Exception as e:
+        print(f"[WARN] Could not save revision delta: {e}")
+    return new, len(revised)
+
+def get_all_states_option(session, backend):
+    """Text of the State dropdown's all-states option, e.g. 'All Vahan4 Running States (36/36)'"""
+    if backend == "http":
+        options = session.options("state")
+    else:
+        options = dropdown_option_texts(session, "j_idt39", marker="All Vahan4 Running States")
+    return next((o for o in options if o.startswith("All Vahan4 Running States")), "All Vahan4 Running States")
+
+def plan_dataset_layout(filters, states, year_month_seq):
+    """Pick the Y-Axis/X-Axis layout that needs the fewest downloads for the requested dataset and put it in filters"""
+    dimensions = parse_dataset(filters["dataset"])
+    years = set(y for y, _ in year_month_seq)
+    layouts = plan_layouts(dimensions, len(states), len(year_month_seq), len(years),
+                           whole_years=len(year_month_seq) == 12 * len(years))
+    if not layouts:
+        print(f"[ERROR] No dashboard layout gives {' x '.join(dimensions)}: at most two of them can be table axes")
+        return None
+    layout = layouts[0]
+    prompt_layout = next((l for l in layouts if [l["yaxis"]] == filters.get("yaxis") and [l["xaxis"]] == filters.get("xaxis")), None)
+    print(f"[INFO] Dataset {' x '.join(dimensions)}: Y-Axis '{layout['yaxis']}', X-Axis '{layout['xaxis']}', "
+          f"{'per state' if layout['per_state'] else 'all states'}, {'per month' if layout['per_month'] else 'per year'} "
+          f"-> {layout['downloads']} downloads"
+          + (f" (prompt layout: {prompt_layout['downloads']})" if prompt_layout and prompt_layout is not layout else ""))
+    if layout["aggregated"]:
+        print(f"[INFO] Summed away in the table: {', '.join(layout['aggregated'])}")
+    filters["yaxis"], filters["xaxis"] = [layout["yaxis"]], [layout["xaxis"]]
+    filters["dataset"] = dimensions
+    return layout
+
+def write_dataset(journal, filters):
+    """Reshape every report of the run into the requested dataset's long format and save it as dataset.csv"""
+    dimensions = parse_dataset(filters["dataset"])
+    layout = layout_for_axes(filters["yaxis"][0], filters["xaxis"][0])
+    months = None
+    if all(filters.get(k) for k in ("start_year", "start_month", "end_year", "end_month")):
+        months = {yyyymm(y, m) for y, m in generate_year_month_range(
+            filters["start_year"][0], filters["start_month"][0], filters["end_year"][0], filters["end_month"][0])}
+    records = {}
+    for task, file_path in journal.done_tasks():
+        cells = read_report(file_path) if file_path and os.path.exists(file_path) else None
+        if cells is None:
+            print(f"[WARN] Report for {task[1]} - {task[3]} {task[2]} not readable, left out of the dataset")
+            continue
+        for key, count in reshape(cells, layout, dimensions, task, months).items():
+            records[key] = records.get(key, 0) + count
+    dataset_file = os.path.join(OUTPUT_DIR, "dataset.csv")
+    try:
+        with open(dataset_file, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(dataset_columns(dimensions))
+            for key in sorted(records):
+                writer.writerow(list(key) + [records[key]])
+        print(f"[INFO] Dataset saved to {dataset_file} ({len(records)} rows)")
+    except Exception as e:
+        print(f"[ERROR] Could not save dataset: {e}")
+
 def generate_year_month_range(start_year, start_month, end_year, end_month):
     months = [m.upper() for m in month_abbr if m]
     month_to_num = {m: i+1 for i, m in enumerate(months)}
@@ -468,21 +371,9 @@ def generate_year_month_range(start_year, start_month, end_year, end_month):
 
 def get_available_months_for_year(driver):
     try:
-        month_dropdown = WebDriverWait(driver, 3).until(
-            EC.element_to_be_clickable((By.ID, "groupingTable:selectMonth_label"))
-        )
-        month_dropdown.click()
-        time.sleep(0.1)
-        month_items = WebDriverWait(driver, 3).until(
-            EC.visibility_of_element_located((By.ID, "groupingTable:selectMonth_items"))
-        )
-        month_options = month_items.find_elements(By.CSS_SELECTOR, "li:not([style*='display: none'])")
-        months = [m.text.strip().upper() for m in month_options if m.text.strip() and m.text.strip().upper() not in ("SELECT MONTH", "2025")]
-        month_dropdown.click()
-        time.sleep(0.1)
+        months = [m.upper() for m in dropdown_option_texts(driver, MONTH_DROPDOWN_ID)
+                  if m.upper() not in ("SELECT MONTH", "2025")]
         print("[DEBUG] Available months for selected year:", months)
-        with open("month_debug.txt", "a", encoding="utf-8") as f:
-            f.write("[DEBUG] Available months for selected year: " + str(months) + "\n")
         return months
     except Exception as e:
         print(f"[ERROR] Failed to get available months for year: {e}")
@@ -496,10 +387,11 @@ def is_session_alive(driver):
         print(f"[ERROR] Selenium session lost: {e}")
         return False
 
-def setup_driver():
+def setup_driver(download_dir=DOWNLOAD_DIR, fast=None):
+    fast = FAST_PROFILE if fast is None else fast
     chrome_options = Options()
     chrome_options.add_experimental_option("prefs", {
-        "download.default_directory": DOWNLOAD_DIR,
+        "download.default_directory": download_dir,
         "download.prompt_for_download": False,
         "safebrowsing.enabled": True
     })
@@ -507,198 +399,643 @@ def setup_driver():
     chrome_options.add_argument("--window-size=1920,1080")
     chrome_options.add_argument("--disable-extensions")
     chrome_options.add_argument("--disable-dev-shm-usage")
+    if fast:
+        add_fast_options(chrome_options)
     driver = webdriver.Chrome(options=chrome_options)
-    driver.get("https://vahan.parivahan.gov.in/vahan4dashboard/vahan/view/reportview.xhtml")
+    try:
+        if fast:
+            apply_fast_profile(driver)
+        load_report_page(driver)
+    except Exception:
+        driver.quit()
+        raise
+    return driver
+
+def load_report_page(driver):
+    """Navigate to a fresh report page and wait until the dropdowns are ready"""
+    driver.get(VAHAN_URL)
     WebDriverWait(driver, 10).until(
         EC.presence_of_element_located((By.ID, "yaxisVar_label"))
     )
-    time.sleep(4)
-    return driver
+    ready = wait_for_page_idle(driver, component_id="yaxisVar_label")
+    # One scan maps every control for the finders in dynamic_dropdown_finder
+    scan_controls(driver)
+    return ready
 
-def run_vahan_automation():
-    print(f"\n[INFO] Starting VAHAN automation at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+def warm_report_page(driver):
+    try:
+        return load_report_page(driver)
+    except Exception as e:
+        print(f"[WARN] Could not reload the report page: {str(e).split('Stacktrace:')[0].strip()}")
+        return False
 
-    filters = read_prompt()
-    global OUTPUT_DIR
-    OUTPUT_DIR = get_new_output_dir(filters)
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    print(f"[INFO] Output directory for this run: {OUTPUT_DIR}")
+# Browser sessions outlive a single run, so scheduled runs start from an already running browser
+SESSION_POOL = SessionPool(setup_driver, warm_report_page)
 
-    driver = setup_driver()
+@traced("session_restart")
+def restart_driver(driver, download_dir):
+    """Replace a dead browser session; the crawl state machine re-selects the dropdowns"""
+    SESSION_POOL.discard(driver)
+    return SESSION_POOL.acquire(download_dir)
 
-    try:
-        # Select 'Type' and 'Year' first to populate the state dropdown
-        type_value = filters.get('type', [None])[0]
-        year_value = filters.get('year', [None])[0]
-        if type_value:
-            select_type_dynamic(driver, type_value)
-            time.sleep(1)
-        if year_value:
-            select_dropdown(driver, "selectedYear_label", year_value)
-            time.sleep(1)
-
-        # Now get all available states using dynamic approach
-        available_states = get_available_states_dynamic(driver)
-        print(f"[INFO] Found {len(available_states)} states: {available_states}")
-        if not available_states and 'state' in filters:
-            available_states = filters['state']
-            print(f"[INFO] Using state from prompt.txt: {available_states}")
-
-        filter_keys = [k for k, _, _ in DROPDOWN_ORDER if k in filters]
-        filter_values = [filters[k] for k in filter_keys]
-        if not filter_keys:
-            filter_combinations = [()]
+def apply_filter_combination(driver, filters, filter_keys, combo, timed=None):
+    """
+    Select every global dropdown of a filter combination. Returns True if all selections succeeded.
+    With `timed` (AdaptiveController.timed), each dropdown postback is reported on its own.
+    """
+    combo_values = dict(zip(filter_keys, combo))
+
+    def select_value(k, label_id, is_select, v):
+        print(f"[INFO] Selecting {k}: {v}")
+        if k == "type":
+            success = select_type_dynamic(driver, v)
+        elif k == "state":
+            success = select_state_dynamic(driver, v)
         else:
-            filter_combinations = list(itertools.product(*filter_values))
-
-        start_year = filters.get('start_year', [None])[0]
-        start_month = filters.get('start_month', [None])[0]
-        end_year = filters.get('end_year', [None])[0]
-        end_month = filters.get('end_month', [None])[0]
-        if not all([start_year, start_month, end_year, end_month]):
-            print("[ERROR] Start/end year/month not set in prompt.txt. Using default 12 months.")
-            year_month_seq = [(datetime.now().year, m) for m in ALL_MONTHS]
+            success = select_dropdown(driver, label_id, v, is_select)
+        if success:
+            wait_for_page_idle(driver)
+        return success
+
+    if timed is not None:
+        select_value = timed("select", select_value)
+    for k, label_id, is_select in DROPDOWN_ORDER:
+        if k not in combo_values:
+            continue
+        if not select_value(k, label_id, is_select, combo_values[k]):
+            print(f"[WARN] Skipping combination due to selection failure: {combo_values}")
+            return False
+    return True
+
+def catalogued_months(read_months, filter_keys):
+    """Month list of a task from the option catalogue; read from the page (and catalogued) when not cached"""
+    def months(task):
+        context = task_context(filter_keys, task)
+        cached = cached_options("months", context)
+        if cached is not None:
+            return cached
+        found = [m.upper() for m in read_months(task) or []]
+        remember_options("months", context, found)
+        return found
+    return months
+
+def forget_failed_options(filter_keys, task, reason):
+    """A failed selection or a month missing from the page means the cached list it was picked from may be out of date"""
+    step = reason.split(":", 1)[1] if reason.startswith("failed:") else None
+    if reason == "month_unavailable":
+        step = "month"
+    kind = {"month": "months", "state": "states", "year": "years"}.get(step)
+    if kind:
+        forget_options(kind, task_context(filter_keys, task))
+
+def selenium_transitions(driver, filters, filter_keys, controller):
+    """Page transitions of the crawl state machine, performed in the browser; each postback is timed by the controller"""
+    timed = controller.timed
+    return {
+        "combo": lambda task: apply_filter_combination(driver, filters, filter_keys, task[0], timed),
+        "state": timed("select", lambda task: select_state_dynamic(driver, task[1])),
+        "year": timed("select", lambda task: select_dropdown(driver, "selectedYear_label", str(task[2]))),
+        "refresh": timed("refresh", lambda task: click_refresh_dynamic(driver)),
+        "months": catalogued_months(lambda task: get_available_months_for_year(driver), filter_keys),
+        "month": timed("select", lambda task: select_month(driver, task[3])),
+    }
+
+def http_transitions(client, filter_keys, controller):
+    """Page transitions of the crawl state machine, performed as JSF postbacks, each timed by the controller"""
+    timed = controller.timed
+    select = timed("select", client.select)
+    return {
+        "combo": traced("select_combo")(lambda task: all(select(k, v) for k, v in zip(filter_keys, task[0]))),
+        "state": timed("select", traced("select_state")(lambda task: client.select("state", task[1]))),
+        "year": timed("select", traced("select_year")(lambda task: client.select("year", str(task[2])))),
+        "refresh": timed("refresh", traced("refresh")(lambda task: client.refresh())),
+        "months": catalogued_months(lambda task: client.get_available_months(), filter_keys),
+        "month": timed("select", traced("select_month")(lambda task: client.select("month", task[3]))),
+    }
+
+def download_task(driver, task, download_dir):
+    """Save the report currently shown for a task under the outputs folder. Returns the saved path or None"""
+    wait_for_page_idle(driver)
+    if EXTRACT_MODE == "table":
+        return scrape_task(driver, task)
+    saved_path = capture_task(driver, task) if CAPTURE_MODE else download_excel_task(driver, task, download_dir)
+    if saved_path and EXTRACT_MODE == "parity":
+        check_table_parity(driver, task, saved_path)
+    return saved_path
+
+def download_excel_task(driver, task, download_dir):
+    """Download the report's Excel file through the browser. Returns the saved path or None"""
+    _, state_name, y, month = task
+    # Each download gets its own empty directory, so the finished file is unambiguous
+    job_dir = new_download_job(driver, download_dir, f"{state_name}_{y}_{month}")
+    saved_path = None
+    try:
+        if click_download_dynamic(driver):
+            print("[INFO] Waiting for file download to complete...")
+            file_path = wait_for_download(job_dir, timeout=DOWNLOAD_TIMEOUT)
+            if file_path:
+                saved_path = process_downloaded_file(file_path, state_name, month, y) or None
+                if saved_path:
+                    print(f"[INFO] Successfully processed data for {state_name} - {month} {y}")
+                else:
+                    print(f"[ERROR] Failed to process data for {state_name} - {month} {y}")
+            else:
+                print(f"[ERROR] No Excel file found for {state_name} - {month} {y}")
         else:
-            year_month_seq = generate_year_month_range(start_year, start_month, end_year, end_month)
-        print(f"[INFO] Year/month sequence to process: {year_month_seq}")
+            print(f"[ERROR] Failed to download data for {state_name} - {month} {y}")
+    finally:
+        cleanup_download_job(job_dir)
+    return saved_path
+
+@traced("scrape_table")
+def scrape_task(driver, task):
+    """Table extraction: read the rendered report table and save it as JSON. Returns the saved path or None"""
+    _, state_name, y, month = task
+    table = scrape_grouping_table(driver)
+    if not table:
+        print(f"[ERROR] Failed to read the report table for {state_name} - {month} {y}")
+        return None
+    try:
+        saved_path = save_table(table, report_output_file(state_name, month, y, ext=".json"))
+    except Exception as e:
+        print(f"[ERROR] Failed to save report table: {e}")
+        return None
+    print(f"[INFO] Saved {len(table['rows'])} table rows to: {saved_path}")
+    return saved_path
+
+def check_table_parity(driver, task, saved_path):
+    """Parity mode: compare the rendered table with the saved Excel file and log every cell that differs"""
+    _, state_name, y, month = task
+    table = scrape_grouping_table(driver)
+    excel_cells = read_report(saved_path)
+    if table is None or excel_cells is None:
+        print(f"[WARN] Parity check skipped for {state_name} - {month} {y}: table or workbook not readable")
+        PARITY_RESULTS.append((task, None))
+        return
+    changes = diff_reports(excel_cells, table_cells(table))
+    PARITY_RESULTS.append((task, len(changes)))
+    if not changes:
+        print(f"[INFO] Parity OK for {state_name} - {month} {y}: {len(excel_cells)} cells match the Excel file")
+        return
+    print(f"[WARN] Parity mismatch for {state_name} - {month} {y}: {len(changes)} cells differ")
+    for c in changes[:10]:
+        print(f"[WARN]   {c['row']} / {c['column']}: Excel {c['old']}, table {c['new']}")
+
+def print_parity_summary(journal):
+    checked = [diffs for _, diffs in PARITY_RESULTS if diffs is not None]
+    mismatched = [(task, diffs) for task, diffs in PARITY_RESULTS if diffs]
+    print(f"[INFO] Table/Excel parity: {len(checked) - len(mismatched)} of {len(PARITY_RESULTS)} reports match, "
+          f"{len(mismatched)} differ, {len(PARITY_RESULTS) - len(checked)} not checked")
+    for (_, state_name, y, month), diffs in mismatched:
+        print(f"[WARN]   {state_name} - {month} {y}: {diffs} cells differ")
+    journal.record_metrics({"parity": {"checked": len(checked), "mismatched": len(mismatched)}})
+
+def capture_task(driver, task):
+    """Capture mode: take the report's Excel response into memory and save it once. Returns the saved path or None"""
+    _, state_name, y, month = task
+    download_button = find_download_button(driver)
+    data = capture_xls(driver, download_button, timeout=DOWNLOAD_TIMEOUT) if download_button else None
+    saved_path = save_captured_file(data, state_name, month, y) if data else None
+    if saved_path:
+        print(f"[INFO] Successfully processed data for {state_name} - {month} {y}")
+        return saved_path
+    print(f"[ERROR] Failed to capture data for {state_name} - {month} {y}")
+    return None
+
+@traced("http_download")
+def download_task_http(client, task, download_path):
+    _, state_name, y, month = task
+    if CAPTURE_MODE:
+        data = client.fetch_xls()
+        saved_path = save_captured_file(data, state_name, month, y) if data else None
+    else:
+        file_path = client.download_xls(download_path)
+        saved_path = process_downloaded_file(file_path, state_name, month, y) if file_path else None
+    if saved_path:
+        print(f"[INFO] Successfully processed data for {state_name} - {month} {y}")
+        return saved_path
+    print(f"[ERROR] Failed to download data for {state_name} - {month} {y}")
+    return None
+
+def describe_failure(reason):
+    if reason == "month_unavailable":
+        return "Month not available"
+    if reason.startswith("failed:"):
+        return f"Step '{reason.split(':', 1)[1]}' failed"
+    return f"Step '{reason}' failed"
+
+def handle_task_failure(journal, scheduler, task, attempt, reason, failure_class):
+    """Skip an unavailable month, re-queue a retryable failure or dead-letter the task. Returns True if dead-lettered."""
+    _, state_name, y, month = task
+    print(f"[WARN] {describe_failure(reason)} for {state_name} - {month} {y} (attempt {attempt}, {failure_class})")
+    if failure_class == MONTH_UNAVAILABLE:
+        journal.task_skipped(task, reason)
+        return False
+    if scheduler.retry(task, attempt, failure_class):
+        journal.task_failed(task, reason)
+        return False
+    print(f"[ERROR] Giving up on {state_name} - {month} {y} after {attempt} attempts")
+    journal.dead_letter(task, failure_class, reason, attempt)
+    return True
+
+def report_transitions(label, plan, combo_size, machine):
+    report = transition_report(plan, combo_size, machine.total_transitions())
+    print(f"[INFO] {label} UI transitions: naive {report['naive']}, planned {report['planned']}, "
+          f"actual {report['actual']} (saved {report['naive'] - report['actual']} for {report['tasks']} tasks)")
+    return report
 
-        for combo in filter_combinations:
-            print(f"\n[INFO] Processing filter combination: {dict(zip(filter_keys, combo))}")
-            xaxis_value = None
+def shard_states(states, workers):
+    """Split the state list round-robin into at most `workers` non-empty shards"""
+    shards = [states[i::workers] for i in range(workers)]
+    return [shard for shard in shards if shard]
 
-            # Session health check and browser restart logic for each filter combo
-            if not is_session_alive(driver):
-                print("[INFO] Restarting browser session...")
+def shard_tasks(tasks, workers):
+    """Shard tasks by state, so each state's pages are only walked by one worker"""
+    states = list(dict.fromkeys(task[1] for task in tasks))
+    return [[task for task in tasks if task[1] in shard] for shard in shard_states(states, workers)]
+
+def get_worker_download_dir(worker_id, workers):
+    """Single-worker runs keep using DOWNLOAD_DIR; pooled workers each get their own sub-folder"""
+    if workers <= 1:
+        download_dir = DOWNLOAD_DIR
+    else:
+        download_dir = os.path.join(DOWNLOAD_DIR, f"worker_{worker_id}")
+        os.makedirs(download_dir, exist_ok=True)
+    purge_partial_downloads(download_dir)
+    return download_dir
+
+def run_worker(worker_id, tasks, filters, filter_keys, journal, controller, download_dir, driver=None):
+    """Execute the crawl plan for one shard of tasks in its own browser session"""
+    plan = build_plan(tasks)
+    states = list(dict.fromkeys(task[1] for task in plan))
+    print(f"[INFO] Worker {worker_id} starting with {len(states)} states ({len(plan)} downloads): {states}")
+    if driver is None:
+        driver = SESSION_POOL.acquire(download_dir)
+    machine = CrawlStateMachine(selenium_transitions(driver, filters, filter_keys, controller), len(filter_keys))
+    download = controller.timed("download", download_task)
+    scheduler = RetryScheduler(plan)
+    failed_combos = set()
+    try:
+        while scheduler:
+            task, attempt = scheduler.next()
+            combo, state_name, y, month = task
+            if combo in failed_combos:
+                # Never attempted: skipped (and re-run on resume), not counted as a failure
+                journal.task_skipped(task, "combo_unavailable")
+                continue
+            if SESSION_POOL.needs_recycle(driver):
+                driver = SESSION_POOL.recycle(driver, download_dir)
+                machine.actions = selenium_transitions(driver, filters, filter_keys, controller)
+                machine.reset()
+            # Wait for the controller's go-ahead (concurrency limit, pacing, circuit breaker)
+            controller.acquire()
+            try:
+                print(f"\n[INFO] Processing year: {y}, month: {month} for state: {state_name}")
+                journal.task_started(task)
+                task_labels(task)
                 try:
-                    driver.quit()
-                except Exception:
-                    pass
-                driver = setup_driver()
-                # Re-select all dropdowns up to this point
-                for (k, label_id, is_select), v in zip(DROPDOWN_ORDER, combo):
-                    if k in filters and k != "state":
-                        print(f"[INFO] (re)Selecting {k}: {v}")
-                        if k == "type":
-                            select_type_dynamic(driver, v)
-                        else:
-                            select_dropdown(driver, label_id, v, is_select)
-                        time.sleep(0.5)
-
-            for (k, label_id, is_select), v in zip(DROPDOWN_ORDER, combo):
-                if k in filters:
-                    print(f"[INFO] Selecting {k}: {v}")
-                    if k == "type":
-                        success = select_type_dynamic(driver, v)
-                    elif k == "state":
-                        success = select_state_dynamic(driver, v)
-                    else:
-                        success = select_dropdown(driver, label_id, v, is_select)
-                    if k == "xaxis":
-                        xaxis_value = v
-                    if not success:
-                        print(f"[WARN] Skipping combination due to selection failure: {dict(zip(filter_keys, combo))}")
-                        break
-                    time.sleep(0.5)
-            else:
-                for state_name in available_states:
-                    print(f"\n[INFO] Processing state: {state_name}")
-                    # Always select the state before downloading for it
-                    if not select_state_dynamic(driver, state_name):
-                        print(f"[ERROR] Failed to select state: {state_name}. Skipping to next state.")
-                        continue
-                    print(f"[INFO] Now downloading for state: {state_name}")
-                    # Session health check and browser restart logic for each state
-                    if not is_session_alive(driver):
-                        print("[INFO] Restarting browser session (inside state loop)...")
-                        try:
-                            driver.quit()
-                        except Exception:
-                            pass
-                        driver = setup_driver()
-                        # Re-select all dropdowns up to this point
-                        for (k, label_id, is_select), v in zip(DROPDOWN_ORDER, combo):
-                            if k in filters and k != "state":
-                                print(f"[INFO] (re)Selecting {k}: {v}")
-                                if k == "type":
-                                    select_type_dynamic(driver, v)
-                                else:
-                                    select_dropdown(driver, label_id, v, is_select)
-                                time.sleep(0.5)
-                        # Always select the state after browser restart
-                        if not select_state_dynamic(driver, state_name):
-                            print(f"[WARN] Could not select state {state_name} after browser restart")
-                            continue
-                    # Click refresh after state selection using dynamic finder
-                    print("[INFO] Clicking refresh after state selection...")
-                    if not click_refresh_dynamic(driver):
-                        print(f"[ERROR] Failed to click refresh after state selection")
-                        continue
-                    time.sleep(2)
-                    for y, month in year_month_seq:
-                        # Session health check and browser restart logic for each year/month
-                        if not is_session_alive(driver):
-                            print("[INFO] Restarting browser session (inside month loop)...")
-                            try:
-                                driver.quit()
-                            except Exception:
-                                pass
-                            driver = setup_driver()
-                            # Re-select all dropdowns up to this point
-                            for (k, label_id, is_select), v in zip(DROPDOWN_ORDER, combo):
-                                if k in filters and k != "state":
-                                    print(f"[INFO] (re)Selecting {k}: {v}")
-                                    if k == "type":
-                                        select_type_dynamic(driver, v)
-                                    else:
-                                        select_dropdown(driver, label_id, v, is_select)
-                                    time.sleep(0.5)
-                            if not select_state_dynamic(driver, state_name):
-                                print(f"[WARN] Could not select state {state_name} after browser restart (month loop)")
-                                continue
-                        print(f"\n[INFO] Processing year: {y}, month: {month} for state: {state_name}")
-                        if not select_dropdown(driver, "selectedYear_label", str(y)):
-                            print(f"[ERROR] Failed to select year: {y}")
-                            continue
-                        if not click_refresh_dynamic(driver):
-                            print(f"[ERROR] Failed to click refresh after selecting year {y}")
-                            continue
-                        available_months = get_available_months_for_year(driver)
-                        print(f"[DEBUG] Available months for selected year: {available_months}")
-                        if month.upper() not in available_months:
-                            print(f"[WARN] Month '{month}' not available for year {y}, skipping.")
-                            continue
-                        if not select_month(driver, month):
-                            print(f"[ERROR] Failed to select month: {month}")
-                            continue
-                        time.sleep(2)
-                        if click_download_dynamic(driver):
-                            print("[INFO] Waiting for file download to complete...")
-                            time.sleep(3)
-                            file_path = latest_file(DOWNLOAD_DIR)
-                            if file_path:
-                                if process_downloaded_file(file_path, state_name, month, y):
-                                    print(f"[INFO] Successfully processed data for {state_name} - {month} {y}")
-                                else:
-                                    print(f"[ERROR] Failed to process data for {state_name} - {month} {y}")
-                            else:
-                                print(f"[ERROR] No Excel file found for {state_name} - {month} {y}")
-                        else:
-                            print(f"[ERROR] Failed to download data for {state_name} - {month} {y}")
+                    ready, reason = machine.run(task)
+                    saved_path = download(driver, task, download_dir) if ready else None
+                    if ready and not saved_path:
+                        reason = "download"
+                except Exception as e:
+                    saved_path, reason = None, f"error: {str(e).split('Stacktrace:')[0].strip()}"
+                if saved_path:
+                    journal.task_done(task, saved_path)
+                    SESSION_POOL.record_job(driver)
+                    continue
+                # The session is only health-checked when a step fails, not before every month
+                alive = reason == "month_unavailable" or SESSION_POOL.is_healthy(driver)
+                failure_class = classify_failure(reason, alive)
+                forget_failed_options(filter_keys, task, reason)
+                if failure_class == SESSION_LOST:
+                    print(f"[INFO] Worker {worker_id} restarting browser session...")
+                    driver = restart_driver(driver, download_dir)
+                    machine.actions = selenium_transitions(driver, filters, filter_keys, controller)
+                    machine.reset()
+                elif failure_class != MONTH_UNAVAILABLE:
+                    # A step that failed on a live page may be a bloated one: read its heap before the next task
+                    SESSION_POOL.check_heap_soon(driver)
+                if handle_task_failure(journal, scheduler, task, attempt, reason, failure_class) and reason == "failed:combo":
+                    print(f"[WARN] Skipping combination due to selection failure: {dict(zip(filter_keys, combo))}")
+                    failed_combos.add(combo)
+            finally:
+                controller.release()
+    except Exception as e:
+        print(f"[ERROR] Worker {worker_id} failed: {e}")
+    finally:
+        SESSION_POOL.release(driver)
+    report = report_transitions(f"Worker {worker_id}", plan, len(filter_keys), machine)
+    print(f"[INFO] Worker {worker_id} finished")
+    return report
 
+def run_http_worker(worker_id, tasks, filters, filter_keys, journal, controller, download_dir, client=None):
+    """Selenium-free worker: the same crawl plan, replayed as JSF postbacks over HTTP"""
+    plan = build_plan(tasks)
+    states = list(dict.fromkeys(task[1] for task in plan))
+    print(f"[INFO] HTTP worker {worker_id} starting with {len(states)} states ({len(plan)} downloads): {states}")
+    if client is None:
+        client = VahanHttpClient(VAHAN_URL)
+        if not client.load():
+            print(f"[ERROR] HTTP worker {worker_id} could not load the report page")
+            return None
+    machine = CrawlStateMachine(http_transitions(client, filter_keys, controller), len(filter_keys))
+    download = controller.timed("download", download_task_http)
+    download_path = os.path.join(download_dir, f"reportTable_worker_{worker_id}.xlsx")
+    scheduler = RetryScheduler(plan)
+    try:
+        while scheduler:
+            task, attempt = scheduler.next()
+            _, state_name, y, month = task
+            controller.acquire()
+            try:
+                print(f"\n[INFO] Processing year: {y}, month: {month} for state: {state_name}")
+                journal.task_started(task)
+                task_labels(task)
+                try:
+                    ready, reason = machine.run(task)
+                    saved_path = download(client, task, download_path) if ready else None
+                    if ready and not saved_path:
+                        reason = "download"
+                except Exception as e:
+                    saved_path, reason = None, f"error: {e}"
+                if saved_path:
+                    journal.task_done(task, saved_path)
+                    continue
+                # A failed postback usually means the JSF view expired, so the view is reloaded before the retry
+                failure_class = classify_failure(reason, session_alive=reason == "download")
+                forget_failed_options(filter_keys, task, reason)
+                if failure_class == SESSION_LOST:
+                    print(f"[INFO] Reloading HTTP session after {reason}")
+                    machine.reset()
+                    client.load()
+                handle_task_failure(journal, scheduler, task, attempt, reason, failure_class)
+            finally:
+                controller.release()
     except Exception as e:
-        print(f"[ERROR] Automation failed: {e}")
+        print(f"[ERROR] HTTP worker {worker_id} failed: {e}")
     finally:
+        client.close()
+    report = report_transitions(f"HTTP worker {worker_id}", plan, len(filter_keys), machine)
+    print(f"[INFO] HTTP worker {worker_id} finished")
+    return report
+
+def print_dead_letters(journal):
+    """End-of-run summary of the tasks that were given up on"""
+    dead = journal.dead_letters()
+    if not dead:
+        print("[INFO] No tasks were given up on")
+        return
+    by_class = {}
+    for entry in dead:
+        by_class.setdefault(entry["failure_class"], []).append(entry)
+    print(f"[WARN] {len(dead)} tasks were given up on:")
+    for failure_class, entries in by_class.items():
+        print(f"[WARN]   {failure_class}: {len(entries)}")
+        for entry in entries:
+            print(f"[WARN]     {entry['state']} - {entry['month']} {entry['year']}: {entry['error']} "
+                  f"({entry['attempts']} attempts)")
+
+def print_transition_summary(reports):
+    reports = [r for r in reports if r]
+    if not reports:
+        return
+    naive = sum(r["naive"] for r in reports)
+    planned = sum(r["planned"] for r in reports)
+    actual = sum(r["actual"] for r in reports)
+    print(f"[INFO] UI transitions for this run: naive {naive}, planned {planned}, actual {actual} "
+          f"(estimated saving {naive - planned}, actual saving {naive - actual})")
+
+def run_vahan_automation(workers=1, backend="selenium", resume=None, incremental=False, max_age_days=REFETCH_AGE_DAYS,
+                         dataset=None):
+    print(f"\n[INFO] Starting VAHAN automation at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    global OUTPUT_DIR
+    if resume:
+        # Continue an interrupted run in place: same output folder, same filters, only unfinished tasks
+        journal = RunJournal(resume)
+        run = journal.get_run()
+        if run is None:
+            print(f"[ERROR] Unknown run id '{resume}' in {journal.db_path}")
+            journal.close()
+            return
+        filters = run["filters"]
+        OUTPUT_DIR = run["output_dir"]
+        print(f"[INFO] Resuming run {resume} (started {run['started_at']})")
+    else:
+        filters = read_prompt()
+        if dataset:
+            filters["dataset"] = [dataset]
+        OUTPUT_DIR = get_new_output_dir(filters)
+        journal = RunJournal(os.path.basename(OUTPUT_DIR))
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    start_spans(OUTPUT_DIR)
+    journal.start_run(OUTPUT_DIR, filters, backend)
+    print(f"[INFO] Output directory for this run: {OUTPUT_DIR}")
+    print(f"[INFO] Run id: {journal.run_id} (continue an interrupted run with --resume {journal.run_id})")
+
+    filter_keys = [k for k, _, _ in DROPDOWN_ORDER if k in filters]
+    if resume:
+        tasks = journal.pending_tasks()
+        print(f"[INFO] {len(tasks)} tasks left to do: {journal.summary()}")
+        if not tasks:
+            journal.finish_run()
+            journal.close()
+            return
+
+    workers = max(1, int(workers))
+    worker_fn = run_http_worker if backend == "http" else run_worker
+    if backend == "http" and EXTRACT_MODE != "excel":
+        print(f"[WARN] --extract {EXTRACT_MODE} reads the rendered page and needs the selenium backend; downloading Excel files")
+    PARITY_RESULTS.clear()
+    # The first session selects the global filters (and discovers the states) and is then handed to worker 0
+    if backend == "http":
+        session = VahanHttpClient(VAHAN_URL)
+        if not session.load():
+            print("[ERROR] Automation failed: could not load the report page over HTTP")
+            journal.close()
+            return
+    else:
+        SESSION_POOL.reset_stats()
         try:
-            driver.quit()
-        except Exception:
-            pass
+            session = SESSION_POOL.acquire(get_worker_download_dir(0, workers))
+        except Exception as e:
+            print(f"[ERROR] Automation failed: could not start a browser session: {e}")
+            journal.close()
+            return
+
+    if not resume:
+        try:
+            # Select 'Type' and 'Year' first to populate the state dropdown
+            type_value = filters.get('type', [None])[0]
+            year_value = filters.get('year', [None])[0]
+            state_context = {"type": type_value, "year_type": filters.get('year_type', [None])[0], "year": year_value}
+            available_states = cached_options("states", state_context)
+            if available_states:
+                print(f"[INFO] Using {len(available_states)} states from the option catalogue")
+            elif backend == "http":
+                if type_value:
+                    session.select("type", type_value)
+                if year_value:
+                    session.select("year", year_value)
+                available_states = session.get_available_states()
+                remember_options("years", state_context, session.options("year"))
+            else:
+                if type_value:
+                    select_type_dynamic(session, type_value)
+                    wait_for_page_idle(session)
+                if year_value:
+                    select_dropdown(session, "selectedYear_label", year_value)
+                    wait_for_page_idle(session)
+
+                # Now get all available states using dynamic approach
+                available_states = get_available_states_dynamic(session)
+                remember_options("years", state_context, dropdown_option_texts(session, "selectedYear"))
+            remember_options("states", state_context, available_states)
+            print(f"[INFO] Found {len(available_states)} states: {available_states}")
+            if not available_states and 'state' in filters:
+                available_states = filters['state']
+                print(f"[INFO] Using state from prompt.txt: {available_states}")
+
+            start_year = filters.get('start_year', [None])[0]
+            start_month = filters.get('start_month', [None])[0]
+            end_year = filters.get('end_year', [None])[0]
+            end_month = filters.get('end_month', [None])[0]
+            if not all([start_year, start_month, end_year, end_month]):
+                print("[ERROR] Start/end year/month not set in prompt.txt. Using default 12 months.")
+                year_month_seq = [(datetime.now().year, m) for m in ALL_MONTHS]
+            else:
+                year_month_seq = generate_year_month_range(start_year, start_month, end_year, end_month)
+            print(f"[INFO] Year/month sequence to process: {year_month_seq}")
+            if filters.get("dataset"):
+                layout = plan_dataset_layout(filters, available_states, year_month_seq)
+                if layout is None:
+                    raise ValueError(f"the dashboard cannot produce the dataset {filters['dataset']}")
+                if not layout["per_state"]:
+                    available_states = [get_all_states_option(session, backend)]
+                if not layout["per_month"]:
+                    year_month_seq = [(y, WHOLE_YEAR) for y in dict.fromkeys(y for y, _ in year_month_seq)]
+                filter_keys = [k for k, _, _ in DROPDOWN_ORDER if k in filters]
+                journal.set_filters(filters)
+
+            filter_values = [filters[k] for k in filter_keys]
+            if not filter_keys:
+                filter_combinations = [()]
+            else:
+                filter_combinations = list(itertools.product(*filter_values))
+            tasks = build_tasks(filter_combinations, available_states, year_month_seq)
+            tasks, dropped = filter_tasks(tasks, filter_keys)
+            if dropped:
+                print(f"[INFO] Dropped {len(dropped)} tasks for months that are not published (future months or "
+                      f"missing from the option catalogue)")
+            journal.add_tasks(tasks)
+        except Exception as e:
+            print(f"[ERROR] Automation failed: {e}")
+            try:
+                if backend == "http":
+                    session.close()
+                else:
+                    SESSION_POOL.release(session)
+            except Exception:
+                pass
+            journal.close()
+            return
+
+    store = FetchStore()
+    if incremental and not resume:
+        tasks = plan_incremental(journal, store, tasks, filter_keys, max_age_days)
+
+    shards = shard_tasks(tasks, workers) or [[]]
+    controller = AdaptiveController(max_workers=len(shards))
+    if len(shards) == 1:
+        reports = [worker_fn(0, shards[0], filters, filter_keys, journal, controller,
+                             get_worker_download_dir(0, workers), session)]
+    else:
+        print(f"[INFO] Starting {len(shards)} {backend} workers")
+        with ThreadPoolExecutor(max_workers=len(shards)) as pool:
+            futures = []
+            for worker_id, shard in enumerate(shards):
+                futures.append(pool.submit(
+                    worker_fn, worker_id, shard, filters, filter_keys, journal, controller,
+                    get_worker_download_dir(worker_id, workers), session if worker_id == 0 else None
+                ))
+            reports = [future.result() for future in futures]
+        print(f"[INFO] All {len(shards)} workers finished")
+    print_transition_summary(reports)
+    controller_metrics = controller.report()
+    journal.record_metrics({"controller": controller_metrics})
+    print(f"[INFO] Portal requests: {controller_metrics['requests']} ({controller_metrics['errors']} errors, "
+          f"{controller_metrics['slow']} slow), latency {controller_metrics['latency']}, "
+          f"peak {controller_metrics['peak_limit']} concurrent workers, "
+          f"{controller_metrics['breaker_trips']} circuit breaker trips")
+    if backend != "http":
+        session_metrics = SESSION_POOL.report()
+        journal.record_metrics({"sessions": session_metrics})
+        print(f"[INFO] Browser sessions: {session_metrics['cold_starts']} cold starts "
+              f"(avg {session_metrics['cold_start_avg_s']}s), {session_metrics['warm_starts']} warm reuses "
+              f"(avg {session_metrics['warm_start_avg_s']}s), {session_metrics['recycled']} recycled, "
+              f"{session_metrics['discarded']} discarded")
+    step_summary = summarize(collected_spans())
+    journal.record_metrics({"steps": step_summary})
+    print_step_summary(step_summary)
+
+    delta = record_fetches(journal, store, filter_keys)
+    store.close()
+    new, revised = publish_revision_delta(delta)
+    journal.record_metrics({"fetches": {"new": new, "revised": revised, "unchanged": delta["unchanged"]}})
+    print_dead_letters(journal)
+    if PARITY_RESULTS:
+        print_parity_summary(journal)
+    if filters.get("dataset"):
+        write_dataset(journal, filters)
+    summary = journal.summary()
+    print(f"[INFO] Run {journal.run_id} task summary: {summary}")
+    if summary.get("done", 0) == sum(summary.values()):
+        journal.finish_run()
+    else:
+        print(f"[INFO] Re-run the unfinished tasks with: python main.py --resume {journal.run_id}")
+    journal.close()
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1 and sys.argv[1] == "--run-now":
-        run_vahan_automation()
+    parser = argparse.ArgumentParser(description="VAHAN dashboard downloader")
+    parser.add_argument("--run-now", action="store_true", help="Run once immediately instead of starting the hourly scheduler")
+    parser.add_argument("--workers", type=int, default=1, help="Number of parallel browser sessions; states are sharded across them")
+    parser.add_argument("--backend", choices=["selenium", "http"], default="selenium",
+                        help="Fetch engine: drive Chrome (selenium) or replay the JSF postbacks directly (http)")
+    parser.add_argument("--fast", action="store_true",
+                        help="Headless browser that blocks images/fonts/trackers and disables UI animations")
+    parser.add_argument("--capture", action="store_true",
+                        help="Take the Excel response into memory and write it once, bypassing the downloads folder")
+    parser.add_argument("--extract", choices=EXTRACT_MODES, default=EXTRACT_MODE,
+                        help="Save the Excel download (excel), read the rendered table instead (table), "
+                             "or download Excel and check it against the table (parity)")
+    parser.add_argument("--dataset", metavar="DIMENSIONS",
+                        help="Dataset to collect, e.g. 'Maker,State,Month'; picks the Y-Axis/X-Axis layout with the "
+                             "fewest downloads and writes dataset.csv in long format")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only download months that may have changed; reuse earlier downloads of finalized months")
+    parser.add_argument("--max-age-days", type=float, default=REFETCH_AGE_DAYS,
+                        help="In --incremental mode, refetch months older than the previous one after this many days")
+    parser.add_argument("--resume", metavar="RUN_ID",
+                        help="Continue an interrupted run in its own output folder, re-running only unfinished tasks")
+    args = parser.parse_args()
+    FAST_PROFILE = FAST_PROFILE or args.fast
+    CAPTURE_MODE = CAPTURE_MODE or args.capture
+    EXTRACT_MODE = args.extract
+    if args.resume:
+        run_vahan_automation(workers=args.workers, backend=args.backend, resume=args.resume)
+        SESSION_POOL.close()
+    elif args.run_now:
+        run_vahan_automation(workers=args.workers, backend=args.backend,
+                             incremental=args.incremental, max_age_days=args.max_age_days, dataset=args.dataset)
+        SESSION_POOL.close()
     else:
         print("[INFO] Scheduler started. Will run every hour.")
-        schedule.every().hour.do(run_vahan_automation)
-        while True:
-            schedule.run_pending()
-            time.sleep(1)
+        schedule.every().hour.do(run_vahan_automation, workers=args.workers, backend=args.backend,
+                                 incremental=args.incremental, max_age_days=args.max_age_days, dataset=args.dataset)
+        try:
+            while True:
+                schedule.run_pending()
+                time.sleep(1)
+        finally:
+            SESSION_POOL.close()
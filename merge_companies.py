@@ -2,14 +2,19 @@ import pandas as pd
 import sys
 import os
 from typing import Dict, List
+from vahan_dataset import dataset_specs, read_dataset
 
 def merge_companies(input_file: str, merge_map: Dict[str, List[str]], output_file: str = None):
     """
     For each group, for each unique (State, Month), sum the numeric values for all companies in the merge list (including the main company),
     and keep a single row for the main company for each (State, Month). Remove all other companies in the merge list from the file.
     """
-    # Read with header=2 so row 3 is used as header (0-based index)
-    df = pd.read_excel(input_file, header=2)
+    if input_file in dataset_specs():
+        # A spec of the combined dataset (e.g. Maker_Fuel): State, Month, Maker, count columns
+        df = read_dataset(input_file, wide=True)
+    else:
+        # Read with header=2 so row 3 is used as header (0-based index)
+        df = pd.read_excel(input_file, header=2)
     # Rename columns: second column to 'Month', third to 'Maker'
     cols = list(df.columns)
     if len(cols) >= 3:
@@ -0,0 +1,279 @@
+import io
+import os
+import time
+import logging
+import uuid
+import base64
+import random
+import argparse
+import threading
+from datetime import datetime
+from flask import Flask, render_template, request, send_file, Response
+from openpyxl import Workbook
+
+# Offline stand-in for the VAHAN report page (reportview.xhtml).
+# It renders the same PrimeFaces selectOneMenu markup, answers JSF partial postbacks with
+# <partial-response> XML and returns an Excel file in the portal's layout for the xls link,
+# so the Selenium and HTTP backends can be exercised and benchmarked without the portal.
+
+REPORT_PATH = "/vahan4dashboard/vahan/view/reportview.xhtml"
+RESOURCES_PATH = "/vahan4dashboard/resources"
+FORM_ID = "masterLayout_formlogin"
+REFRESH_ID = "j_idt71"
+MONTH_ID = "groupingTable:selectMonth"
+XLS_ID = "groupingTable:xls"
+MONTHS = ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC']
+
+MOCK_STATES = [
+    "Andaman & Nicobar Island(3)", "Andhra Pradesh(83)", "Assam(33)", "Bihar(48)", "Delhi(16)",
+    "Goa(13)", "Gujarat(37)", "Karnataka(68)", "Kerala(87)", "Maharashtra(59)",
+    "Tamil Nadu(148)", "Uttar Pradesh(77)"
+]
+MOCK_MAKERS = [
+    "ASHOK LEYLAND LTD", "BAJAJ AUTO LTD", "HERO MOTOCORP LTD", "HONDA CARS INDIA LTD",
+    "HYUNDAI MOTOR INDIA LTD", "MAHINDRA & MAHINDRA LIMITED", "MARUTI SUZUKI INDIA LTD",
+    "TATA MOTORS LTD", "TVS MOTOR COMPANY LTD", "ROYAL-ENFIELD (UNIT OF EICHER LTD)"
+]
+XAXIS_COLUMNS = {
+    "Fuel": ["CNG ONLY", "DIESEL", "ELECTRIC(BOV)", "PETROL", "PETROL/CNG", "PETROL/HYBRID"],
+    "Vehicle Class": ["M-Cycle/Scooter", "Moped", "Motor Car", "Three Wheeler (Passenger)", "Goods Carrier", "Bus"],
+    "Vehicle Category": ["2WN", "2WT", "3WN", "3WT", "LMV", "HGV"],
+    "Norms": ["BHARAT STAGE IV", "BHARAT STAGE VI", "NOT APPLICABLE"],
+}
+
+# Dropdown ids, captions and options; the two j_idt ids are generated on the real portal
+DROPDOWNS = [
+    ("yaxisVar", "Y-Axis", ["Maker", "State", "Vehicle Class", "Fuel", "Norms", "Vehicle Category"]),
+    ("xaxisVar", "X-Axis", ["Fuel", "Vehicle Class", "Vehicle Category", "Norms", "Month Wise"]),
+    ("selectedYearType", "Year Type", ["Calendar Year", "Financial Year"]),
+    ("selectedYear", "Year", [str(y) for y in range(datetime.now().year, 2019, -1)]),
+    ("j_idt36", "Type", ["Actual Value", "In Thousand", "In Lakh", "In Crore"]),
+    ("selectedRto", "RTO", ["All Vahan4 Running Office(59/59)"]),
+    ("j_idt39", "State", ["All Vahan4 Running States (36/36)"] + MOCK_STATES),
+]
+
+# Static assets (banner, logo, web font) answer after this delay, like the portal's slow CDN;
+# the download icon csv.png is served immediately
+ASSET_DELAY = float(os.environ.get("MOCK_ASSET_DELAY", "0.3"))
+
+# Late registrations added to the first maker of every report, to simulate the portal revising
+# published months (MOCK_REVISION=n adds n)
+REVISION = int(os.environ.get("MOCK_REVISION", "0"))
+
+# 1x1 transparent PNG served for csv.png and other images
+PIXEL_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII="
+)
+
+app = Flask(__name__)
+VIEWS = {}
+VIEWS_LOCK = threading.Lock()
+
+def new_view():
+    view = {dropdown_id: options[0] for dropdown_id, _, options in DROPDOWNS}
+    view["table"] = None
+    view["month"] = None
+    token = uuid.uuid4().hex
+    with VIEWS_LOCK:
+        VIEWS[token] = view
+    return token, view
+
+def available_months(year):
+    now = datetime.now()
+    try:
+        year = int(year)
+    except (TypeError, ValueError):
+        return []
+    if year > now.year:
+        return []
+    return MONTHS[:now.month] if year == now.year else list(MONTHS)
+
+def maker_counts(state, year, month, xaxis):
+    """Deterministic registration counts per maker for one state and month, so repeated downloads are identical"""
+    columns = XAXIS_COLUMNS.get(xaxis, XAXIS_COLUMNS["Fuel"])
+    rng = random.Random("|".join([state, str(year), str(month), xaxis]))
+    counts = {}
+    for idx, maker in enumerate(MOCK_MAKERS, 1):
+        counts[maker] = [rng.choice([0, 0, rng.randint(1, 5000)]) for _ in columns]
+        if idx == 1:
+            counts[maker][0] += REVISION
+    return counts
+
+def row_dimension(snapshot):
+    """Y-Axis the mock can lay out: Maker, State, or a category (Fuel, ...) against Month Wise columns"""
+    yaxis = snapshot["yaxisVar"]
+    if yaxis == "State" or (yaxis in XAXIS_COLUMNS and snapshot["xaxisVar"] == "Month Wise"):
+        return yaxis
+    return "Maker"
+
+def table_counts(snapshot, month):
+    """
+    Rows of the report table for the current selection. Every layout is summed from maker_counts, so
+    the pivots agree with each other: "All ... States" sums the states, month "ALL" sums the year's
+    published months, X-Axis "Month Wise" has one column per month and Y-Axis "State" has one row
+    per state. A category Y-Axis (e.g. Fuel) is only laid out against Month Wise columns; other
+    Y-Axis choices are shown by maker.
+    """
+    year, xaxis = snapshot["selectedYear"], snapshot["xaxisVar"]
+    states = [snapshot["j_idt39"]] if snapshot["j_idt39"] in MOCK_STATES else MOCK_STATES
+    months = available_months(year) if month == "ALL" else [month]
+    rows_by = row_dimension(snapshot)
+    if rows_by == "State":
+        labels = states
+    elif rows_by == "Maker":
+        labels = MOCK_MAKERS
+    else:
+        labels = XAXIS_COLUMNS[rows_by]
+    month_wise = xaxis == "Month Wise"
+    columns = months if month_wise else XAXIS_COLUMNS.get(xaxis, XAXIS_COLUMNS["Fuel"])
+    source = rows_by if rows_by in XAXIS_COLUMNS else ("Fuel" if month_wise else xaxis)
+    totals = {label: [0] * len(columns) for label in labels}
+    for state in states:
+        for m_idx, m in enumerate(months):
+            for maker, counts in maker_counts(state, year, m, source).items():
+                if rows_by in XAXIS_COLUMNS:
+                    for label, count in zip(labels, counts):
+                        totals[label][m_idx] += count
+                    continue
+                row = totals[state if rows_by == "State" else maker]
+                if month_wise:
+                    row[m_idx] += sum(counts)
+                else:
+                    for c_idx, count in enumerate(counts):
+                        row[c_idx] += count
+    rows = []
+    for idx, label in enumerate(labels, 1):
+        rows.append([str(idx), label] + [str(c) for c in totals[label]] + [str(sum(totals[label]))])
+    return columns, rows
+
+def render_form_context(token, view):
+    dropdowns = [
+        {"id": dropdown_id, "caption": caption, "options": options, "selected": view[dropdown_id]}
+        for dropdown_id, caption, options in DROPDOWNS
+    ]
+    table = None
+    if view["table"] is not None:
+        snapshot = view["table"]
+        months = available_months(snapshot["selectedYear"])
+        columns, rows = table_counts(snapshot, view["month"] or "ALL")
+        table = {
+            "yaxis": row_dimension(snapshot),
+            "xaxis": snapshot["xaxisVar"],
+            "columns": columns,
+            "rows": rows,
+            "month_dropdown": {"id": MONTH_ID, "options": ["Select Month"] + months, "selected": view["month"] or "Select Month"},
+        }
+    return {
+        "action": REPORT_PATH,
+        "dropdowns": dropdowns,
+        "refresh_id": REFRESH_ID,
+        "table": table,
+        "view_state": token,
+        "resources": RESOURCES_PATH,
+    }
+
+def build_workbook(view):
+    snapshot = view["table"]
+    month = view["month"]
+    columns, rows = table_counts(snapshot, month or "ALL")
+    state = snapshot["j_idt39"].split("(")[0].strip()
+    wb = Workbook()
+    ws = wb.active
+    yaxis = row_dimension(snapshot)
+    ws.append([f"{yaxis} Wise {snapshot['xaxisVar']} Data  of {state} ({month},{snapshot['selectedYear']})"])
+    ws.append(["S No", f"\xa0\xa0{yaxis}\xa0\xa0", snapshot["xaxisVar"] + " "] + [None] * (len(columns) - 1) + ["TOTAL"])
+    ws.append([None] * (len(columns) + 3))
+    ws.append(["", ""] + columns + [""])
+    for row in rows:
+        ws.append(row)
+    last_col = len(columns) + 3
+    ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=last_col)
+    ws.merge_cells(start_row=2, start_column=1, end_row=3, end_column=1)
+    ws.merge_cells(start_row=2, start_column=2, end_row=3, end_column=2)
+    ws.merge_cells(start_row=2, start_column=3, end_row=2, end_column=last_col - 1)
+    ws.merge_cells(start_row=2, start_column=last_col, end_row=3, end_column=last_col)
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+def partial_response(body):
+    xml = f'<?xml version="1.0" encoding="UTF-8"?>\n<partial-response id="j_id1"><changes>{body}</changes></partial-response>'
+    return Response(xml, mimetype="text/xml")
+
+def partial_error(name, message):
+    xml = (f'<?xml version="1.0" encoding="UTF-8"?>\n<partial-response id="j_id1"><error>'
+           f'<error-name>{name}</error-name><error-message>{message}</error-message></error></partial-response>')
+    return Response(xml, mimetype="text/xml")
+
+@app.route(REPORT_PATH, methods=["GET"])
+def report_page():
+    token, view = new_view()
+    return render_template("mock_reportview.html", **render_form_context(token, view))
+
+@app.route(REPORT_PATH, methods=["POST"])
+def report_postback():
+    token = request.form.get("javax.faces.ViewState")
+    with VIEWS_LOCK:
+        view = VIEWS.get(token)
+    is_ajax = request.form.get("javax.faces.partial.ajax") == "true"
+    if view is None:
+        if is_ajax:
+            return partial_error("javax.faces.application.ViewExpiredException", "View expired")
+        return "View expired", 410
+
+    for dropdown_id, _, options in DROPDOWNS:
+        value = request.form.get(dropdown_id + "_input")
+        if value in options:
+            view[dropdown_id] = value
+
+    if is_ajax:
+        source = request.form.get("javax.faces.source")
+        if source == REFRESH_ID:
+            view["table"] = {dropdown_id: view[dropdown_id] for dropdown_id, _, _ in DROPDOWNS}
+            view["month"] = None
+        elif source == MONTH_ID and view["table"] is not None:
+            month = request.form.get(MONTH_ID + "_input")
+            view["month"] = month if month in available_months(view["table"]["selectedYear"]) else None
+        form_html = render_template("mock_reportview_form.html", **render_form_context(token, view))
+        return partial_response(
+            f'<update id="{FORM_ID}"><![CDATA[{form_html}]]></update>'
+            f'<update id="j_id1:javax.faces.ViewState:0"><![CDATA[{token}]]></update>'
+        )
+
+    if XLS_ID in request.form:
+        if view["table"] is None:
+            return render_template("mock_reportview.html", **render_form_context(token, view))
+        return send_file(
+            build_workbook(view), as_attachment=True, download_name="reportTable.xlsx",
+            mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
+    return render_template("mock_reportview.html", **render_form_context(token, view))
+
+@app.route(RESOURCES_PATH + "/images/<path:name>")
+def resource_image(name):
+    if name != "csv.png":
+        time.sleep(ASSET_DELAY)
+    return Response(PIXEL_PNG, mimetype="image/png")
+
+@app.route(RESOURCES_PATH + "/fonts/<path:name>")
+def resource_font(name):
+    time.sleep(ASSET_DELAY)
+    return Response(b"", mimetype="font/woff")
+
+def start_mock_server(host="127.0.0.1", port=0):
+    """Start the mock server in a background thread. Returns (server, report_url)."""
+    from werkzeug.serving import make_server
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server(host, port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}{REPORT_PATH}"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline mock of the VAHAN report page")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5050)
+    args = parser.parse_args()
+    print(f"[INFO] Mock VAHAN report page at http://{args.host}:{args.port}{REPORT_PATH}")
+    print(f"[INFO] Point the automation at it with: set VAHAN_URL=http://{args.host}:{args.port}{REPORT_PATH}")
+    app.run(host=args.host, port=args.port, threaded=True)
@@ -0,0 +1,119 @@
+import os
+import json
+import threading
+from datetime import datetime, timedelta, date
+from calendar import month_abbr
+
+# Valid dropdown options (years, states, months per state and year) as last read from the portal,
+# keyed by the filter context they were read in, so runs can plan without opening the dropdowns
+OPTION_CATALOGUE_FILE = os.environ.get("VAHAN_CATALOGUE_FILE", os.path.join(os.getcwd(), "option_catalogue.json"))
+CATALOGUE_TTL_HOURS = float(os.environ.get("VAHAN_CATALOGUE_TTL_HOURS", "24"))
+
+# Filter values each kind of list depends on; the month list also depends on the task's year and state
+CONTEXT_KEYS = {
+    "years": ("year_type",),
+    "states": ("type", "year_type", "year"),
+    "months": ("type", "year_type", "year", "state"),
+}
+
+MONTH_NUMBER = {m.upper(): i for i, m in enumerate(month_abbr) if m}
+
+_lock = threading.Lock()
+_catalogue = None
+
+def _key(kind, context):
+    return "|".join([kind] + [f"{k}={context.get(k)}" for k in CONTEXT_KEYS[kind]])
+
+def _expired(kind, context, entry, now=None):
+    now = now or datetime.now()
+    cached_at = datetime.fromisoformat(entry["cached_at"])
+    # The month list of a past year no longer changes, but only if it was read after that year ended
+    # (or is already complete); a list cached during the year is still missing its later months
+    year = str(context.get("year", ""))
+    if kind == "months" and year.isdigit() and int(year) < now.year \
+            and (cached_at >= datetime(int(year) + 1, 1, 1) or len(entry["options"]) >= 12):
+        return False
+    return now - cached_at > timedelta(hours=CATALOGUE_TTL_HOURS)
+
+def _load_catalogue():
+    """Load the catalogue file once, dropping expired entries"""
+    global _catalogue
+    if _catalogue is None:
+        _catalogue = {}
+        if os.path.exists(OPTION_CATALOGUE_FILE):
+            try:
+                with open(OPTION_CATALOGUE_FILE, "r", encoding="utf-8") as f:
+                    _catalogue = json.load(f)
+            except Exception as e:
+                print(f"[WARN] Could not read option catalogue {OPTION_CATALOGUE_FILE}: {e}")
+    for key in [k for k, entry in _catalogue.items() if _expired(entry["kind"], entry["context"], entry)]:
+        del _catalogue[key]
+    return _catalogue
+
+def _save_catalogue():
+    try:
+        tmp_file = OPTION_CATALOGUE_FILE + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(_catalogue, f, indent=2)
+        os.replace(tmp_file, OPTION_CATALOGUE_FILE)
+    except Exception as e:
+        print(f"[WARN] Could not write option catalogue {OPTION_CATALOGUE_FILE}: {e}")
+
+def cached_options(kind, context):
+    """The cached option list ("years", "states" or "months") for a filter context, or None"""
+    with _lock:
+        entry = _load_catalogue().get(_key(kind, context))
+    return list(entry["options"]) if entry else None
+
+def remember_options(kind, context, options):
+    """Store an option list read from the page; empty lists are not cached"""
+    if not options:
+        return
+    with _lock:
+        catalogue = _load_catalogue()
+        context = {k: context.get(k) for k in CONTEXT_KEYS[kind]}
+        catalogue[_key(kind, context)] = {
+            "kind": kind, "context": context, "options": list(options),
+            "cached_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        _save_catalogue()
+
+def forget_options(kind, context):
+    """Drop a cached list, e.g. after selecting one of its options failed"""
+    with _lock:
+        catalogue = _load_catalogue()
+        key = _key(kind, context)
+        if key in catalogue:
+            del catalogue[key]
+            _save_catalogue()
+            print(f"[DEBUG] Dropped cached {kind} list for {context}")
+
+def task_context(filter_keys, task):
+    """Filter context of a task: the global dropdown values plus the task's year and state"""
+    combo, state, year, _ = task
+    context = dict(zip(filter_keys, combo))
+    context["year"] = str(year)
+    context["state"] = state
+    return context
+
+def filter_tasks(tasks, filter_keys, today=None):
+    """
+    Drop tasks that cannot be downloaded without touching the browser: months after the current
+    one, years the Year dropdown does not offer and months missing from a cached month list.
+    Returns (kept, dropped).
+    """
+    today = today or date.today()
+    kept, dropped = [], []
+    for task in tasks:
+        _, _, year, month = task
+        context = task_context(filter_keys, task)
+        number = MONTH_NUMBER.get(str(month).upper())
+        years = cached_options("years", context)
+        months = cached_options("months", context)
+        if (number and (int(year), number) > (today.year, today.month)) \
+                or (years is not None and str(year) not in years) \
+                or (number and months is not None and str(month).upper() not in months):
+            dropped.append(task)
+        else:
+            kept.append(task)
+    return kept, dropped
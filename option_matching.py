@@ -0,0 +1,26 @@
+# Which dropdown option a configured value picks. Shared by the Selenium backend (dropdown_snapshot)
+# and the HTTP backend (vahan_http_client), so both select the same option for the same prompt.txt.
+
+def match_option(options, key, item_text):
+    """
+    The first of `options` ({'text': ...} dicts) that `item_text` picks for dropdown `key`:
+    State is exact, Month is a prefix, RTO always picks 'All Vahan4 Running Office' and the other
+    dropdowns match a substring either way. None if no option matches.
+    """
+    target = str(item_text).strip().lower()
+    for opt in options:
+        text = opt["text"].strip().lower()
+        if not text:
+            continue
+        if key == "rto":
+            if "all vahan4 running office" in text:
+                return opt
+        elif key == "month":
+            if text.startswith(target):
+                return opt
+        elif key == "state":
+            if text == target:
+                return opt
+        elif target in text or text in target:
+            return opt
+    return None
@@ -0,0 +1,64 @@
+import os
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException, WebDriverException
+
+# Upper bound for a single wait; override with the VAHAN_AJAX_TIMEOUT environment variable
+AJAX_IDLE_TIMEOUT = float(os.environ.get("VAHAN_AJAX_TIMEOUT", "15"))
+POLL_INTERVAL = 0.05
+
+# True when the document is loaded, no jQuery/PrimeFaces AJAX request is pending,
+# no block-UI overlay is visible and no jQuery animation (panel slide/fade) is running.
+PAGE_IDLE_JS = """
+if (document.readyState !== 'complete') { return false; }
+var $ = window.jQuery;
+if ($ && $.active > 0) { return false; }
+var pf = window.PrimeFaces;
+if (pf && pf.ajax && pf.ajax.Queue && pf.ajax.Queue.isEmpty && !pf.ajax.Queue.isEmpty()) { return false; }
+var blockers = document.querySelectorAll('.ui-blockui, .ui-widget-overlay');
+for (var i = 0; i < blockers.length; i++) {
+    var style = window.getComputedStyle(blockers[i]);
+    if (style.display !== 'none' && style.visibility !== 'hidden' && blockers[i].getClientRects().length > 0) { return false; }
+}
+if ($ && $(':animated').length > 0) { return false; }
+return true;
+"""
+
+def is_page_idle(driver):
+    """Single check of the page idle condition"""
+    return bool(driver.execute_script(PAGE_IDLE_JS))
+
+def wait_for_page_idle(driver, timeout=None, component_id=None, stale_element=None, condition=None):
+    """
+    Block until the page is quiet instead of sleeping for a fixed time.
+    Optionally also waits for `stale_element` to be replaced (component re-rendered),
+    for the element with `component_id` to be present, and for an extra `condition(driver)`.
+    Returns True when the page went idle, False on timeout.
+    """
+    timeout = AJAX_IDLE_TIMEOUT if timeout is None else timeout
+    rerendered = [stale_element is None]
+
+    def _quiet(d):
+        if not rerendered[0]:
+            try:
+                stale_element.is_enabled()
+                return False
+            except StaleElementReferenceException:
+                rerendered[0] = True
+        if not is_page_idle(d):
+            return False
+        if component_id and not d.find_elements(By.ID, component_id):
+            return False
+        if condition is not None and not condition(d):
+            return False
+        return True
+
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(_quiet)
+        return True
+    except TimeoutException:
+        print(f"[WARN] Page did not become idle within {timeout}s")
+        return False
+    except WebDriverException as e:
+        print(f"[WARN] Page idle check failed: {str(e).split('Stacktrace:')[0]}")
+        return False
@@ -0,0 +1,103 @@
+import os
+import json
+import hashlib
+from datetime import datetime
+import pandas as pd
+
+# Parsed reports of combine_all_vahan_data.py, one Parquet fragment per source file, so a
+# re-combine only parses files that are new or changed. manifest.json maps each source path to
+# its size, mtime, content hash and fragment; fragments are named by content hash, so a file
+# that was only touched or copied is not parsed again.
+PARSE_CACHE_DIR = os.environ.get("VAHAN_PARSE_CACHE", os.path.join(os.getcwd(), "parse_cache"))
+MANIFEST_NAME = "manifest.json"
+# Bump when the report readers change, so fragments written by an older reader are re-parsed
+PARSE_CACHE_VERSION = 3
+
+def file_hash(file_path):
+    """SHA-256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ParseCache:
+    """Manifest of parsed source files and their cached fragments; used from the combining process only"""
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or PARSE_CACHE_DIR
+        self.manifest_path = os.path.join(self.cache_dir, MANIFEST_NAME)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.manifest = {}
+        if os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path, "r", encoding="utf-8") as f:
+                    self.manifest = json.load(f)
+            except Exception as e:
+                print(f"[WARN] Could not read parse cache manifest {self.manifest_path}, starting empty: {e}")
+        self.stats = {"hits": 0, "parsed": 0, "evicted": 0}
+
+    def _fragment_path(self, entry):
+        return os.path.join(self.cache_dir, entry["fragment"])
+
+    def lookup(self, file_path):
+        """The cached frame of a source file, or None when it is new, changed or its fragment is missing"""
+        key = os.path.abspath(file_path)
+        entry = self.manifest.get(key)
+        if not entry or entry.get("version") != PARSE_CACHE_VERSION:
+            return None
+        st = os.stat(file_path)
+        if (st.st_size, st.st_mtime_ns) != (entry["size"], entry["mtime_ns"]):
+            # Touched or re-downloaded: only the bytes decide whether it changed
+            if file_hash(file_path) != entry["sha256"]:
+                return None
+            entry["size"], entry["mtime_ns"] = st.st_size, st.st_mtime_ns
+        try:
+            df = pd.read_parquet(self._fragment_path(entry))
+        except Exception as e:
+            print(f"[WARN] Cached fragment for {file_path} is unreadable, parsing again: {e}")
+            return None
+        self.stats["hits"] += 1
+        return df
+
+    def store(self, file_path, df):
+        """Write the parsed frame of a source file as a fragment and record it in the manifest"""
+        st = os.stat(file_path)
+        sha = file_hash(file_path)
+        fragment = f"{sha[:32]}_v{PARSE_CACHE_VERSION}.parquet"
+        try:
+            df.to_parquet(os.path.join(self.cache_dir, fragment), index=False)
+        except Exception as e:
+            print(f"[WARN] Could not cache {file_path}: {e}")
+            return
+        self.manifest[os.path.abspath(file_path)] = {
+            "size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": sha, "fragment": fragment,
+            "version": PARSE_CACHE_VERSION, "parsed_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        self.stats["parsed"] += 1
+
+    def evict_missing(self):
+        """Drop entries whose source file is gone and delete fragments no entry refers to"""
+        for key in [k for k in self.manifest if not os.path.exists(k)]:
+            del self.manifest[key]
+            self.stats["evicted"] += 1
+        referenced = {entry["fragment"] for entry in self.manifest.values()}
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".parquet") and name not in referenced:
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError as e:
+                    print(f"[WARN] Could not remove cached fragment {name}: {e}")
+
+    def clear(self):
+        """Forget every entry (the fragments are deleted by the next evict_missing)"""
+        self.manifest = {}
+
+    def save(self):
+        tmp_file = self.manifest_path + ".tmp"
+        try:
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(self.manifest, f, indent=1)
+            os.replace(tmp_file, self.manifest_path)
+        except Exception as e:
+            print(f"[WARN] Could not write parse cache manifest {self.manifest_path}: {e}")
@@ -0,0 +1,102 @@
+import re
+from itertools import product
+from calendar import month_abbr
+from crawl_planner import WHOLE_YEAR
+
+# Dataset dimensions and how the dashboard can produce them. A report table has one dimension on
+# its rows (Y-Axis) and one on its columns (X-Axis; "Month Wise" puts the months of the selected
+# year in the columns). State and Month can also be fixed one value at a time through the State
+# and month dropdowns; the year is always fixed through the Year dropdown.
+YAXIS_DIMENSIONS = ["Maker", "State", "Vehicle Class", "Fuel", "Norms", "Vehicle Category"]
+XAXIS_DIMENSIONS = ["Fuel", "Vehicle Class", "Vehicle Category", "Norms", "Month"]
+XAXIS_OPTIONS = {"Month": "Month Wise"}
+DROPDOWN_DIMENSIONS = ("State", "Month")
+
+MONTH_INDEX = {m.upper(): i for i, m in enumerate(month_abbr) if m}
+
+def parse_dataset(text):
+    """'Maker x Fuel x State x Month' or 'Maker, Fuel, State, Month' -> ['Maker', 'Fuel', 'State', 'Month']"""
+    names = {d.lower().replace(" ", ""): d for d in YAXIS_DIMENSIONS + XAXIS_DIMENSIONS}
+    dimensions = []
+    for part in re.split(r"\s+x\s+|[,×*]", text if isinstance(text, str) else ",".join(text)):
+        key = part.strip().lower().replace(" ", "").replace("monthwise", "month")
+        if not key:
+            continue
+        if key not in names:
+            raise ValueError(f"Unknown dataset dimension '{part.strip()}'")
+        if names[key] not in dimensions:
+            dimensions.append(names[key])
+    return dimensions
+
+def plan_layouts(dimensions, n_states, n_months, n_years, whole_years=True):
+    """
+    Every dashboard layout that can produce the dataset, cheapest first, as dicts with 'yaxis' and
+    'xaxis' (dropdown texts), 'per_state'/'per_month' (whether the State/month dropdowns are
+    iterated), 'downloads' and 'aggregated' (table dimensions summed away).
+    Without whole_years the months are resolved even if the dataset does not ask for them, so
+    months outside the range can be dropped before summing.
+    """
+    if not whole_years and "Month" not in dimensions:
+        dimensions = list(dimensions) + ["Month"]
+    layouts = []
+    for y, x in product(YAXIS_DIMENSIONS, XAXIS_DIMENSIONS):
+        table = {y, x}
+        if y == x or any(d not in table and d not in DROPDOWN_DIMENSIONS for d in dimensions):
+            continue
+        per_state = "State" in dimensions and "State" not in table
+        per_month = "Month" in dimensions and "Month" not in table
+        downloads = (n_states if per_state else 1) * (n_months if per_month else n_years)
+        layouts.append({
+            "yaxis": y, "xaxis": XAXIS_OPTIONS.get(x, x), "dimensions": (y, x),
+            "per_state": per_state, "per_month": per_month, "downloads": downloads,
+            "aggregated": sorted(table - set(dimensions)),
+        })
+    # Fewest downloads; among equals, the table that sums away least (smaller files, exact counts)
+    layouts.sort(key=lambda l: (l["downloads"], len(l["aggregated"])))
+    return layouts
+
+def layout_for_axes(yaxis, xaxis):
+    """The layout dict of a Y-Axis/X-Axis dropdown pair, enough for reshape()"""
+    x_dim = next((d for d, option in XAXIS_OPTIONS.items() if option == xaxis), xaxis)
+    return {"yaxis": yaxis, "xaxis": xaxis, "dimensions": (yaxis, x_dim)}
+
+def clean_state(name):
+    """State name without the RTO count the dropdown adds, e.g. 'Assam(33)' -> 'Assam'"""
+    return re.sub(r"\s*\(\d+(/\d+)?\)\s*$", "", str(name)).strip()
+
+def yyyymm(year, month):
+    return f"{int(year)}{MONTH_INDEX[str(month).upper()[:3]]:02d}"
+
+def reshape(cells, layout, dimensions, task, months=None):
+    """
+    Turn one report ({(row label, column label): count}, see vahan_workbook.read_report) downloaded
+    with `layout` for `task` into canonical long records {dimension values tuple: count}. The
+    values follow `dimensions`, with Month as YYYYMM; without Month a Year value is appended.
+    Dimensions the dataset does not ask for are summed away; zero counts are left out. `months`
+    (a set of YYYYMM) drops months outside the requested range, e.g. from a Month Wise table.
+    """
+    _, state, year, month = task
+    row_dim, col_dim = layout["dimensions"]
+    records = {}
+    for (row, column), count in cells.items():
+        if not count:
+            continue
+        values = {row_dim: row, col_dim: column}
+        if col_dim == "Month":
+            if str(column).upper()[:3] not in MONTH_INDEX:
+                continue
+            values["Month"] = yyyymm(year, column)
+        elif "Month" not in values and month != WHOLE_YEAR:
+            values["Month"] = yyyymm(year, month)
+        if months is not None and "Month" in values and values["Month"] not in months:
+            continue
+        values.setdefault("State", state)
+        values["State"] = clean_state(values["State"])
+        key = tuple(values[d] for d in dimensions)
+        if "Month" not in dimensions:
+            key += (int(year),)
+        records[key] = records.get(key, 0) + count
+    return records
+
+def dataset_columns(dimensions):
+    return list(dimensions) + ([] if "Month" in dimensions else ["Year"]) + ["Count"]
@@ -0,0 +1,167 @@
+import os
+import time
+import threading
+from step_metrics import _quantile
+
+# Latency above which a portal request counts as a sign of overload (seconds). Each is one
+# postback including the wait for the page to go idle; a Refresh re-renders the whole report
+# table (page_idle waits up to VAHAN_AJAX_TIMEOUT, 15s, for it), so its target is above that.
+LATENCY_TARGETS = {
+    "select": float(os.environ.get("VAHAN_SELECT_TARGET", "5")),
+    "refresh": float(os.environ.get("VAHAN_REFRESH_TARGET", "20")),
+    "download": float(os.environ.get("VAHAN_DOWNLOAD_TARGET", "15")),
+}
+DEFAULT_LATENCY_TARGET = 10.0
+# Pacing between task starts across all workers (seconds)
+MIN_INTERVAL = float(os.environ.get("VAHAN_MIN_INTERVAL", "0"))
+MAX_INTERVAL = 30.0
+INTERVAL_STEP = 0.5
+# Multiplicative decreases are applied at most once per window, so one burst of errors halves once
+DECREASE_WINDOW = 5.0
+# Consecutive failures that open the circuit breaker, and how long it stays open (doubling per trip)
+BREAKER_THRESHOLD = int(os.environ.get("VAHAN_BREAKER_THRESHOLD", "5"))
+BREAKER_COOLDOWN = float(os.environ.get("VAHAN_BREAKER_COOLDOWN", "30"))
+BREAKER_MAX_COOLDOWN = 300.0
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+class AdaptiveController:
+    """
+    AIMD gate between the crawl loop and the workers. A worker calls acquire() before a task and
+    release() after it; every portal request of the task (dropdown postback, refresh, download)
+    reports its latency and result through observe().
+    The number of workers allowed to run at once grows by one per round of fast successes and
+    halves on errors or slow responses; the pause between task starts moves the opposite way.
+    After BREAKER_THRESHOLD consecutive failures the breaker opens and every worker waits out
+    the cooldown, then a single probe task decides whether to close it again.
+    """
+
+    def __init__(self, max_workers, start_workers=1, min_interval=MIN_INTERVAL, clock=time.monotonic):
+        self.max_workers = max(1, max_workers)
+        self.limit = max(1, min(start_workers, self.max_workers))
+        self.min_interval = min_interval
+        self.clock = clock
+        self.interval = min_interval
+        self.active = 0
+        self.next_start = 0.0
+        self.breaker = CLOSED
+        self.open_until = 0.0
+        self.cooldown = BREAKER_COOLDOWN
+        self.consecutive_failures = 0
+        self.round_successes = 0
+        self.last_decrease = 0.0
+        self.stats = {"requests": 0, "errors": 0, "slow": 0, "breaker_trips": 0, "peak_limit": self.limit}
+        self.latency = {}
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Block until this worker may start a task"""
+        with self._cond:
+            while True:
+                now = self.clock()
+                if self.breaker == OPEN and now >= self.open_until:
+                    self.breaker = HALF_OPEN
+                    print("[INFO] Circuit breaker half-open, sending a probe request")
+                if self.breaker == OPEN:
+                    wait = self.open_until - now
+                elif self.breaker == HALF_OPEN and self.active > 0:
+                    wait = 1.0
+                elif self.active >= self.limit:
+                    wait = 1.0
+                elif now < self.next_start:
+                    wait = self.next_start - now
+                else:
+                    self.active += 1
+                    self.next_start = now + self.interval
+                    return
+                self._cond.wait(timeout=wait)
+
+    def release(self):
+        """Finish a task and let a waiting worker start"""
+        with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+    def observe(self, kind, seconds, ok):
+        """Record one portal request (select, refresh or download) and adjust the limits"""
+        with self._cond:
+            now = self.clock()
+            self.stats["requests"] += 1
+            samples = self.latency.setdefault(kind, [])
+            samples.append(seconds)
+            if not ok:
+                self.stats["errors"] += 1
+                self._failure(now)
+            elif seconds > LATENCY_TARGETS.get(kind, DEFAULT_LATENCY_TARGET):
+                self.stats["slow"] += 1
+                self.consecutive_failures = 0
+                self._decrease(now, f"slow {kind} ({seconds:.1f}s)")
+            else:
+                self._success()
+            self._cond.notify_all()
+
+    def timed(self, kind, action):
+        """Wrap a single portal request so its latency and result are reported with observe()"""
+        def run(*args, **kwargs):
+            started = self.clock()
+            result = action(*args, **kwargs)
+            self.observe(kind, self.clock() - started, bool(result))
+            return result
+        return run
+
+    def _success(self):
+        self.consecutive_failures = 0
+        if self.breaker == HALF_OPEN:
+            self.breaker = CLOSED
+            self.cooldown = BREAKER_COOLDOWN
+            print("[INFO] Circuit breaker closed, portal is responding again")
+        self.round_successes += 1
+        if self.round_successes >= self.limit:
+            self.round_successes = 0
+            if self.limit < self.max_workers:
+                self.limit += 1
+                self.stats["peak_limit"] = max(self.stats["peak_limit"], self.limit)
+                print(f"[INFO] Portal responding well, allowing {self.limit} concurrent workers")
+            self.interval = max(self.min_interval, self.interval - INTERVAL_STEP)
+
+    def _failure(self, now):
+        self.consecutive_failures += 1
+        if self.breaker == HALF_OPEN or self.consecutive_failures >= BREAKER_THRESHOLD:
+            self._open_breaker(now)
+        else:
+            self._decrease(now, "request failed")
+
+    def _decrease(self, now, reason):
+        self.round_successes = 0
+        if now - self.last_decrease < DECREASE_WINDOW:
+            return
+        self.last_decrease = now
+        self.limit = max(1, self.limit // 2)
+        self.interval = min(MAX_INTERVAL, max(self.interval * 2, INTERVAL_STEP))
+        print(f"[WARN] Backing off after {reason}: {self.limit} concurrent workers, {self.interval:.1f}s between tasks")
+
+    def _open_breaker(self, now):
+        if self.breaker == HALF_OPEN:
+            self.cooldown = min(BREAKER_MAX_COOLDOWN, self.cooldown * 2)
+        self.breaker = OPEN
+        self.open_until = now + self.cooldown
+        self.consecutive_failures = 0
+        self.stats["breaker_trips"] += 1
+        self.limit = 1
+        self.interval = min(MAX_INTERVAL, max(self.interval * 2, INTERVAL_STEP))
+        print(f"[WARN] Portal looks unavailable, circuit breaker open for {self.cooldown:.0f}s")
+
+    def report(self):
+        """Request counts, latency percentiles per request kind and the final limits"""
+        with self._cond:
+            latency = {}
+            for kind, samples in self.latency.items():
+                ordered = sorted(samples)
+                latency[kind] = {
+                    "count": len(ordered),
+                    "p50_s": round(_quantile(ordered, 0.5), 3),
+                    "p95_s": round(_quantile(ordered, 0.95), 3),
+                    "max_s": round(ordered[-1], 3),
+                }
+            return dict(self.stats, latency=latency, final_limit=self.limit,
+                        final_interval_s=round(self.interval, 2), breaker=self.breaker)
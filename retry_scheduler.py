@@ -0,0 +1,67 @@
+import os
+import time
+import heapq
+import random
+from collections import deque
+
+# Failure classes: a UI step that did not take (overlay, slow AJAX, stale element), a browser or
+# JSF session that died, and a month the portal does not offer (yet), which is never retried
+TRANSIENT_UI, SESSION_LOST, MONTH_UNAVAILABLE = "transient_ui", "session_lost", "month_unavailable"
+
+MAX_ATTEMPTS = int(os.environ.get("VAHAN_MAX_ATTEMPTS", "3"))
+BACKOFF_BASE = float(os.environ.get("VAHAN_RETRY_BACKOFF", "2"))
+BACKOFF_MAX = 60.0
+
+def classify_failure(reason, session_alive=True):
+    """Map a task failure reason ("month_unavailable", "failed:<step>", "download") to a failure class"""
+    if reason == "month_unavailable":
+        return MONTH_UNAVAILABLE
+    if not session_alive:
+        return SESSION_LOST
+    return TRANSIENT_UI
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """Exponential backoff with jitter: half of base * 2^(attempt-1) fixed, the other half random"""
+    delay = min(cap, base * 2 ** (attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+class RetryScheduler:
+    """
+    Task queue of one worker. Planned tasks come out in plan order; a failed task is re-queued
+    with backoff and comes out as soon as it is due, ahead of the remaining planned tasks, so it
+    is retried close to where it failed (usually the same state) rather than at the end of the
+    shard. Only when no planned task is left does the worker sleep until the next retry.
+    """
+
+    def __init__(self, tasks, max_attempts=MAX_ATTEMPTS, clock=time.monotonic, sleep=time.sleep):
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self.sleep = sleep
+        self._planned = deque(tasks)
+        self._retries = []
+        self._seq = 0
+
+    def __len__(self):
+        return len(self._planned) + len(self._retries)
+
+    def next(self):
+        """Return the next (task, attempt): a due retry, else the next planned task, else the earliest retry"""
+        if self._retries and (self._retries[0][0] <= self.clock() or not self._planned):
+            ready_at, _, task, attempt = heapq.heappop(self._retries)
+            wait = ready_at - self.clock()
+            if wait > 0:
+                print(f"[INFO] Waiting {wait:.1f}s before retrying {task[1]} - {task[3]} {task[2]}")
+                self.sleep(wait)
+            return task, attempt
+        return self._planned.popleft(), 1
+
+    def retry(self, task, attempt, failure_class):
+        """Re-queue a failed task. Returns False when it must not be retried (out of attempts or month unavailable)."""
+        if failure_class == MONTH_UNAVAILABLE or attempt >= self.max_attempts:
+            return False
+        delay = backoff_delay(attempt)
+        heapq.heappush(self._retries, (self.clock() + delay, self._seq, task, attempt + 1))
+        self._seq += 1
+        print(f"[INFO] Re-queued {task[1]} - {task[3]} {task[2]} ({failure_class}), "
+              f"attempt {attempt + 1}/{self.max_attempts} in {delay:.1f}s")
+        return True
@@ -1,4 +1,4 @@
 @echo off
 python main.py --run-now
-python combine_all_vahan_data.py
+python combine_all_vahan_data.py --export
 pause 
\ No newline at end of file
@@ -0,0 +1,217 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from datetime import datetime
+
+# One row per run and one row per (combo, state, year, month) task, committed after every change,
+# so an interrupted run can be resumed in place with `main.py --resume <run-id>`
+JOURNAL_DB = os.environ.get("VAHAN_JOURNAL_DB", os.path.join(os.getcwd(), "run_journal.db"))
+
+# Task statuses; only "done" tasks are skipped on resume
+PENDING, RUNNING, DONE, FAILED, SKIPPED = "pending", "running", "done", "failed", "skipped"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    output_dir TEXT NOT NULL,
+    filters TEXT NOT NULL,
+    backend TEXT,
+    status TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    metrics TEXT
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    run_id TEXT NOT NULL,
+    combo TEXT NOT NULL,
+    state TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    month TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    file_path TEXT,
+    error TEXT,
+    started_at TEXT,
+    finished_at TEXT,
+    duration REAL,
+    PRIMARY KEY (run_id, combo, state, year, month)
+);
+CREATE TABLE IF NOT EXISTS dead_letters (
+    run_id TEXT NOT NULL,
+    combo TEXT NOT NULL,
+    state TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    month TEXT NOT NULL,
+    failure_class TEXT NOT NULL,
+    error TEXT,
+    attempts INTEGER NOT NULL,
+    failed_at TEXT NOT NULL,
+    PRIMARY KEY (run_id, combo, state, year, month)
+);
+"""
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+def _task_key(task):
+    combo, state, year, month = task
+    return json.dumps(list(combo)), state, int(year), month
+
+class RunJournal:
+    """SQLite journal of one scraping run; safe to share between worker threads"""
+
+    def __init__(self, run_id, db_path=None):
+        self.run_id = run_id
+        self.db_path = db_path or JOURNAL_DB
+        self._lock = threading.Lock()
+        self._started = {}
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        # Journals created before run metrics were recorded lack the column
+        if "metrics" not in [row[1] for row in self._conn.execute("PRAGMA table_info(runs)")]:
+            self._conn.execute("ALTER TABLE runs ADD COLUMN metrics TEXT")
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def get_run(self):
+        """The run's row as a dict (filters decoded), or None if the run id is unknown"""
+        rows = self._execute(
+            "SELECT output_dir, filters, backend, status, started_at, finished_at FROM runs WHERE run_id = ?",
+            (self.run_id,)
+        )
+        if not rows:
+            return None
+        output_dir, filters, backend, status, started_at, finished_at = rows[0]
+        return {
+            "run_id": self.run_id, "output_dir": output_dir, "filters": json.loads(filters),
+            "backend": backend, "status": status, "started_at": started_at, "finished_at": finished_at,
+        }
+
+    def start_run(self, output_dir, filters, backend):
+        """Record a new run, or mark an existing one as running again when it is resumed"""
+        self._execute(
+            "INSERT INTO runs (run_id, output_dir, filters, backend, status, started_at) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(run_id) DO UPDATE SET status = excluded.status, finished_at = NULL",
+            (self.run_id, output_dir, json.dumps(filters), backend, RUNNING, _now())
+        )
+
+    def set_filters(self, filters):
+        """Replace the run's stored filters, e.g. once the dashboard layout has been planned"""
+        self._execute("UPDATE runs SET filters = ? WHERE run_id = ?", (json.dumps(filters), self.run_id))
+
+    def record_metrics(self, metrics):
+        """Merge run-level metrics (e.g. browser session start-up times) into the run's row"""
+        rows = self._execute("SELECT metrics FROM runs WHERE run_id = ?", (self.run_id,))
+        merged = json.loads(rows[0][0]) if rows and rows[0][0] else {}
+        merged.update(metrics)
+        self._execute("UPDATE runs SET metrics = ? WHERE run_id = ?", (json.dumps(merged), self.run_id))
+
+    def finish_run(self):
+        self._execute("UPDATE runs SET status = ?, finished_at = ? WHERE run_id = ?", (DONE, _now(), self.run_id))
+
+    def add_tasks(self, tasks):
+        """Register tasks; tasks already in the journal keep their status"""
+        rows = [(self.run_id,) + _task_key(task) + (PENDING,) for task in tasks]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO tasks (run_id, combo, state, year, month, status) VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            self._conn.execute("COMMIT")
+
+    def pending_tasks(self):
+        """Every task of the run that is not done, in registration order"""
+        rows = self._execute(
+            "SELECT combo, state, year, month FROM tasks WHERE run_id = ? AND status != ? ORDER BY rowid",
+            (self.run_id, DONE)
+        )
+        return [(tuple(json.loads(combo)), state, year, month) for combo, state, year, month in rows]
+
+    def done_tasks(self):
+        """Every finished task of the run as (task, file_path), in registration order"""
+        rows = self._execute(
+            "SELECT combo, state, year, month, file_path FROM tasks WHERE run_id = ? AND status = ? ORDER BY rowid",
+            (self.run_id, DONE)
+        )
+        return [((tuple(json.loads(combo)), state, year, month), file_path)
+                for combo, state, year, month, file_path in rows]
+
+    def fetched_tasks(self):
+        """Tasks downloaded in this run as (task, file_path, finished_at); reused files have no attempts and are left out"""
+        rows = self._execute(
+            "SELECT combo, state, year, month, file_path, finished_at FROM tasks "
+            "WHERE run_id = ? AND status = ? AND attempts > 0 ORDER BY rowid",
+            (self.run_id, DONE)
+        )
+        return [((tuple(json.loads(combo)), state, year, month), file_path, finished_at)
+                for combo, state, year, month, file_path, finished_at in rows]
+
+    def task_started(self, task):
+        with self._lock:
+            self._started[_task_key(task)] = time.monotonic()
+        self._execute(
+            "UPDATE tasks SET status = ?, attempts = attempts + 1, started_at = ?, error = NULL "
+            "WHERE run_id = ? AND combo = ? AND state = ? AND year = ? AND month = ?",
+            (RUNNING, _now(), self.run_id) + _task_key(task)
+        )
+
+    def _task_finished(self, task, status, file_path=None, error=None):
+        with self._lock:
+            started = self._started.pop(_task_key(task), None)
+        duration = round(time.monotonic() - started, 3) if started is not None else None
+        self._execute(
+            "UPDATE tasks SET status = ?, file_path = COALESCE(?, file_path), error = ?, finished_at = ?, duration = ? "
+            "WHERE run_id = ? AND combo = ? AND state = ? AND year = ? AND month = ?",
+            (status, file_path, error, _now(), duration, self.run_id) + _task_key(task)
+        )
+
+    def task_done(self, task, file_path):
+        self._task_finished(task, DONE, file_path=file_path)
+        # A resumed run may succeed where an earlier attempt was given up on
+        self._execute(
+            "DELETE FROM dead_letters WHERE run_id = ? AND combo = ? AND state = ? AND year = ? AND month = ?",
+            (self.run_id,) + _task_key(task)
+        )
+
+    def task_failed(self, task, error):
+        self._task_finished(task, FAILED, error=error)
+
+    def task_skipped(self, task, reason):
+        """The task could not run (e.g. month not published yet); it is retried on resume"""
+        self._task_finished(task, SKIPPED, error=reason)
+
+    def dead_letter(self, task, failure_class, error, attempts):
+        """Give up on a task: mark it failed and keep it in the dead-letter table for the run summary and --resume"""
+        self._task_finished(task, FAILED, error=error)
+        self._execute(
+            "INSERT OR REPLACE INTO dead_letters (run_id, combo, state, year, month, failure_class, error, attempts, failed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (self.run_id,) + _task_key(task) + (failure_class, error, attempts, _now())
+        )
+
+    def dead_letters(self):
+        """Tasks given up on in this run as dicts, oldest first"""
+        rows = self._execute(
+            "SELECT combo, state, year, month, failure_class, error, attempts, failed_at FROM dead_letters "
+            "WHERE run_id = ? ORDER BY failed_at", (self.run_id,)
+        )
+        return [
+            {"combo": tuple(json.loads(combo)), "state": state, "year": year, "month": month,
+             "failure_class": failure_class, "error": error, "attempts": attempts, "failed_at": failed_at}
+            for combo, state, year, month, failure_class, error, attempts, failed_at in rows
+        ]
+
+    def summary(self):
+        """Task counts by status"""
+        rows = self._execute("SELECT status, COUNT(*) FROM tasks WHERE run_id = ? GROUP BY status", (self.run_id,))
+        return dict(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
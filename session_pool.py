@@ -0,0 +1,169 @@
+import os
+import time
+import threading
+from step_metrics import traced
+
+# A session is recycled after this many downloads or once the page's JS heap grows past the limit;
+# the heap is read every SESSION_MEMORY_CHECK_EVERY downloads and after a failed step, not before
+# every month. At most SESSION_POOL_SIZE idle sessions are kept open between scheduled runs
+SESSION_MAX_JOBS = int(os.environ.get("VAHAN_SESSION_MAX_JOBS", "200"))
+SESSION_MAX_MEMORY_MB = float(os.environ.get("VAHAN_SESSION_MAX_MEMORY_MB", "512"))
+SESSION_MEMORY_CHECK_EVERY = int(os.environ.get("VAHAN_SESSION_MEMORY_CHECK_EVERY", "25"))
+SESSION_POOL_SIZE = int(os.environ.get("VAHAN_SESSION_POOL_SIZE", "4"))
+
+JS_HEAP_MB_JS = "return (window.performance && performance.memory) ? performance.memory.usedJSHeapSize / 1048576 : 0;"
+
+class SessionPool:
+    """
+    Keeps warmed-up browser sessions alive between scheduled runs.
+    `start_session(download_dir)` launches a browser on the report page (cold start) and
+    `warm_session(driver)` brings an idle one back to a fresh report page, returning True when ready.
+    Safe to share between worker threads; a session is only ever handed to one worker at a time.
+    """
+
+    def __init__(self, start_session, warm_session, max_jobs=SESSION_MAX_JOBS,
+                 max_memory_mb=SESSION_MAX_MEMORY_MB, max_idle=SESSION_POOL_SIZE,
+                 memory_check_every=SESSION_MEMORY_CHECK_EVERY):
+        self.start_session = start_session
+        self.warm_session = warm_session
+        self.max_jobs = max_jobs
+        self.max_memory_mb = max_memory_mb
+        self.max_idle = max_idle
+        self.memory_check_every = max(1, memory_check_every)
+        self._idle = []
+        self._jobs = {}
+        # Job count of each session when its heap was last read
+        self._heap_checked = {}
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {"cold_starts": [], "warm_starts": [], "recycled": 0, "discarded": 0}
+
+    def acquire(self, download_dir):
+        """Hand out an idle session re-navigated to the report page, or start a new browser"""
+        while True:
+            with self._lock:
+                driver = self._idle.pop() if self._idle else None
+            if driver is None:
+                break
+            started = time.monotonic()
+            if self.is_healthy(driver) and self.warm_session(driver):
+                with self._lock:
+                    self.stats["warm_starts"].append(time.monotonic() - started)
+                return driver
+            print("[WARN] Idle browser session failed its health check, discarding it")
+            self.discard(driver)
+        started = time.monotonic()
+        driver = self.start_session(download_dir)
+        with self._lock:
+            self.stats["cold_starts"].append(time.monotonic() - started)
+            self._jobs[id(driver)] = 0
+        return driver
+
+    def release(self, driver):
+        """Return a session for reuse; dead, worn-out or surplus sessions are closed instead"""
+        if driver is None:
+            return
+        if not self.is_healthy(driver):
+            self.discard(driver)
+            return
+        if self.needs_recycle(driver):
+            self._quit(driver, "recycled")
+            return
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(driver)
+                return
+        self._quit(driver)
+
+    @traced("session_recycle")
+    def recycle(self, driver, download_dir):
+        """Close a worn-out session and hand out a replacement"""
+        print(f"[INFO] Recycling browser session after {self.job_count(driver)} downloads")
+        self._quit(driver, "recycled")
+        return self.acquire(download_dir)
+
+    def discard(self, driver):
+        self._quit(driver, "discarded")
+
+    def _quit(self, driver, reason=None):
+        with self._lock:
+            self._jobs.pop(id(driver), None)
+            self._heap_checked.pop(id(driver), None)
+            if reason:
+                self.stats[reason] += 1
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def record_job(self, driver):
+        with self._lock:
+            self._jobs[id(driver)] = self._jobs.get(id(driver), 0) + 1
+
+    def job_count(self, driver):
+        with self._lock:
+            return self._jobs.get(id(driver), 0)
+
+    def memory_mb(self, driver):
+        """Used JS heap of the page in MB; raises if the session does not answer"""
+        return float(driver.execute_script(JS_HEAP_MB_JS) or 0)
+
+    def check_heap_soon(self, driver):
+        """Read the heap at the next needs_recycle(), e.g. after a failed step"""
+        with self._lock:
+            self._heap_checked[id(driver)] = None
+
+    def needs_recycle(self, driver):
+        """
+        True once a session reached max_jobs downloads or, when its heap is due for a check
+        (every memory_check_every downloads or after check_heap_soon()), uses more than
+        max_memory_mb. A session that does not answer the heap read goes through is_healthy()
+        and is recycled if that fails too.
+        """
+        jobs = self.job_count(driver)
+        if self.max_jobs and jobs >= self.max_jobs:
+            return True
+        if not self.max_memory_mb:
+            return False
+        with self._lock:
+            last = self._heap_checked.get(id(driver), 0)
+            if last is not None and jobs - last < self.memory_check_every:
+                return False
+            self._heap_checked[id(driver)] = jobs
+        try:
+            return self.memory_mb(driver) > self.max_memory_mb
+        except Exception:
+            return not self.is_healthy(driver)
+
+    def is_healthy(self, driver):
+        """Cheap liveness check: the browser answers a script call"""
+        try:
+            return driver.execute_script("return document.readyState") is not None
+        except Exception as e:
+            print(f"[ERROR] Selenium session lost: {str(e).split('Stacktrace:')[0].strip()}")
+            return False
+
+    def close(self):
+        """Quit every idle session (end of a one-off run or scheduler shutdown)"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for driver in idle:
+            self._quit(driver)
+
+    def report(self):
+        """Session start-up metrics since the last reset_stats()"""
+        with self._lock:
+            cold, warm = list(self.stats["cold_starts"]), list(self.stats["warm_starts"])
+            return {
+                "cold_starts": len(cold),
+                "cold_start_avg_s": round(sum(cold) / len(cold), 3) if cold else None,
+                "cold_start_total_s": round(sum(cold), 3),
+                "warm_starts": len(warm),
+                "warm_start_avg_s": round(sum(warm) / len(warm), 3) if warm else None,
+                "recycled": self.stats["recycled"],
+                "discarded": self.stats["discarded"],
+                "idle": len(self._idle),
+            }
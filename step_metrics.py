@@ -0,0 +1,146 @@
+import os
+import json
+import time
+import threading
+import functools
+from datetime import datetime
+
+# Timed spans for every scraper step (finder lookups, selections, refresh, download, download
+# wait, file processing, session restarts). Each span carries the step, the task it ran for
+# (state, year, month), the strategy that resolved it and whether it succeeded; spans are
+# appended to OUTPUT_DIR/spans.jsonl as they finish.
+SPANS_FILE_NAME = "spans.jsonl"
+QUANTILES = (0.5, 0.95, 0.99)
+
+_lock = threading.Lock()
+_local = threading.local()
+_spans = []
+_spans_file = None
+
+def start_spans(output_dir):
+    """Start collecting spans for a run, appending them to output_dir/spans.jsonl"""
+    global _spans_file
+    with _lock:
+        _spans.clear()
+        _spans_file = os.path.join(output_dir, SPANS_FILE_NAME)
+    return _spans_file
+
+def task_labels(task):
+    """Label the spans this thread records next with the task's state, year and month"""
+    _, state, year, month = task
+    _local.labels = {"state": state, "year": str(year), "month": month}
+
+def note_strategy(strategy):
+    """Record which strategy resolved the innermost open span (e.g. 'control map' or 'widget')"""
+    stack = getattr(_local, "stack", None)
+    if stack:
+        stack[-1]["strategy"] = strategy
+
+def _record(span):
+    with _lock:
+        _spans.append(span)
+        if _spans_file:
+            try:
+                with open(_spans_file, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(span) + "\n")
+            except Exception as e:
+                print(f"[WARN] Could not write span to {_spans_file}: {e}")
+
+def traced(step):
+    """Decorator: time each call as a span; a falsy result or an exception marks it failed"""
+    def wrap(action):
+        @functools.wraps(action)
+        def run(*args, **kwargs):
+            stack = _local.__dict__.setdefault("stack", [])
+            span = dict(getattr(_local, "labels", {}), step=step, strategy=None)
+            stack.append(span)
+            started = time.monotonic()
+            ok = False
+            try:
+                result = action(*args, **kwargs)
+                ok = bool(result)
+                return result
+            finally:
+                stack.pop()
+                span["seconds"] = round(time.monotonic() - started, 4)
+                span["ok"] = ok
+                span["at"] = datetime.now().isoformat(timespec="milliseconds")
+                _record(span)
+        return run
+    return wrap
+
+def collected_spans():
+    with _lock:
+        return list(_spans)
+
+def load_spans(file_path):
+    """Spans of an earlier run read back from its spans.jsonl"""
+    spans = []
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                spans.append(json.loads(line))
+    return spans
+
+def _quantile(ordered, q):
+    # Nearest-rank percentile
+    return ordered[min(len(ordered) - 1, max(0, int(q * len(ordered) + 0.5) - 1))]
+
+def summarize(spans):
+    """Per step: count, failures, total and p50/p95/p99/max latency, and how often each strategy resolved it"""
+    by_step = {}
+    for span in spans:
+        by_step.setdefault(span["step"], []).append(span)
+    summary = {}
+    for step, step_spans in sorted(by_step.items()):
+        ordered = sorted(s["seconds"] for s in step_spans)
+        strategies = {}
+        for s in step_spans:
+            if s.get("strategy"):
+                strategies[s["strategy"]] = strategies.get(s["strategy"], 0) + 1
+        summary[step] = {
+            "count": len(ordered),
+            "failed": sum(1 for s in step_spans if not s["ok"]),
+            "total_s": round(sum(ordered), 3),
+            "p50_s": round(_quantile(ordered, 0.5), 3),
+            "p95_s": round(_quantile(ordered, 0.95), 3),
+            "p99_s": round(_quantile(ordered, 0.99), 3),
+            "max_s": round(ordered[-1], 3),
+            "strategies": strategies,
+        }
+    return summary
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+def prometheus_text(spans):
+    """The span summary in the Prometheus text exposition format"""
+    summary = summarize(spans)
+    lines = [
+        "# HELP vahan_step_duration_seconds Latency of scraper steps",
+        "# TYPE vahan_step_duration_seconds summary",
+    ]
+    for step, s in summary.items():
+        for q in QUANTILES:
+            lines.append(f'vahan_step_duration_seconds{{step="{_label(step)}",quantile="{q}"}} {s[f"p{int(q * 100)}_s"]}')
+        lines.append(f'vahan_step_duration_seconds_sum{{step="{_label(step)}"}} {s["total_s"]}')
+        lines.append(f'vahan_step_duration_seconds_count{{step="{_label(step)}"}} {s["count"]}')
+    lines += ["# HELP vahan_step_failures_total Scraper steps that failed",
+              "# TYPE vahan_step_failures_total counter"]
+    for step, s in summary.items():
+        lines.append(f'vahan_step_failures_total{{step="{_label(step)}"}} {s["failed"]}')
+    lines += ["# HELP vahan_step_strategy_total Strategy that resolved each step",
+              "# TYPE vahan_step_strategy_total counter"]
+    for step, s in summary.items():
+        for strategy, count in sorted(s["strategies"].items()):
+            lines.append(f'vahan_step_strategy_total{{step="{_label(step)}",strategy="{_label(strategy)}"}} {count}')
+    return "\n".join(lines) + "\n"
+
+def print_step_summary(summary, limit=10):
+    """Log the steps that took the most time in total, with their latency percentiles and strategies"""
+    slowest = sorted(summary.items(), key=lambda item: -item[1]["total_s"])[:limit]
+    print(f"[INFO] Time per step ({len(summary)} steps, slowest first):")
+    for step, s in slowest:
+        strategies = ", ".join(f"{k} {v}" for k, v in sorted(s["strategies"].items(), key=lambda kv: -kv[1]))
+        print(f"[INFO]   {step}: {s['count']} calls ({s['failed']} failed), {s['total_s']}s total, "
+              f"p50 {s['p50_s']}s p95 {s['p95_s']}s p99 {s['p99_s']}s" + (f" [{strategies}]" if strategies else ""))
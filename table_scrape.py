@@ -0,0 +1,153 @@
+import os
+import json
+from page_idle import wait_for_page_idle
+
+# Extraction mode: "excel" downloads the report workbook (default), "table" reads the rendered
+# groupingTable instead, "parity" does both and logs every cell where they disagree.
+# Set with `main.py --extract <mode>` or VAHAN_EXTRACT.
+EXTRACT_MODES = ("excel", "table", "parity")
+EXTRACT_MODE = os.environ.get("VAHAN_EXTRACT", "excel")
+
+# The whole rendered report table in one execute_script round trip. The header rows are laid out
+# on a grid (rowspan/colspan resolved) so every data column gets its bottom header label and the
+# label of the group above it (e.g. "Fuel"). Numbers come back typed; the paginator state is
+# returned so the caller can tell whether every row is on the page.
+GROUPING_TABLE_JS = """
+var root = document.getElementById(arguments[0] || 'groupingTable');
+if (!root) { return null; }
+function text(cell) { return (cell.textContent || '').replace(/\\u00a0/g, ' ').replace(/\\s+/g, ' ').trim(); }
+function number(value) {
+    var cleaned = value.replace(/,/g, '');
+    return cleaned !== '' && !isNaN(cleaned) ? Number(cleaned) : null;
+}
+var thead = root.querySelector('thead');
+var grid = [];
+var headRows = thead ? thead.rows : [];
+for (var r = 0; r < headRows.length; r++) {
+    grid[r] = grid[r] || [];
+    var c = 0;
+    for (var k = 0; k < headRows[r].cells.length; k++) {
+        var cell = headRows[r].cells[k];
+        while (grid[r][c] !== undefined) { c++; }
+        for (var dr = 0; dr < (cell.rowSpan || 1); dr++) {
+            grid[r + dr] = grid[r + dr] || [];
+            for (var dc = 0; dc < (cell.colSpan || 1); dc++) {
+                grid[r + dr][c + dc] = {text: text(cell), group: (cell.colSpan || 1) > 1};
+            }
+        }
+        c += cell.colSpan || 1;
+    }
+}
+var header = [], groups = [];
+var width = grid.length ? grid[grid.length - 1].length : 0;
+for (var col = 0; col < width; col++) {
+    var group = null;
+    for (var g = 0; g < grid.length; g++) {
+        if (grid[g][col] && grid[g][col].group) { group = grid[g][col].text; }
+    }
+    header.push(grid.length ? (grid[grid.length - 1][col] || {text: ''}).text : '');
+    groups.push(group);
+}
+var body = document.getElementById(root.id + '_data') || root.querySelector('tbody');
+var rows = [];
+var bodyRows = body ? body.rows : [];
+for (var i = 0; i < bodyRows.length; i++) {
+    var cells = bodyRows[i].cells;
+    if (cells.length < 2) { continue; }
+    var values = [];
+    for (var j = 0; j < cells.length; j++) {
+        var value = text(cells[j]);
+        var parsed = j === 1 ? null : number(value);
+        values.push(parsed === null ? value : parsed);
+    }
+    rows.push(values);
+}
+var paginator = root.querySelector('.ui-paginator');
+var pagination = null;
+if (paginator) {
+    var pf = window.PrimeFaces;
+    for (var name in (pf && pf.widgets) || {}) {
+        var w = pf.widgets[name];
+        if (w && w.id === root.id && w.paginator) {
+            pagination = {row_count: w.paginator.cfg.rowCount, rows_per_page: w.paginator.cfg.rows};
+        }
+    }
+    pagination = pagination || {row_count: null, rows_per_page: rows.length};
+}
+return {header: header, groups: groups, rows: rows, pagination: pagination};
+"""
+
+# Switch a paginated table to a single page holding every row (one AJAX reload)
+SHOW_ALL_ROWS_JS = """
+var pf = window.PrimeFaces;
+for (var name in (pf && pf.widgets) || {}) {
+    var w = pf.widgets[name];
+    if (w && w.id === arguments[0] && w.paginator) { w.paginator.setRowsPerPage(w.paginator.cfg.rowCount); return true; }
+}
+return false;
+"""
+
+def table_from_snapshot(snapshot):
+    """
+    Turn a GROUPING_TABLE_JS snapshot into a report table: {'row_dimension', 'column_dimension',
+    'columns', 'rows'} where each row is {'label', 'counts', 'total'}. Returns None if the
+    header is not a VAHAN report header.
+    """
+    header = snapshot["header"]
+    if len(header) < 3 or header[0].lower().replace(" ", "").replace(".", "") != "sno":
+        return None
+    total_col = next((i for i, label in enumerate(header) if label.upper() == "TOTAL"), None)
+    data_cols = [i for i in range(2, len(header)) if i != total_col]
+    column_dimension = next((snapshot["groups"][i] for i in data_cols if snapshot["groups"][i]), "")
+    rows = []
+    for values in snapshot["rows"]:
+        if len(values) < len(header):
+            continue
+        counts = [values[i] if isinstance(values[i], (int, float)) else 0 for i in data_cols]
+        total = values[total_col] if total_col is not None else sum(counts)
+        rows.append({"label": values[1], "counts": counts, "total": total})
+    return {
+        "row_dimension": header[1],
+        "column_dimension": column_dimension,
+        "columns": [header[i] for i in data_cols],
+        "rows": rows,
+    }
+
+def scrape_grouping_table(driver, table_id="groupingTable"):
+    """Read the rendered report table, showing all rows first if it is paginated. Returns a report table or None."""
+    try:
+        snapshot = driver.execute_script(GROUPING_TABLE_JS, table_id)
+        pagination = snapshot and snapshot["pagination"]
+        if pagination and pagination["row_count"] and pagination["row_count"] > len(snapshot["rows"]):
+            print(f"[INFO] Report table is paginated ({len(snapshot['rows'])} of {pagination['row_count']} rows), showing all rows")
+            if driver.execute_script(SHOW_ALL_ROWS_JS, table_id):
+                wait_for_page_idle(driver)
+                snapshot = driver.execute_script(GROUPING_TABLE_JS, table_id)
+            if len(snapshot["rows"]) < pagination["row_count"]:
+                print(f"[ERROR] Only {len(snapshot['rows'])} of {pagination['row_count']} table rows could be read")
+                return None
+    except Exception as e:
+        print(f"[ERROR] Could not read the report table: {e}")
+        return None
+    if not snapshot:
+        print("[ERROR] Report table not found on the page")
+        return None
+    table = table_from_snapshot(snapshot)
+    if table is None:
+        print(f"[ERROR] Unexpected report table header: {snapshot['header'][:4]}")
+    return table
+
+def save_table(table, file_path):
+    """Write a report table as JSON (sorted keys, no timestamp, so equal tables give equal files)"""
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump(table, f, ensure_ascii=False, sort_keys=True)
+    return file_path
+
+def table_cells(table):
+    """{(row label, column label): count} of a report table, the same shape as vahan_workbook.read_report()"""
+    cells = {}
+    for row in table["rows"]:
+        for column, count in zip(table["columns"], row["counts"]):
+            key = (row["label"], column)
+            cells[key] = cells.get(key, 0) + int(count)
+    return cells
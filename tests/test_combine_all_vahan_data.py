@@ -0,0 +1,42 @@
+import os
+import json
+
+from combine_all_vahan_data import find_report_files, load_reports, combine_frames
+from vahan_dataset import pivot_wide
+
+def write_table(path, rows, mtime):
+    """A report table as main.py --extract table saves it"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = {
+        "row_dimension": "Maker", "column_dimension": "Fuel", "columns": ["PETROL", "DIESEL"],
+        "rows": [{"label": label, "counts": counts, "total": sum(counts)} for label, counts in rows],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(table, f)
+    os.utime(path, (mtime, mtime))
+
+def test_month_folder_with_two_reports_counts_only_the_newest(tmp_path, capsys):
+    jan = tmp_path / "Goa(13)" / "2025" / "JAN"
+    write_table(str(jan / "vahan_data_20250201_090000.json"), [("TATA", [5, 1]), ("HERO", [2, 0])], 1_700_000_000)
+    # Downloaded again later the same day (and written before the older file's mtime, e.g. copied back)
+    write_table(str(jan / "vahan_data_20250201_100000_3f2a9c1d.json"), [("TATA", [6, 1]), ("HERO", [2, 0])], 1_600_000_000)
+    write_table(str(tmp_path / "Goa(13)" / "2025" / "FEB" / "vahan_data_20250301_090000.json"), [("TATA", [1, 0])], 1_700_000_000)
+
+    frames = load_reports(find_report_files(str(tmp_path)))
+    assert len(frames) == 2
+    assert "skipping vahan_data_20250201_090000.json" in capsys.readouterr().out
+
+    wide = pivot_wide(combine_frames(frames))
+    tata_jan = wide[(wide["Maker"] == "TATA") & (wide["Month"] == 202501)].iloc[0]
+    assert (tata_jan["PETROL"], tata_jan["DIESEL"], tata_jan["TOTAL"]) == (6, 1, 7)
+    assert wide["TOTAL"].sum() == 7 + 2 + 1
+
+def test_reports_of_different_specs_in_one_month_are_kept(tmp_path):
+    jan = tmp_path / "Goa(13)" / "2025" / "JAN"
+    write_table(str(jan / "vahan_data_20250201_090000.json"), [("TATA", [5, 1])], 1_700_000_000)
+    path = str(jan / "vahan_data_20250201_090500.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"row_dimension": "Maker", "column_dimension": "Norms", "columns": ["BS VI"],
+                   "rows": [{"label": "TATA", "counts": [6], "total": 6}]}, f)
+    frames = load_reports(find_report_files(str(tmp_path)))
+    assert sorted(df.attrs["spec"] for df in frames) == ["Maker_Fuel", "Maker_Norms"]
@@ -0,0 +1,79 @@
+from crawl_planner import (
+    WHOLE_YEAR, build_tasks, build_plan, count_naive_transitions, CrawlStateMachine,
+    estimate_transitions, transition_report,
+)
+
+COMBO = ("Maker", "Fuel")
+
+def recording_actions(months=("JAN", "FEB", "MAR"), fail=()):
+    calls = []
+    def action(name):
+        def run(task):
+            calls.append((name, task[1], task[3]))
+            if name == "months":
+                return list(months)
+            return name not in fail
+        return run
+    names = ("combo", "state", "year", "refresh", "months", "month")
+    return {name: action(name) for name in names}, calls
+
+def test_build_plan_groups_by_combo_state_year_and_orders_months():
+    tasks = [
+        (COMBO, "Goa", 2025, "FEB"), (COMBO, "Bihar", 2024, "DEC"), (COMBO, "Goa", 2024, "MAR"),
+        (COMBO, "Goa", 2025, "JAN"), (COMBO, "Goa", 2025, "FEB"),
+    ]
+    assert build_plan(tasks) == [
+        (COMBO, "Goa", 2024, "MAR"), (COMBO, "Goa", 2025, "JAN"), (COMBO, "Goa", 2025, "FEB"),
+        (COMBO, "Bihar", 2024, "DEC"),
+    ]
+
+def test_build_tasks_is_the_cartesian_product():
+    tasks = build_tasks([COMBO], ["Goa", "Bihar"], [(2025, "JAN"), (2025, "FEB")])
+    assert len(tasks) == 4
+    assert tasks[0] == (COMBO, "Goa", 2025, "JAN")
+
+def test_naive_and_planned_transition_counts():
+    plan = build_plan(build_tasks([COMBO], ["Goa", "Bihar"], [(2025, "JAN"), (2025, "FEB")]))
+    assert count_naive_transitions(plan, 2) == 2 * 1 + 2 * 2 + 4 * 4
+    # combo (2) + Goa: state, year, refresh, months, month + month
+    # + Bihar: state, refresh, months, month (year unchanged) + month
+    assert estimate_transitions(plan, 2) == 2 + 6 + 5
+    report = transition_report(plan, 2, actual=11)
+    assert report == {"tasks": 4, "naive": 22, "planned": 13, "actual": 11}
+
+def test_next_month_of_the_same_year_only_selects_the_month():
+    actions, calls = recording_actions()
+    machine = CrawlStateMachine(actions)
+    assert machine.run((COMBO, "Goa", 2025, "JAN")) == (True, None)
+    calls.clear()
+    assert machine.run((COMBO, "Goa", 2025, "FEB")) == (True, None)
+    assert [name for name, _, _ in calls] == ["month"]
+
+def test_month_missing_from_the_list_is_unavailable_without_selecting_it():
+    actions, calls = recording_actions(months=("JAN",))
+    machine = CrawlStateMachine(actions)
+    assert machine.run((COMBO, "Goa", 2025, "MAR")) == (False, "month_unavailable")
+    assert "month" not in [name for name, _, _ in calls]
+
+def test_failed_step_is_redone_on_the_next_task():
+    actions, calls = recording_actions(fail=("state",))
+    machine = CrawlStateMachine(actions)
+    assert machine.run((COMBO, "Goa", 2025, "JAN")) == (False, "failed:state")
+    assert machine.state is None
+    calls.clear()
+    machine.run((COMBO, "Goa", 2025, "FEB"))
+    assert calls[0][0] == "state"
+
+def test_whole_year_task_refreshes_instead_of_picking_a_month():
+    actions, calls = recording_actions()
+    machine = CrawlStateMachine(actions)
+    assert machine.run((COMBO, "Goa", 2025, WHOLE_YEAR)) == (True, None)
+    assert [name for name, _, _ in calls] == ["combo", "state", "year", "refresh"]
+    assert machine.months is None
+
+def test_combo_counts_as_one_transition_per_dropdown():
+    actions, _ = recording_actions()
+    machine = CrawlStateMachine(actions, combo_size=3)
+    machine.run((COMBO, "Goa", 2025, "JAN"))
+    assert machine.transitions["combo"] == 3
+    assert machine.total_transitions() == 3 + 5
@@ -0,0 +1,93 @@
+import json
+import sqlite3
+from datetime import date
+
+import openpyxl
+
+from fetch_store import FetchStore, report_spec, content_hash, is_stale
+
+FILTER_KEYS = ["yaxis", "xaxis", "year_type", "year", "type"]
+COMBO = ("Maker", "Fuel", "Calendar Year", "2025", "Actual Value")
+TODAY = date(2025, 6, 15)
+
+def write_table(path, rows, columns=("PETROL", "DIESEL")):
+    table = {"row_dimension": "Maker", "column_dimension": "Fuel", "columns": list(columns),
+             "rows": [{"label": label, "counts": counts, "total": sum(counts)} for label, counts in rows]}
+    path.write_text(json.dumps(table), encoding="utf-8")
+    return str(path)
+
+def test_report_spec_leaves_out_the_prompt_year():
+    other_year = COMBO[:3] + ("2023",) + COMBO[4:]
+    assert report_spec(FILTER_KEYS, COMBO) == report_spec(FILTER_KEYS, other_year)
+    assert json.loads(report_spec(FILTER_KEYS, COMBO)) == {
+        "yaxis": "Maker", "xaxis": "Fuel", "year_type": "Calendar Year", "type": "Actual Value"}
+
+def test_current_and_previous_month_are_always_stale():
+    assert is_stale(2025, "JUN", "2025-06-15T08:00:00", today=TODAY)
+    assert is_stale(2025, "MAY", "2025-06-15T08:00:00", today=TODAY)
+    assert not is_stale(2025, "APR", "2025-06-15T08:00:00", today=TODAY)
+    # A whole-year download counts as its December
+    assert is_stale(2025, "ALL", "2025-06-15T08:00:00", today=TODAY)
+    assert not is_stale(2024, "ALL", "2025-06-15T08:00:00", today=TODAY)
+
+def test_older_months_go_stale_after_max_age_counted_from_today():
+    assert is_stale(2025, "JAN", None, today=TODAY)
+    assert not is_stale(2025, "JAN", "2025-05-16T23:00:00", today=TODAY, max_age_days=30)
+    assert is_stale(2025, "JAN", "2025-05-15T00:00:00", today=TODAY, max_age_days=30)
+    assert not is_stale(2025, "JAN", "2025-05-15T00:00:00", today=date(2025, 6, 14), max_age_days=30)
+
+def test_content_hash_ignores_padding_zero_counts_and_format(tmp_path):
+    plain = write_table(tmp_path / "a.json", [("TATA MOTORS", [5, 0]), ("HERO", [0, 2])])
+    padded = write_table(tmp_path / "b.json", [("HERO", [0, 2]), ("TATA MOTORS", [5, 0])])
+    revised = write_table(tmp_path / "c.json", [("TATA MOTORS", [6, 0]), ("HERO", [0, 2])])
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["Maker wise Fuel Data"])
+    ws.append(["S No", "Maker", "Fuel", None, "TOTAL"])
+    ws.append([])
+    ws.append([None, None, "PETROL", "DIESEL", None])
+    ws.append([1, "\xa0TATA  MOTORS", 5, 0, 5])
+    ws.append([2, "HERO", 0, 2, 2])
+    wb.save(tmp_path / "d.xlsx")
+    assert content_hash(plain) == content_hash(padded) == content_hash(str(tmp_path / "d.xlsx"))
+    assert content_hash(plain) != content_hash(revised)
+    other = tmp_path / "notes.txt"
+    other.write_text("not a report")
+    assert len(content_hash(str(other))) == 64
+
+def test_split_stale(tmp_path):
+    store = FetchStore(str(tmp_path / "journal.db"))
+    spec = report_spec(FILTER_KEYS, COMBO)
+    kept = write_table(tmp_path / "jan.json", [("TATA", [1, 0])])
+    store.record(spec, "Goa", 2025, "JAN", kept, "2025-06-01T10:00:00")
+    store.record(spec, "Goa", 2025, "FEB", str(tmp_path / "jan.json"), "2025-04-01T10:00:00")
+    gone = write_table(tmp_path / "mar.json", [("TATA", [1, 0])])
+    store.record(spec, "Goa", 2025, "MAR", gone, "2025-06-01T10:00:00")
+    (tmp_path / "mar.json").unlink()
+    store.record(spec, "Goa", 2025, "MAY", kept, "2025-06-14T10:00:00")
+    tasks = [(COMBO, "Goa", 2025, m) for m in ("JAN", "FEB", "MAR", "APR", "MAY")]
+    stale, fresh = store.split_stale(tasks, FILTER_KEYS, max_age_days=30, today=TODAY)
+    assert stale == tasks[1:]
+    assert [(task, fetch["file_path"]) for task, fetch in fresh] == [(tasks[0], kept)]
+    # The prompt Year is not part of the spec, so the same report is found from another Year
+    other_year = COMBO[:3] + ("2023",) + COMBO[4:]
+    _, fresh = store.split_stale([(other_year, "Goa", 2025, "JAN")], FILTER_KEYS, max_age_days=30, today=TODAY)
+    assert len(fresh) == 1
+    store.close()
+
+def test_fetches_under_a_spec_with_the_prompt_year_are_moved(tmp_path):
+    db = str(tmp_path / "journal.db")
+    FetchStore(db).close()
+    conn = sqlite3.connect(db)
+    old_spec = json.dumps(dict(zip(FILTER_KEYS, COMBO)), sort_keys=True)
+    older_spec = json.dumps(dict(zip(FILTER_KEYS, COMBO[:3] + ("2024",) + COMBO[4:])), sort_keys=True)
+    for spec, fetched_at, path in ((old_spec, "2025-06-01T10:00:00", "new.json"), (older_spec, "2025-05-01T10:00:00", "old.json")):
+        conn.execute("INSERT INTO fetches (spec, state, year, month, file_path, content_hash, fetched_at, changed_at) "
+                     "VALUES (?, 'Goa', 2025, 'JAN', ?, 'h', ?, ?)", (spec, path, fetched_at, fetched_at))
+    conn.commit()
+    conn.close()
+    store = FetchStore(db)
+    fetch = store.latest(report_spec(FILTER_KEYS, COMBO), "Goa", 2025, "JAN")
+    assert (fetch["file_path"], fetch["fetched_at"]) == ("new.json", "2025-06-01T10:00:00")
+    assert store._conn.execute("SELECT COUNT(*) FROM fetches").fetchone()[0] == 1
+    store.close()
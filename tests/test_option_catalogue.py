@@ -0,0 +1,74 @@
+from datetime import datetime, date
+
+import pytest
+
+import option_catalogue
+from option_catalogue import _expired, cached_options, remember_options, forget_options, filter_tasks
+
+FILTER_KEYS = ["year_type", "type"]
+COMBO = ("Calendar Year", "Actual Value")
+
+@pytest.fixture(autouse=True)
+def catalogue_file(tmp_path, monkeypatch):
+    path = tmp_path / "option_catalogue.json"
+    monkeypatch.setattr(option_catalogue, "OPTION_CATALOGUE_FILE", str(path))
+    monkeypatch.setattr(option_catalogue, "_catalogue", None)
+    return path
+
+def entry(options, cached_at):
+    return {"options": options, "cached_at": cached_at.isoformat(timespec="seconds")}
+
+def months_context(year):
+    return {"type": "Actual Value", "year_type": "Calendar Year", "year": str(year), "state": "Goa"}
+
+def test_lists_expire_after_the_ttl():
+    cached = entry(["2024", "2025"], datetime(2025, 6, 1, 10))
+    assert not _expired("years", {}, cached, now=datetime(2025, 6, 1, 20))
+    assert _expired("years", {}, cached, now=datetime(2025, 6, 3))
+
+def test_past_year_months_read_after_the_year_ended_never_expire():
+    cached = entry(["JAN", "FEB", "MAR"], datetime(2025, 1, 5))
+    assert not _expired("months", months_context(2024), cached, now=datetime(2026, 6, 1))
+
+def test_past_year_months_read_during_the_year_expire_after_rollover():
+    # Read in September: OCT..DEC were still missing and must be read again once the TTL passes
+    cached = entry(["JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP"], datetime(2024, 9, 20))
+    assert _expired("months", months_context(2024), cached, now=datetime(2025, 1, 10))
+
+def test_complete_past_year_months_never_expire():
+    months = ["JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC"]
+    cached = entry(months, datetime(2024, 12, 31))
+    assert not _expired("months", months_context(2024), cached, now=datetime(2026, 1, 1))
+
+def test_current_year_months_expire_after_the_ttl():
+    cached = entry(["JAN"], datetime(2025, 1, 5))
+    assert _expired("months", months_context(2025), cached, now=datetime(2025, 2, 1))
+
+def test_remember_forget_and_persist(catalogue_file):
+    context = months_context(2024)
+    remember_options("months", dict(context, extra="ignored"), ["JAN", "FEB"])
+    assert cached_options("months", context) == ["JAN", "FEB"]
+    assert catalogue_file.exists()
+    option_catalogue._catalogue = None
+    assert cached_options("months", context) == ["JAN", "FEB"]
+    forget_options("months", context)
+    assert cached_options("months", context) is None
+
+def test_empty_lists_are_not_cached():
+    remember_options("years", {"year_type": "Calendar Year"}, [])
+    assert cached_options("years", {"year_type": "Calendar Year"}) is None
+
+def test_filter_tasks_drops_future_uncatalogued_years_and_missing_months():
+    remember_options("years", {"year_type": "Calendar Year"}, ["2024", "2025"])
+    remember_options("months", months_context(2025), ["JAN", "FEB", "MAR"])
+    tasks = [
+        (COMBO, "Goa", 2025, "FEB"),
+        (COMBO, "Goa", 2025, "APR"),
+        (COMBO, "Goa", 2025, "JUL"),
+        (COMBO, "Goa", 2023, "JAN"),
+        (COMBO, "Bihar", 2025, "APR"),
+        (COMBO, "Goa", 2025, "ALL"),
+    ]
+    kept, dropped = filter_tasks(tasks, FILTER_KEYS, today=date(2025, 5, 15))
+    assert kept == [tasks[0], tasks[4], tasks[5]]
+    assert dropped == [tasks[1], tasks[2], tasks[3]]
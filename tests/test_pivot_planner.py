@@ -0,0 +1,62 @@
+import pytest
+
+from crawl_planner import WHOLE_YEAR
+from pivot_planner import (
+    parse_dataset, plan_layouts, layout_for_axes, clean_state, yyyymm, reshape, dataset_columns,
+)
+
+COMBO = ("Maker", "Fuel")
+
+def test_parse_dataset():
+    assert parse_dataset("Maker x Fuel x State x Month") == ["Maker", "Fuel", "State", "Month"]
+    assert parse_dataset("vehicle class, month wise, Maker, maker") == ["Vehicle Class", "Month", "Maker"]
+    assert parse_dataset(["State", "Norms"]) == ["State", "Norms"]
+    with pytest.raises(ValueError):
+        parse_dataset("Maker x Colour")
+
+def test_state_on_the_table_axis_needs_no_state_dropdown():
+    layouts = plan_layouts(["Fuel", "State"], n_states=30, n_months=12, n_years=1)
+    best = layouts[0]
+    assert (best["yaxis"], best["xaxis"]) == ("State", "Fuel")
+    assert (best["per_state"], best["per_month"], best["downloads"], best["aggregated"]) == (False, False, 1, [])
+    assert all(l["downloads"] >= best["downloads"] for l in layouts)
+    assert ("Maker", "Fuel") in [l["dimensions"] for l in layouts]
+
+def test_month_wise_axis_replaces_the_month_dropdown():
+    layouts = plan_layouts(["Maker", "Month"], n_states=30, n_months=24, n_years=2)
+    best = layouts[0]
+    assert (best["yaxis"], best["xaxis"]) == ("Maker", "Month Wise")
+    assert (best["per_month"], best["downloads"], best["aggregated"]) == (False, 2, [])
+
+def test_whole_years_false_resolves_months():
+    assert plan_layouts(["Fuel", "State"], 30, 12, 1, whole_years=False)[0]["downloads"] == 12
+
+def test_no_layout_for_two_row_dimensions():
+    assert plan_layouts(["Maker", "Vehicle Class", "Norms"], 30, 12, 1) == []
+
+def test_clean_state_and_yyyymm():
+    assert clean_state("Assam(33)") == "Assam"
+    assert clean_state("Dadra and Nagar Haveli and Daman and Diu(3/2) ") == "Dadra and Nagar Haveli and Daman and Diu"
+    assert clean_state("Goa") == "Goa"
+    assert yyyymm(2024, "mar") == "202403"
+    assert yyyymm("2025", "DECEMBER") == "202512"
+
+def test_reshape_sums_away_the_table_column_and_fixes_state_and_month():
+    cells = {("TATA", "PETROL"): 5, ("TATA", "DIESEL"): 2, ("HERO", "PETROL"): 0, ("HERO", "DIESEL"): 3}
+    records = reshape(cells, layout_for_axes("Maker", "Fuel"), ["Maker", "State", "Month"],
+                      (COMBO, "Goa(13)", 2025, "JAN"))
+    assert records == {("TATA", "Goa", "202501"): 7, ("HERO", "Goa", "202501"): 3}
+
+def test_reshape_month_wise_table_keeps_only_requested_months():
+    cells = {("TATA", "JAN"): 5, ("TATA", "FEB"): 1, ("HERO", "MAR"): 2, ("TATA", "TOTAL"): 8}
+    records = reshape(cells, layout_for_axes("Maker", "Month Wise"), ["Maker", "Month"],
+                      (COMBO, "Goa(13)", 2025, WHOLE_YEAR), months={"202501", "202503"})
+    assert records == {("TATA", "202501"): 5, ("HERO", "202503"): 2}
+
+def test_reshape_without_month_appends_the_year():
+    cells = {("TATA", "PETROL"): 5}
+    dimensions = ["Maker", "Fuel"]
+    records = reshape(cells, layout_for_axes("Maker", "Fuel"), dimensions, (COMBO, "Goa", 2024, WHOLE_YEAR))
+    assert records == {("TATA", "PETROL", 2024): 5}
+    assert dataset_columns(dimensions) == ["Maker", "Fuel", "Year", "Count"]
+    assert dataset_columns(["Maker", "Month"]) == ["Maker", "Month", "Count"]
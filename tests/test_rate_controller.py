@@ -0,0 +1,88 @@
+import pytest
+
+import rate_controller
+from rate_controller import AdaptiveController, CLOSED, OPEN, HALF_OPEN
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+def test_limit_grows_by_one_per_round_of_fast_successes(clock):
+    controller = AdaptiveController(max_workers=3, clock=clock)
+    assert controller.limit == 1
+    controller.observe("select", 0.5, True)
+    assert controller.limit == 2
+    controller.observe("select", 0.5, True)
+    assert controller.limit == 2
+    controller.observe("select", 0.5, True)
+    assert controller.limit == 3
+    for _ in range(6):
+        controller.observe("select", 0.5, True)
+    assert controller.limit == 3
+    assert controller.report()["peak_limit"] == 3
+
+def test_slow_or_failed_requests_halve_once_per_window(clock):
+    controller = AdaptiveController(max_workers=8, start_workers=8, clock=clock)
+    controller.observe("refresh", rate_controller.LATENCY_TARGETS["refresh"] + 1, True)
+    assert (controller.limit, controller.interval) == (4, rate_controller.INTERVAL_STEP)
+    clock.now += 1
+    controller.observe("select", 0.5, False)
+    assert controller.limit == 4
+    clock.now += rate_controller.DECREASE_WINDOW
+    controller.observe("select", 0.5, False)
+    assert controller.limit == 2
+    assert controller.report()["slow"] == 1
+
+def test_refresh_within_its_target_is_not_slow(clock):
+    controller = AdaptiveController(max_workers=2, clock=clock)
+    controller.observe("refresh", 12.0, True)
+    assert controller.limit == 2
+    assert controller.stats["slow"] == 0
+
+def test_breaker_opens_then_probe_closes_it(clock, monkeypatch):
+    monkeypatch.setattr(rate_controller, "BREAKER_THRESHOLD", 3)
+    controller = AdaptiveController(max_workers=4, start_workers=4, clock=clock)
+    for _ in range(3):
+        controller.observe("download", 1.0, False)
+    assert controller.breaker == OPEN
+    assert controller.limit == 1
+    clock.now = controller.open_until
+    controller.acquire()
+    assert controller.breaker == HALF_OPEN
+    controller.observe("download", 1.0, True)
+    controller.release()
+    assert controller.breaker == CLOSED
+    assert controller.cooldown == rate_controller.BREAKER_COOLDOWN
+
+def test_failed_probe_reopens_with_a_longer_cooldown(clock, monkeypatch):
+    monkeypatch.setattr(rate_controller, "BREAKER_THRESHOLD", 1)
+    controller = AdaptiveController(max_workers=2, clock=clock)
+    controller.observe("select", 1.0, False)
+    clock.now = controller.open_until
+    controller.acquire()
+    controller.observe("select", 1.0, False)
+    controller.release()
+    assert controller.breaker == OPEN
+    assert controller.cooldown == 2 * rate_controller.BREAKER_COOLDOWN
+    assert controller.open_until == clock.now + controller.cooldown
+    assert controller.report()["breaker_trips"] == 2
+
+def test_timed_reports_latency_with_p95(clock):
+    controller = AdaptiveController(max_workers=1, clock=clock)
+
+    def postback(seconds):
+        clock.now += seconds
+        return True
+
+    select = controller.timed("select", postback)
+    for seconds in range(1, 21):
+        assert select(seconds / 10)
+    latency = controller.report()["latency"]["select"]
+    assert latency == {"count": 20, "p50_s": 1.0, "p95_s": 1.9, "max_s": 2.0}
@@ -0,0 +1,11 @@
+import os
+
+import main
+
+def test_reports_saved_within_one_second_get_distinct_names(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "OUTPUT_DIR", str(tmp_path))
+    paths = {main.report_output_file("Goa(13)", "JAN", 2025) for _ in range(20)}
+    assert len(paths) == 20
+    for path in paths:
+        assert os.path.dirname(path) == os.path.join(str(tmp_path), "Goa(13)", "2025", "JAN")
+        assert os.path.basename(path).startswith("vahan_data_") and path.endswith(".xlsx")
@@ -0,0 +1,61 @@
+import pytest
+
+from retry_scheduler import (
+    TRANSIENT_UI, SESSION_LOST, MONTH_UNAVAILABLE, classify_failure, backoff_delay, RetryScheduler,
+)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+def task(state):
+    return (("Maker", "Fuel"), state, 2025, "JAN")
+
+def test_classify_failure():
+    assert classify_failure("month_unavailable") == MONTH_UNAVAILABLE
+    assert classify_failure("month_unavailable", session_alive=False) == MONTH_UNAVAILABLE
+    assert classify_failure("failed:state", session_alive=False) == SESSION_LOST
+    assert classify_failure("failed:state") == TRANSIENT_UI
+    assert classify_failure("download") == TRANSIENT_UI
+
+@pytest.mark.parametrize("attempt, delay", [(1, 2.0), (2, 4.0), (3, 8.0), (10, 60.0)])
+def test_backoff_delay_stays_between_half_and_full_delay(attempt, delay):
+    for _ in range(50):
+        assert delay / 2 <= backoff_delay(attempt, base=2.0, cap=60.0) <= delay
+
+def test_retry_comes_out_once_due_ahead_of_the_remaining_plan(monkeypatch):
+    monkeypatch.setattr("retry_scheduler.backoff_delay", lambda attempt: 2.5)
+    clock = FakeClock()
+    scheduler = RetryScheduler([task(s) for s in "ABCDE"], max_attempts=3, clock=clock, sleep=clock.sleep)
+    order = []
+    while len(scheduler):
+        (t, attempt) = scheduler.next()
+        order.append((t[1], attempt))
+        if (t[1], attempt) == ("A", 1):
+            assert scheduler.retry(t, attempt, TRANSIENT_UI)
+        clock.now += 1.0
+    assert order == [("A", 1), ("B", 1), ("C", 1), ("A", 2), ("D", 1), ("E", 1)]
+    assert clock.slept == []
+
+def test_sleeps_for_the_earliest_retry_when_the_plan_is_empty(monkeypatch):
+    monkeypatch.setattr("retry_scheduler.backoff_delay", lambda attempt: 5.0)
+    clock = FakeClock()
+    scheduler = RetryScheduler([task("A")], clock=clock, sleep=clock.sleep)
+    t, attempt = scheduler.next()
+    scheduler.retry(t, attempt, SESSION_LOST)
+    assert scheduler.next() == (t, 2)
+    assert clock.slept == [5.0]
+
+def test_no_retry_when_month_unavailable_or_out_of_attempts():
+    scheduler = RetryScheduler([], max_attempts=2)
+    assert not scheduler.retry(task("A"), 1, MONTH_UNAVAILABLE)
+    assert not scheduler.retry(task("A"), 2, TRANSIENT_UI)
+    assert len(scheduler) == 0
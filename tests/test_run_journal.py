@@ -0,0 +1,50 @@
+import threading
+
+from run_journal import RunJournal
+
+COMBO = ("Maker", "Fuel")
+TASKS = [(COMBO, state, 2025, month) for state in ("Goa", "Bihar") for month in ("JAN", "FEB")]
+
+def test_resume_returns_only_unfinished_tasks(tmp_path):
+    db = str(tmp_path / "run_journal.db")
+    journal = RunJournal("run1", db)
+    journal.start_run(str(tmp_path / "outputs"), {"yaxis": "Maker"}, "http")
+    journal.add_tasks(TASKS)
+    journal.task_started(TASKS[0])
+    journal.task_done(TASKS[0], "goa_jan.xlsx")
+    journal.task_started(TASKS[1])
+    journal.task_failed(TASKS[1], "download")
+    journal.task_started(TASKS[2])
+    journal.task_done(TASKS[2], "bihar_jan.xlsx")
+    # Interrupted while the last task was running
+    journal.task_started(TASKS[3])
+    journal.close()
+
+    resumed = RunJournal("run1", db)
+    resumed.add_tasks(TASKS)
+    assert resumed.pending_tasks() == [TASKS[1], TASKS[3]]
+    assert resumed.done_tasks() == [(TASKS[0], "goa_jan.xlsx"), (TASKS[2], "bihar_jan.xlsx")]
+    assert resumed.summary() == {"done": 2, "failed": 1, "running": 1}
+    assert RunJournal("other", db).pending_tasks() == []
+    resumed.close()
+
+def test_tasks_finished_from_several_threads_keep_their_durations(tmp_path):
+    journal = RunJournal("run1", str(tmp_path / "run_journal.db"))
+    tasks = [(COMBO, f"State {i}", 2025, "JAN") for i in range(40)]
+    journal.add_tasks(tasks)
+
+    def work(shard):
+        for task in shard:
+            journal.task_started(task)
+            journal.task_done(task, f"{task[1]}.xlsx")
+
+    threads = [threading.Thread(target=work, args=(tasks[i::4],)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert journal.pending_tasks() == []
+    assert journal._started == {}
+    durations = journal._execute("SELECT COUNT(*) FROM tasks WHERE duration IS NOT NULL")[0][0]
+    assert durations == len(tasks)
+    journal.close()
@@ -0,0 +1,71 @@
+from datetime import datetime
+
+import pytest
+
+import mock_vahan_server
+from mock_vahan_server import start_mock_server, MOCK_MAKERS, XAXIS_COLUMNS
+from vahan_http_client import VahanHttpClient, VIEW_STATE_FIELD
+from vahan_workbook import read_report_table
+
+LAST_YEAR = str(datetime.now().year - 1)
+
+@pytest.fixture(scope="module")
+def report_url():
+    server, url = start_mock_server()
+    yield url
+    server.shutdown()
+
+@pytest.fixture
+def client(report_url):
+    client = VahanHttpClient(report_url, timeout=10)
+    assert client.load()
+    yield client
+    client.close()
+
+def show_report(client, state="Goa(13)"):
+    assert client.select("yaxis", "Maker")
+    assert client.select("xaxis", "Fuel")
+    assert client.select("state", state)
+    assert client.select("year", LAST_YEAR)
+    assert client.refresh()
+
+def test_load_reads_the_dropdowns(client):
+    assert client.form_id == mock_vahan_server.FORM_ID
+    assert client.hidden[VIEW_STATE_FIELD]
+    assert "Goa(13)" in client.get_available_states()
+    assert client.options("xaxis")[-1] == "Month Wise"
+
+def test_download_one_report(client, tmp_path):
+    show_report(client)
+    assert client.get_available_months() == mock_vahan_server.MONTHS
+    assert client.select("month", "MAR")
+    path = client.download_xls(str(tmp_path / "report.xlsx"))
+    assert path == str(tmp_path / "report.xlsx")
+    table = read_report_table(path)
+    assert (table["row_dimension"], table["column_dimension"]) == ("Maker", "Fuel")
+    assert table["columns"] == XAXIS_COLUMNS["Fuel"]
+    assert table["rows"] and {row["label"] for row in table["rows"]} <= set(MOCK_MAKERS)
+    for row in table["rows"]:
+        assert sum(row["counts"]) == row["total"]
+    # The same report again, in memory
+    with open(path, "rb") as f:
+        assert client.fetch_xls() == f.read()
+
+def test_download_before_refresh_is_not_a_workbook(client, tmp_path):
+    assert client.download_xls(str(tmp_path / "report.xlsx")) is None
+    assert not (tmp_path / "report.xlsx").exists()
+
+def test_unknown_option_is_not_posted(client):
+    assert not client.select("state", "Atlantis(1)")
+
+def test_expired_view_state_fails_the_postback(client):
+    client.hidden[VIEW_STATE_FIELD] = "expired"
+    assert not client.select("yaxis", "Maker")
+    assert not client.refresh()
+    # A fresh load starts a new view
+    assert client.load()
+    assert client.select("yaxis", "Maker")
+
+def test_redirect_in_a_partial_response_fails(client):
+    xml = '<?xml version="1.0"?><partial-response><redirect url="/login.xhtml"/></partial-response>'
+    assert not client._apply_partial_response(xml)
@@ -0,0 +1,69 @@
+import os
+
+import openpyxl
+import pytest
+
+from vahan_workbook import clean_label, read_report_table, read_report, diff_reports
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# A real portal export tracked in the repository
+GOA_EXPORT = os.path.join(REPO, "outputs_Maker_Fuel_2024JAN_to_2025FEB_20250701_102722", "Goa(13)",
+                          "2024", "JAN", "vahan_data_20250701_110518.xlsx")
+
+def write_report(path):
+    """A workbook in the portal's layout: title, S No header, blank row, column labels, data rows"""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["Maker wise Fuel Data of Goa (2025)"])
+    ws.append(["S No", "\xa0Maker\xa0", "Fuel", None, None, "TOTAL"])
+    ws.append([])
+    ws.append([None, None, "PETROL", "DIESEL", "\xa0ELECTRIC(BOV)", None])
+    ws.append([1, "TATA\xa0 MOTORS LTD", "8,686", 12, None, "8,698"])
+    ws.append([2, "HERO MOTOCORP LTD", 40, "0", "3", 43])
+    ws.append(["Total", None, "8,726", 12, 3, "8,741"])
+    wb.save(path)
+    return str(path)
+
+def test_clean_label():
+    assert clean_label("\xa0TATA\xa0  MOTORS ") == "TATA MOTORS"
+    assert clean_label(None) == ""
+
+def test_synthetic_report(tmp_path):
+    table = read_report_table(write_report(tmp_path / "report.xlsx"))
+    assert table["row_dimension"] == "Maker"
+    assert table["column_dimension"] == "Fuel"
+    assert table["columns"] == ["PETROL", "DIESEL", "ELECTRIC(BOV)"]
+    # The grand total row has no S No and is skipped
+    assert table["rows"] == [
+        {"label": "TATA MOTORS LTD", "counts": [8686, 12, 0], "total": 8698},
+        {"label": "HERO MOTOCORP LTD", "counts": [40, 0, 3], "total": 43},
+    ]
+    assert read_report(str(tmp_path / "report.xlsx"))[("TATA MOTORS LTD", "PETROL")] == 8686
+
+def test_not_a_report(tmp_path):
+    path = tmp_path / "other.xlsx"
+    wb = openpyxl.Workbook()
+    wb.active.append(["name", "value"])
+    wb.save(path)
+    assert read_report_table(str(path)) is None
+    broken = tmp_path / "broken.xlsx"
+    broken.write_text("<html>session expired</html>")
+    assert read_report_table(str(broken)) is None
+
+@pytest.mark.skipif(not os.path.exists(GOA_EXPORT), reason="tracked export not checked out")
+def test_real_export_counts_add_up_to_the_total_column():
+    table = read_report_table(GOA_EXPORT)
+    assert (table["row_dimension"], table["column_dimension"]) == ("Maker", "Fuel")
+    assert "PETROL" in table["columns"]
+    assert len(table["rows"]) == 66
+    for row in table["rows"]:
+        assert len(row["counts"]) == len(table["columns"])
+        assert sum(row["counts"]) == row["total"], row["label"]
+
+def test_diff_reports_sorts_by_size_of_change():
+    old = {("A", "PETROL"): 10, ("B", "PETROL"): 5}
+    new = {("A", "PETROL"): 12, ("B", "PETROL"): 5, ("C", "DIESEL"): 7}
+    assert diff_reports(old, new) == [
+        {"row": "C", "column": "DIESEL", "old": 0, "new": 7, "change": 7},
+        {"row": "A", "column": "PETROL", "old": 10, "new": 12, "change": 2},
+    ]
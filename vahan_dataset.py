@@ -0,0 +1,153 @@
+import os
+import shutil
+from calendar import month_abbr
+from urllib.parse import unquote
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Combined report data as a Parquet dataset, partitioned spec=<Y-Axis>_<X-Axis>/state=/year=/month=
+# (e.g. spec=Maker_Fuel/state=Goa(11)/year=2024/month=03/part-0.parquet), in one long layout for
+# every spec: state, yyyymm, maker, dimension_type (the X-Axis, e.g. Fuel), dimension_value (e.g.
+# PETROL) and a non-zero count. Text columns are dictionary-encoded (categoricals in pandas) and
+# counts are int32; each file keeps min/max statistics per column. Reads prune partitions by
+# spec/state/year/month and only load the columns asked for. The old wide layout (one column
+# per dimension value) is made on demand by pivot_wide().
+DATASET_DIR = os.environ.get("VAHAN_DATASET_DIR", os.path.join(os.getcwd(), "vahan_dataset"))
+PARTITION_KEYS = ("spec", "state", "year", "month")
+PARTITIONING = ds.partitioning(pa.schema([(key, pa.string()) for key in PARTITION_KEYS[1:]]), flavor="hive")
+LONG_COLUMNS = ["state", "yyyymm", "maker", "dimension_type", "dimension_value", "count"]
+CATEGORY_COLUMNS = ("state", "maker", "dimension_type", "dimension_value")
+# Columns stored in the data files; state, year and month are in the partition path
+DATA_SCHEMA = pa.schema([
+    ("yyyymm", pa.int32()),
+    ("maker", pa.dictionary(pa.int32(), pa.string())),
+    ("dimension_type", pa.dictionary(pa.int32(), pa.string())),
+    ("dimension_value", pa.dictionary(pa.int32(), pa.string())),
+    ("count", pa.int32()),
+])
+SCHEMA_FILE = "_common_metadata"
+MONTH_NUMBERS = {m.upper(): f"{i:02d}" for i, m in enumerate(month_abbr) if m}
+
+def spec_name(row_dimension, column_dimension):
+    """'Maker', 'Vehicle Class' -> 'Maker_Vehicle_Class', like the outputs folder names"""
+    return f"{row_dimension}_{column_dimension}".replace(" ", "_")
+
+def _spec_dir(spec, dataset_dir=None):
+    return os.path.join(dataset_dir or DATASET_DIR, f"spec={spec}")
+
+def dataset_specs(dataset_dir=None):
+    """Specs stored in the dataset, e.g. ['Maker_Fuel', 'Maker_Vehicle_Class']"""
+    dataset_dir = dataset_dir or DATASET_DIR
+    if not os.path.isdir(dataset_dir):
+        return []
+    return sorted(unquote(name[len("spec="):]) for name in os.listdir(dataset_dir) if name.startswith("spec="))
+
+def _spec_schema(spec, dataset_dir=None):
+    schema_file = os.path.join(_spec_dir(spec, dataset_dir), SCHEMA_FILE)
+    return pq.read_schema(schema_file) if os.path.exists(schema_file) else None
+
+def long_types(df):
+    """Categoricals for the text columns (in order of first appearance) and int32 yyyymm/count"""
+    for col in CATEGORY_COLUMNS:
+        if not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = pd.Categorical(df[col], categories=pd.unique(df[col]))
+    df["yyyymm"] = df["yyyymm"].astype("int32")
+    df["count"] = df["count"].astype("int32")
+    return df[LONG_COLUMNS]
+
+def write_dataset(long_df, spec, dataset_dir=None):
+    """
+    Write a combined long table (LONG_COLUMNS) into the spec's partitions. Partitions in the table
+    replace what was stored for them; other partitions are kept. Returns the number of
+    partitions written.
+    """
+    spec_dir = _spec_dir(spec, dataset_dir)
+    previous = _spec_schema(spec, dataset_dir)
+    if previous is not None and not previous.equals(DATA_SCHEMA):
+        print(f"[WARN] {spec_dir} was written in an older layout; removing it (combine its other folders again)")
+        shutil.rmtree(spec_dir, ignore_errors=True)
+    df = long_df.copy()
+    df["state"] = df["state"].astype(str)
+    yyyymm = df["yyyymm"].astype(str)
+    df["year"] = yyyymm.str[:4]
+    df["month"] = yyyymm.str[4:6]
+    # Rows of a maker together, in name order, so the maker statistics of each row group stay narrow
+    df = df.sort_values(["state", "yyyymm", "maker"], kind="stable",
+                        key=lambda col: col.astype(str) if col.name == "maker" else col)
+    schema = pa.schema([(key, pa.string()) for key in PARTITION_KEYS[1:]] + list(DATA_SCHEMA))
+    table = pa.Table.from_pandas(df[list(PARTITION_KEYS[1:]) + DATA_SCHEMA.names], schema=schema, preserve_index=False)
+    pq.write_to_dataset(table, spec_dir, partitioning=PARTITIONING, existing_data_behavior="delete_matching",
+                        basename_template="part-{i}.parquet", write_statistics=True)
+    pq.write_metadata(DATA_SCHEMA, os.path.join(spec_dir, SCHEMA_FILE))
+    partitions = df[["state", "year", "month"]].drop_duplicates()
+    print(f"[INFO] Wrote {len(df)} counts of {spec} into {len(partitions)} partitions under {spec_dir}")
+    return len(partitions)
+
+def read_dataset(spec, states=None, years=None, months=None, makers=None, dimension_values=None,
+                 columns=None, wide=False, dataset_dir=None):
+    """
+    Read the counts of one spec (or a list of specs) as a long DataFrame. `states`, `years`
+    ('2024') and `months` ('01'..'12' or 'JAN'..'DEC') prune partitions; `makers` and
+    `dimension_values` filter rows using the files' statistics; `columns` loads only those of
+    LONG_COLUMNS. With `wide`, returns pivot_wide() of the result instead. Returns None when
+    nothing is stored for the spec.
+    """
+    if not isinstance(spec, str):
+        frames = [read_dataset(s, states, years, months, makers, dimension_values, columns, False, dataset_dir)
+                  for s in spec]
+        frames = [df for df in frames if df is not None]
+        if not frames:
+            return None
+        df = pd.concat(frames, ignore_index=True)
+        for col in CATEGORY_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].astype("category")
+        return pivot_wide(df) if wide else df
+    schema = _spec_schema(spec, dataset_dir)
+    if schema is None or not schema.equals(DATA_SCHEMA):
+        print(f"[WARN] No dataset in the current layout stored for {spec} under {dataset_dir or DATASET_DIR}")
+        return None
+    dataset = ds.dataset(_spec_dir(spec, dataset_dir), format="parquet", partitioning=PARTITIONING,
+                         schema=pa.schema(list(DATA_SCHEMA) + list(PARTITIONING.schema)))
+    expression = None
+    for field, values in (("state", states), ("year", years), ("month", months),
+                          ("maker", makers), ("dimension_value", dimension_values)):
+        if values is None:
+            continue
+        values = [str(v) for v in ([values] if isinstance(values, (str, int)) else values)]
+        if field == "month":
+            values = [MONTH_NUMBERS.get(v.upper()[:3], v.zfill(2)) for v in values]
+        condition = ds.field(field).isin(values)
+        expression = condition if expression is None else expression & condition
+    wanted = LONG_COLUMNS if wide or columns is None else [col for col in LONG_COLUMNS if col in columns]
+    df = dataset.to_table(columns=wanted, filter=expression).to_pandas()
+    if "state" in df.columns:
+        df["state"] = df["state"].astype("category")
+    return pivot_wide(df) if wide else df
+
+def pivot_wide(long_df):
+    """
+    The wide layout of a long table: State, Month (YYYYMM), Maker, one count column per dimension
+    value (in order of first appearance) and TOTAL, one row per state, month and maker. A table
+    with more than one dimension_type (e.g. Fuel and Vehicle Class) gets '<type>: <value>' columns
+    and one 'TOTAL <type>' per type, since each type breaks down the same vehicles.
+    """
+    keys = ["state", "yyyymm", "maker"]
+    df = long_df.astype({"state": str, "maker": str, "dimension_type": str, "dimension_value": str, "count": "int64"})
+    types = list(dict.fromkeys(df["dimension_type"]))
+    if len(types) > 1:
+        df["dimension_value"] = df["dimension_type"] + ": " + df["dimension_value"]
+    order = pd.MultiIndex.from_frame(df[keys].drop_duplicates())
+    values = list(dict.fromkeys(df["dimension_value"]))
+    wide = df.groupby(keys + ["dimension_value"], sort=False)["count"].sum().unstack(fill_value=0)
+    wide = wide.reindex(index=order, columns=values, fill_value=0)
+    if len(types) == 1:
+        wide["TOTAL"] = wide.sum(axis=1)
+    else:
+        for dimension_type in types:
+            prefix = f"{dimension_type}: "
+            wide[f"TOTAL {dimension_type}"] = wide[[col for col in values if col.startswith(prefix)]].sum(axis=1)
+    wide.columns.name = None
+    return wide.reset_index().rename(columns={"state": "State", "yyyymm": "Month", "maker": "Maker"})
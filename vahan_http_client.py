@@ -0,0 +1,301 @@
+import os
+import re
+import xml.etree.ElementTree as ET
+from html.parser import HTMLParser
+import requests
+from requests.adapters import HTTPAdapter
+from option_matching import match_option
+
+VAHAN_URL = os.environ.get("VAHAN_URL", "https://vahan.parivahan.gov.in/vahan4dashboard/vahan/view/reportview.xhtml")
+VIEW_STATE_FIELD = "javax.faces.ViewState"
+
+# Dropdowns whose component id is stable, keyed like DROPDOWN_ORDER in main.py
+STABLE_SELECT_IDS = {
+    "yaxis": "yaxisVar",
+    "xaxis": "xaxisVar",
+    "year_type": "selectedYearType",
+    "year": "selectedYear",
+    "rto": "selectedRto",
+}
+# Dropdowns with generated ids (j_idtNN) are recognised by the options they contain
+SELECT_OPTION_MARKERS = {
+    "type": "Actual Value",
+    "state": "All Vahan4 Running States",
+}
+
+class _PageParser(HTMLParser):
+    """Collects the form, hidden fields, selects, buttons and links of a JSF page or partial update"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.form_id = None
+        self.form_action = None
+        self.hidden = {}
+        self.selects = {}
+        self.buttons = {}
+        self.links = set()
+        self._select = None
+        self._option = None
+        self._button = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "form" and self.form_id is None:
+            self.form_id = attrs.get("id") or attrs.get("name")
+            self.form_action = attrs.get("action")
+        elif tag == "input" and attrs.get("type", "").lower() == "hidden" and attrs.get("name"):
+            self.hidden[attrs["name"]] = attrs.get("value", "")
+        elif tag == "select" and attrs.get("id"):
+            self._select = {"id": attrs["id"], "name": attrs.get("name", attrs["id"]), "options": [], "selected": None}
+            self.selects[attrs["id"]] = self._select
+        elif tag == "option" and self._select is not None:
+            self._option = {"value": attrs.get("value"), "text": ""}
+            if "selected" in attrs:
+                self._select["selected"] = attrs.get("value")
+        elif tag == "button" and attrs.get("id"):
+            self._button = {"id": attrs["id"], "name": attrs.get("name", attrs["id"]), "text": ""}
+            self.buttons[attrs["id"]] = self._button
+        elif tag == "a" and attrs.get("id"):
+            self.links.add(attrs["id"])
+
+    def handle_endtag(self, tag):
+        if tag == "option" and self._option is not None:
+            self._option["text"] = self._option["text"].strip()
+            if self._option["value"] is None:
+                self._option["value"] = self._option["text"]
+            self._select["options"].append(self._option)
+            self._option = None
+        elif tag == "select":
+            self._select = None
+        elif tag == "button":
+            self._button = None
+
+    def handle_data(self, data):
+        if self._option is not None:
+            self._option["text"] += data
+        if self._button is not None:
+            self._button["text"] += data
+
+def _parse_html(html):
+    parser = _PageParser()
+    parser.feed(html)
+    parser.close()
+    return parser
+
+class VahanHttpClient:
+    """
+    Drives the VAHAN report page without a browser by replaying the PrimeFaces partial-postback protocol:
+    GET the page, keep javax.faces.ViewState, POST dropdown changes/refresh/month as partial requests
+    and POST the xls link as a regular form submit that streams back the Excel file.
+    One client holds one JSF view, so every worker needs its own client.
+    """
+
+    def __init__(self, base_url=VAHAN_URL, timeout=60, pool_size=4):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=2)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"User-Agent": "Mozilla/5.0 (VAHAN automator)"})
+        self.form_id = None
+        self.post_url = base_url
+        self.hidden = {}
+        self.selects = {}
+        self.buttons = {}
+        self.links = set()
+        self.values = {}
+
+    # --- page state -------------------------------------------------------
+
+    def load(self):
+        """GET the report page and extract the form, ViewState and components. Returns True on success."""
+        try:
+            response = self.session.get(self.base_url, timeout=self.timeout)
+            response.raise_for_status()
+        except Exception as e:
+            print(f"[ERROR] Could not load {self.base_url}: {e}")
+            return False
+        page = _parse_html(response.text)
+        if not page.form_id or VIEW_STATE_FIELD not in page.hidden:
+            print("[ERROR] Report page has no JSF form/ViewState")
+            return False
+        self.form_id = page.form_id
+        if page.form_action:
+            self.post_url = requests.compat.urljoin(response.url, page.form_action)
+        self.hidden, self.selects, self.buttons, self.links, self.values = {}, {}, {}, set(), {}
+        self._merge(page)
+        print(f"[INFO] Loaded report page over HTTP (form '{self.form_id}', {len(self.selects)} dropdowns)")
+        return True
+
+    def _merge(self, page):
+        self.hidden.update(page.hidden)
+        self.buttons.update(page.buttons)
+        self.links.update(page.links)
+        for select_id, select in page.selects.items():
+            self.selects[select_id] = select
+            selected = select["selected"]
+            if selected is None and select["options"]:
+                selected = select["options"][0]["value"]
+            self.values[select["name"]] = selected
+
+    def component_id(self, key):
+        """Resolve a logical dropdown key (yaxis, state, month, ...) to its current component id"""
+        for select_id in self.selects:
+            base_id = select_id[:-len("_input")] if select_id.endswith("_input") else select_id
+            if key in STABLE_SELECT_IDS and base_id == STABLE_SELECT_IDS[key]:
+                return base_id
+            if key == "month" and base_id.endswith("selectMonth"):
+                return base_id
+        marker = SELECT_OPTION_MARKERS.get(key)
+        if marker:
+            for select_id, select in self.selects.items():
+                if any(marker.lower() in opt["text"].lower() for opt in select["options"]):
+                    return select_id[:-len("_input")] if select_id.endswith("_input") else select_id
+        return None
+
+    def _select_for(self, key):
+        component = self.component_id(key)
+        if component is None:
+            return None, None
+        return component, self.selects.get(component + "_input") or self.selects.get(component)
+
+    def options(self, key):
+        """Text of every option of a logical dropdown"""
+        _, select = self._select_for(key)
+        return [opt["text"] for opt in select["options"]] if select else []
+
+    def refresh_button_id(self):
+        for button_id, button in self.buttons.items():
+            if button["text"].strip() == "Refresh":
+                return button_id
+        return None
+
+    def xls_link_id(self):
+        return next((link for link in self.links if link.endswith(":xls")), None)
+
+    def _form_fields(self):
+        fields = {self.form_id: self.form_id}
+        fields.update(self.hidden)
+        fields.update({name: value for name, value in self.values.items() if value is not None})
+        return fields
+
+    # --- partial postbacks ------------------------------------------------
+
+    def _partial_post(self, source, event=None, extra=None):
+        data = self._form_fields()
+        data.update({
+            "javax.faces.partial.ajax": "true",
+            "javax.faces.source": source,
+            "javax.faces.partial.execute": "@form",
+            "javax.faces.partial.render": "@form",
+        })
+        if event:
+            data["javax.faces.behavior.event"] = event
+            data["javax.faces.partial.event"] = event
+        if extra:
+            data.update(extra)
+        headers = {"Faces-Request": "partial/ajax", "X-Requested-With": "XMLHttpRequest"}
+        try:
+            response = self.session.post(self.post_url, data=data, headers=headers, timeout=self.timeout)
+            response.raise_for_status()
+            return self._apply_partial_response(response.text)
+        except Exception as e:
+            print(f"[ERROR] Partial postback from '{source}' failed: {e}")
+            return False
+
+    def _apply_partial_response(self, xml_text):
+        root = ET.fromstring(xml_text.strip())
+        error = root.find(".//error")
+        if error is not None:
+            message = error.findtext("error-message") or error.findtext("error-name") or "unknown error"
+            print(f"[ERROR] Server returned a partial-response error: {message}")
+            return False
+        if root.find(".//redirect") is not None:
+            print("[ERROR] Server redirected the partial request (view expired?)")
+            return False
+        for update in root.iter("update"):
+            update_id = update.get("id", "")
+            content = update.text or ""
+            if VIEW_STATE_FIELD in update_id:
+                self.hidden[VIEW_STATE_FIELD] = content.strip()
+            else:
+                self._merge(_parse_html(content))
+        return True
+
+    # --- actions ----------------------------------------------------------
+
+    def select(self, key, item_text):
+        """Select an option of a logical dropdown and post the change. Returns True on success."""
+        component, select = self._select_for(key)
+        if select is None:
+            print(f"[ERROR] Dropdown '{key}' not found on the report page")
+            return False
+        opt = match_option(select["options"], key, item_text)
+        if opt is None:
+            print(f"[ERROR] '{item_text}' not found in dropdown '{key}'. Options: {[o['text'] for o in select['options']]}")
+            return False
+        self.values[select["name"]] = opt["value"]
+        print(f"[INFO] Selected '{opt['text']}' in {key} over HTTP")
+        return self._partial_post(component, event="change")
+
+    def refresh(self):
+        button_id = self.refresh_button_id()
+        if not button_id:
+            print("[ERROR] Could not find refresh button on the report page")
+            return False
+        return self._partial_post(button_id, extra={button_id: button_id})
+
+    def get_available_states(self):
+        return [s for s in self.options("state") if s.strip() and "All Vahan4 Running States" not in s]
+
+    def get_available_months(self):
+        return [m.strip().upper() for m in self.options("month")
+                if m.strip() and not re.fullmatch(r"\d{4}", m.strip()) and m.strip().upper() != "SELECT MONTH"]
+
+    def download_xls(self, dest_path, chunk_size=64 * 1024):
+        """Submit the xls link and stream the Excel response into dest_path. Returns the path or None."""
+        link_id = self.xls_link_id()
+        if not link_id:
+            print("[ERROR] Could not find Excel download link on the report page")
+            return None
+        data = self._form_fields()
+        data[link_id] = link_id
+        try:
+            with self.session.post(self.post_url, data=data, timeout=self.timeout, stream=True) as response:
+                response.raise_for_status()
+                chunks = response.iter_content(chunk_size=chunk_size)
+                first = next(chunks, b"")
+                if not first.startswith(b"PK"):
+                    print(f"[ERROR] Excel download returned '{response.headers.get('Content-Type')}' instead of a workbook")
+                    return None
+                with open(dest_path, "wb") as f:
+                    f.write(first)
+                    for chunk in chunks:
+                        f.write(chunk)
+            return dest_path
+        except Exception as e:
+            print(f"[ERROR] Excel download failed: {e}")
+            return None
+
+    def fetch_xls(self):
+        """Submit the xls link and return the Excel response body in memory, or None"""
+        link_id = self.xls_link_id()
+        if not link_id:
+            print("[ERROR] Could not find Excel download link on the report page")
+            return None
+        data = self._form_fields()
+        data[link_id] = link_id
+        try:
+            response = self.session.post(self.post_url, data=data, timeout=self.timeout)
+            response.raise_for_status()
+            if not response.content.startswith(b"PK"):
+                print(f"[ERROR] Excel download returned '{response.headers.get('Content-Type')}' instead of a workbook")
+                return None
+            return response.content
+        except Exception as e:
+            print(f"[ERROR] Excel download failed: {e}")
+            return None
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,181 @@
+import re
+import json
+import zipfile
+import warnings
+import openpyxl
+import xml.etree.ElementTree as ET
+from table_scrape import table_cells
+
+# Layout of a VAHAN report export: a title row, a header row starting with "S No" and naming the
+# row dimension (e.g. Maker) and the column dimension (e.g. Fuel), a blank row, a row with the
+# column labels, then one row per maker ending in a TOTAL column.
+
+def clean_label(value):
+    """Collapse the non-breaking spaces and padding the portal puts around labels"""
+    if value is None:
+        return ""
+    return re.sub(r"\s+", " ", str(value).replace("\xa0", " ")).strip()
+
+SHEET_XML = "xl/worksheets/sheet1.xml"
+SHARED_STRINGS_XML = "xl/sharedStrings.xml"
+_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+
+def _is_sno(label):
+    return label.lower().replace(" ", "").replace(".", "") == "sno"
+
+def _to_count(value):
+    label = clean_label(value).replace(",", "")
+    try:
+        return int(float(label)) if label else 0
+    except ValueError:
+        return None
+
+def _cell_count(value):
+    """Count of a data cell; numbers and plain digit strings skip the label clean-up"""
+    if value is None:
+        return 0
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).replace(",", "")
+    if text.isdigit():
+        return int(text)
+    return _to_count(value) or 0
+
+def _column_index(ref):
+    """0-based column of a cell reference such as 'AB12'"""
+    index = 0
+    for ch in ref:
+        if not ch.isalpha():
+            break
+        index = index * 26 + ord(ch.upper()) - 64
+    return index - 1
+
+def _xml_rows(z):
+    """Rows of the first worksheet straight from its XML: shared strings resolved, numbers typed, gaps as None"""
+    shared = []
+    if SHARED_STRINGS_XML in z.namelist():
+        with z.open(SHARED_STRINGS_XML) as f:
+            for _, el in ET.iterparse(f):
+                if el.tag == _NS + "si":
+                    shared.append("".join(t.text or "" for t in el.iter(_NS + "t")))
+                    el.clear()
+    with z.open(SHEET_XML) as f:
+        for _, el in ET.iterparse(f):
+            if el.tag != _NS + "row":
+                continue
+            row = []
+            for c in el.iter(_NS + "c"):
+                row.extend([None] * (_column_index(c.get("r")) - len(row)))
+                v, kind = c.find(_NS + "v"), c.get("t")
+                if kind == "inlineStr":
+                    value = "".join(t.text or "" for t in c.iter(_NS + "t"))
+                elif v is None or v.text is None:
+                    value = None
+                elif kind == "s":
+                    value = shared[int(v.text)]
+                elif kind in ("str", "e"):
+                    value = v.text
+                elif kind == "b":
+                    value = v.text == "1"
+                else:
+                    value = float(v.text)
+                    value = int(value) if value.is_integer() else value
+                row.append(value)
+            el.clear()
+            yield tuple(row)
+
+def iter_sheet_rows(file_path):
+    """
+    Values of the first sheet's rows, scanned once. Portal exports are streamed straight from
+    the sheet XML, about twice as fast as openpyxl's read-only reader; other workbooks are
+    read with openpyxl.
+    """
+    with zipfile.ZipFile(file_path) as z:
+        if SHEET_XML in z.namelist():
+            yield from _xml_rows(z)
+            return
+    with warnings.catch_warnings():
+        # Portal exports have no default style; openpyxl warns about it on every load
+        warnings.simplefilter("ignore")
+        wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        yield from wb.active.iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+def read_report_table(file_path):
+    """
+    Read a downloaded report workbook in one streaming pass into a report table, the same shape
+    as table_scrape.table_from_snapshot(): {'row_dimension', 'column_dimension', 'columns',
+    'rows'} with each row {'label', 'counts', 'total'}. The two header rows are resolved into
+    the column labels and the counts are typed on the way. Returns None when the file is not
+    a report.
+    """
+    rows = iter_sheet_rows(file_path)
+    try:
+        header = None
+        for row in rows:
+            labels = [clean_label(v) for v in row]
+            if labels and _is_sno(labels[0]):
+                header = labels
+                break
+        if header is None:
+            return None
+        label_col = next((i for i, label in enumerate(header) if i > 0 and label), 1)
+        total_col = next((i for i, label in enumerate(header) if label.upper() == "TOTAL"), None)
+        column_dimension = next((label for i, label in enumerate(header) if i > label_col and label and i != total_col), "")
+        columns, data_cols, table_rows = None, None, []
+        for row in rows:
+            if columns is None:
+                labels = [clean_label(v) for v in row]
+                if any(labels):
+                    # The row under the group header names the columns
+                    data_cols = [i for i in range(label_col + 1, len(labels)) if i != total_col and labels[i]]
+                    columns = [labels[i] for i in data_cols]
+                continue
+            # Data rows: only the S No and label cells need cleaning, counts are parsed directly
+            if len(row) <= label_col or _to_count(row[0]) is None:
+                continue
+            label = clean_label(row[label_col])
+            if not label:
+                continue
+            counts = [_cell_count(row[i]) if i < len(row) else 0 for i in data_cols]
+            total = _to_count(row[total_col]) if total_col is not None and total_col < len(row) else None
+            table_rows.append({"label": label, "counts": counts, "total": sum(counts) if total is None else total})
+        return {
+            "row_dimension": header[label_col],
+            "column_dimension": column_dimension,
+            "columns": columns or [],
+            "rows": table_rows,
+        }
+    except Exception as e:
+        print(f"[WARN] Could not open {file_path} as a workbook: {e}")
+        return None
+    finally:
+        rows.close()
+
+def read_report(file_path):
+    """
+    Read a downloaded report into {(row label, column label): count}, leaving out the S No and
+    TOTAL columns. Report tables scraped from the page (.json) are read too. Returns None when
+    the file is not a report.
+    """
+    if file_path.lower().endswith(".json"):
+        try:
+            with open(file_path, encoding="utf-8") as f:
+                return table_cells(json.load(f))
+        except Exception as e:
+            print(f"[WARN] Could not read report table {file_path}: {e}")
+            return None
+    table = read_report_table(file_path)
+    return table_cells(table) if table else None
+
+def diff_reports(old_cells, new_cells):
+    """Cells whose count differs between two reads, as dicts sorted by the size of the change"""
+    changes = []
+    for key in set(old_cells) | set(new_cells):
+        old, new = old_cells.get(key, 0), new_cells.get(key, 0)
+        if old != new:
+            changes.append({"row": key[0], "column": key[1], "old": old, "new": new, "change": new - old})
+    changes.sort(key=lambda c: (-abs(c["change"]), c["row"], c["column"]))
+    return changes
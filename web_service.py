@@ -1,6 +1,6 @@
 import os
 import threading
-from flask import Flask, render_template, request, redirect, url_for, send_from_directory, jsonify, send_file
+from flask import Flask, render_template, request, redirect, url_for, send_from_directory, jsonify, send_file, Response
 import subprocess
 import zipfile
 import io
@@ -8,6 +8,8 @@ from calendar import month_abbr
 import re
 import pandas as pd
 from merge_companies import merge_companies
+from step_metrics import SPANS_FILE_NAME, load_spans, prometheus_text
+from vahan_dataset import dataset_specs, read_dataset
 
 print("[DEBUG] Flask app started and loaded")
 
@@ -120,7 +122,8 @@ def dashboard():
     selected_missing_folder = None
     missing = []
     folder_range = None
-    filter_candidates = [f for f in os.listdir('.') if f.startswith('combined') and f.endswith('.xlsx')]
+    # Specs of the combined dataset first, then combined workbooks
+    filter_candidates = dataset_specs() + [f for f in os.listdir('.') if f.startswith('combined') and f.endswith('.xlsx')]
     if request.method == 'POST' and 'folder_to_check_missing' in request.form:
         selected_missing_folder = request.form.get('folder_to_check_missing')
         start_year, start_month, end_year, end_month = parse_folder_range(selected_missing_folder)
@@ -170,7 +173,7 @@ def run_service(service):
         run_script('check_missing', 'python check_missing_fixed.py')
     elif service == 'combine':
         folder_to_combine = request.form.get('folder_to_combine', 'outputs')
-        run_script('combine', f'python combine_all_vahan_data.py "{folder_to_combine}"')
+        run_script('combine', f'python combine_all_vahan_data.py "{folder_to_combine}" --export')
     elif service == 'filter':
         run_script('filter', 'python filter_vehicles.py')
     return redirect(url_for('dashboard'))
@@ -188,6 +191,18 @@ def download_file(filename):
     fname = os.path.basename(filename)
     return send_from_directory(directory or '.', fname, as_attachment=True)
 
+@app.route('/metrics')
+def metrics():
+    """Step latency summaries and strategy counts of the latest run, in the Prometheus text format"""
+    base_dir = os.getcwd()
+    span_files = [os.path.join(base_dir, d, SPANS_FILE_NAME) for d in os.listdir(base_dir)
+                  if d.startswith('outputs') and os.path.isfile(os.path.join(base_dir, d, SPANS_FILE_NAME))]
+    if not span_files:
+        return Response("# No run has recorded spans yet\n", mimetype='text/plain')
+    latest = max(span_files, key=os.path.getmtime)
+    body = f"# Spans from {os.path.relpath(latest, base_dir)}\n" + prometheus_text(load_spans(latest))
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
 # Add a route to download a folder as a zip file
 @app.route('/download_folder/<path:foldername>')
 def download_folder(foldername):
@@ -291,19 +306,23 @@ def merge_companies_route():
     import json
     base_dir = os.getcwd()
     # Only show files that are likely to be combined/filterable
-    filter_candidates = [f for f in os.listdir('.') if f.endswith('.xlsx') and not f.startswith('~$')]
+    filter_candidates = dataset_specs() + [f for f in os.listdir('.') if f.endswith('.xlsx') and not f.startswith('~$')]
     selected_file = request.form.get('file') if request.method == 'POST' else None
     unique_companies = []
     merge_result_file = None
     download_link = None
-    if selected_file:
+    if selected_file in dataset_specs():
+        # Only the maker column is read from the dataset
+        df = read_dataset(selected_file, columns=['maker'])
+    elif selected_file:
         df = pd.read_excel(selected_file)
+    if selected_file:
         maker_col = next((col for col in df.columns if isinstance(col, str) and "MAKER" in col.upper()), None)
         if maker_col:
             unique_companies = sorted(df[maker_col].dropna().unique().tolist())
     if request.method == 'POST' and 'merge_map_json' in request.form:
         merge_map = json.loads(request.form['merge_map_json'])
-        output_file = f"merged_{selected_file}"
+        output_file = f"merged_{selected_file}" + ('.xlsx' if selected_file in dataset_specs() else '')
         merge_companies(selected_file, merge_map, output_file)
         merge_result_file = output_file
         download_link = url_for('download_file', filename=output_file)
@@ -0,0 +1,49 @@
+import os
+import base64
+from step_metrics import traced
+
+# Capture mode: take the Excel response into memory instead of letting Chrome save it to the
+# downloads folder, and write it once into the outputs folder.
+# Enable with `main.py --capture` or VAHAN_CAPTURE=1.
+CAPTURE_MODE = os.environ.get("VAHAN_CAPTURE", "0") == "1"
+
+# Replays the download link's (non-AJAX) postback from inside the page with the page's own
+# form fields, ViewState and cookies, and hands the response body back base64-encoded.
+# Arguments: the download <a> element; the last argument is the async script callback.
+CAPTURE_XLS_JS = """
+var link = arguments[0], done = arguments[arguments.length - 1];
+var form = link.form || link.closest('form');
+if (!form) { done({error: 'download link is not inside a form'}); return; }
+var body = new URLSearchParams(new FormData(form));
+body.append(link.id, link.id);
+fetch(form.action || window.location.href, {method: 'POST', body: body, credentials: 'same-origin'})
+    .then(function (response) {
+        return response.arrayBuffer().then(function (buffer) {
+            var bytes = new Uint8Array(buffer), binary = '';
+            for (var i = 0; i < bytes.length; i += 0x8000) {
+                binary += String.fromCharCode.apply(null, bytes.subarray(i, i + 0x8000));
+            }
+            done({status: response.status, type: response.headers.get('Content-Type'), data: btoa(binary)});
+        });
+    })
+    .catch(function (e) { done({error: String(e)}); });
+"""
+
+@traced("capture_xls")
+def capture_xls(driver, link, timeout=120):
+    """Fetch the workbook behind the download link into memory. Returns the xlsx bytes or None."""
+    try:
+        driver.set_script_timeout(timeout)
+        result = driver.execute_async_script(CAPTURE_XLS_JS, link)
+    except Exception as e:
+        print(f"[ERROR] Excel capture failed: {e}")
+        return None
+    if not result or result.get("error"):
+        print(f"[ERROR] Excel capture failed: {(result or {}).get('error')}")
+        return None
+    data = base64.b64decode(result["data"])
+    if result["status"] != 200 or not data.startswith(b"PK"):
+        print(f"[ERROR] Excel capture returned HTTP {result['status']} '{result['type']}' instead of a workbook")
+        return None
+    print(f"[INFO] Captured Excel response in memory ({len(data)} bytes)")
+    return data